@@ -0,0 +1,3137 @@
+from __future__ import annotations
+
+__author__ = "毛亚琛"
+__email__ = "maoyachen55@gmail.com"
+
+import dataclasses
+import enum
+import os
+import pathlib
+import random
+import struct
+import sys
+import typing
+import warnings
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+Color = bool
+COLORS = [RED, BLACK] = [True, False]
+COLOR_NAMES = ["black", "red"]
+
+
+PieceType = int
+PIECE_TYPES = [PAWN, CANNON, ROOK, KNIGHT, BISHOP, ADVISOR, KING] = range(1, 8)
+PIECE_SYMBOLS = [None, "p", "c", "r", "n", "b", "a", "k"]
+# 静态交换评估（see）使用的子力价值，按 PieceType 下标
+PIECE_VALUES = [0, 100, 450, 900, 400, 200, 200, 10000]
+# 交换时按价值从低到高选择吃子的棋子
+_SEE_ORDER = sorted(PIECE_TYPES, key=lambda piece_type: PIECE_VALUES[piece_type])
+PIECES_NAMES = {
+    "R": "车",
+    "r": "俥",
+    "N": "马",
+    "n": "傌",
+    "B": "相",
+    "b": "象",
+    "A": "仕",
+    "a": "士",
+    "K": "帅",
+    "k": "将",
+    "P": "兵",
+    "p": "卒",
+    "C": "炮",
+    "c": "砲",
+}
+
+ACTION_NAMES = {".": "平", "+": "进", "-": "退"}
+POSITION_NAMES = {
+    ".": "中",
+    "+": "前",
+    "-": "后",
+    "a": "一",
+    "b": "二",
+    "c": "三",
+    "d": "四",
+    "e": "五",
+}
+
+
+def piece_symbol(piece_type: PieceType) -> str:
+    return typing.cast(str, PIECE_SYMBOLS[piece_type])
+
+
+FILE_NAMES = [
+    None,
+    None,
+    None,
+    "a",
+    "b",
+    "c",
+    "d",
+    "e",
+    "f",
+    "g",
+    "h",
+    "i",
+    None,
+    None,
+    None,
+    None,
+]
+CHINESE_NUMBERS = [None, "一", "二", "三", "四", "五", "六", "七", "八", "九"]
+RANK_NAMES = [
+    None,
+    None,
+    None,
+    "0",
+    "1",
+    "2",
+    "3",
+    "4",
+    "5",
+    "6",
+    "7",
+    "8",
+    "9",
+    None,
+    None,
+    None,
+]
+
+STARTING_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+STARTING_BOARD_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR"
+
+Square = int
+SQUARES = [
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A0,
+    B0,
+    C0,
+    D0,
+    E0,
+    F0,
+    G0,
+    H0,
+    I0,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A1,
+    B1,
+    C1,
+    D1,
+    E1,
+    F1,
+    G1,
+    H1,
+    I1,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A2,
+    B2,
+    C2,
+    D2,
+    E2,
+    F2,
+    G2,
+    H2,
+    I2,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A3,
+    B3,
+    C3,
+    D3,
+    E3,
+    F3,
+    G3,
+    H3,
+    I3,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A4,
+    B4,
+    C4,
+    D4,
+    E4,
+    F4,
+    G4,
+    H4,
+    I4,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A5,
+    B5,
+    C5,
+    D5,
+    E5,
+    F5,
+    G5,
+    H5,
+    I5,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A6,
+    B6,
+    C6,
+    D6,
+    E6,
+    F6,
+    G6,
+    H6,
+    I6,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A7,
+    B7,
+    C7,
+    D7,
+    E7,
+    F7,
+    G7,
+    H7,
+    I7,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A8,
+    B8,
+    C8,
+    D8,
+    E8,
+    F8,
+    G8,
+    H8,
+    I8,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    A9,
+    B9,
+    C9,
+    D9,
+    E9,
+    F9,
+    G9,
+    H9,
+    I9,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+    __,
+] = range(256)
+
+SQUARE_NAMES = [f + r if f and r else None for r in RANK_NAMES for f in FILE_NAMES]
+
+
+def square_file(square: Square) -> int:
+    return square & 0xF
+
+
+def square_file_wxf(square: Square, color: Color) -> int:
+    if color == BLACK:
+        return square_file(square) - 2
+    else:
+        return 10 - (square_file(square) - 2)
+
+
+def square_rank(square: Square) -> int:
+    return square >> 4
+
+
+def square_in_board(square: Square) -> bool:
+    return bool(BB_SQUARES[square] & BB_IN_BOARD)
+
+
+def square_distance(a: Square, b: Square) -> int:
+    return max(
+        abs(square_file(a) - square_file(b)), abs(square_rank(a) - square_rank(b))
+    )
+
+
+def square_mirror(square: Square) -> Square:
+    return square ^ 0xF0
+
+
+SQUARES_180 = [square_mirror(sq) for sq in SQUARES]
+
+
+Bitboard = int
+BB_EMPTY = 0
+BB_ALL = (
+    0xFFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF
+)
+BB_IN_BOARD = (
+    0x0000_0000_0000_0FF8_0FF8_0FF8_0FF8_0FF8_0FF8_0FF8_0FF8_0FF8_0FF8_0000_0000_0000
+)
+BB_RED_SIDE = (
+    0x0000_0000_0000_0000_0000_0000_0000_0000_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF
+)
+BB_BLACK_SIDE = (
+    0xFFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_FFFF_0000_0000_0000_0000_0000_0000_0000_0000
+)
+
+
+def print_bitboard(bb: Bitboard) -> None:
+    builder = []
+
+    for square in SQUARES_180:
+        mask = BB_SQUARES[square]
+        if not (mask & BB_IN_BOARD):
+            continue
+        builder.append("1" if bb & mask else ".")
+
+        if mask & BB_FILE_I:
+            builder.append("\n")
+        elif square != I0:
+            builder.append(" ")
+
+    print("".join(builder))
+
+
+BB_SQUARES = [
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A0,
+    BB_B0,
+    BB_C0,
+    BB_D0,
+    BB_E0,
+    BB_F0,
+    BB_G0,
+    BB_H0,
+    BB_I0,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A1,
+    BB_B1,
+    BB_C1,
+    BB_D1,
+    BB_E1,
+    BB_F1,
+    BB_G1,
+    BB_H1,
+    BB_I1,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A2,
+    BB_B2,
+    BB_C2,
+    BB_D2,
+    BB_E2,
+    BB_F2,
+    BB_G2,
+    BB_H2,
+    BB_I2,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A3,
+    BB_B3,
+    BB_C3,
+    BB_D3,
+    BB_E3,
+    BB_F3,
+    BB_G3,
+    BB_H3,
+    BB_I3,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A4,
+    BB_B4,
+    BB_C4,
+    BB_D4,
+    BB_E4,
+    BB_F4,
+    BB_G4,
+    BB_H4,
+    BB_I4,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A5,
+    BB_B5,
+    BB_C5,
+    BB_D5,
+    BB_E5,
+    BB_F5,
+    BB_G5,
+    BB_H5,
+    BB_I5,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A6,
+    BB_B6,
+    BB_C6,
+    BB_D6,
+    BB_E6,
+    BB_F6,
+    BB_G6,
+    BB_H6,
+    BB_I6,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A7,
+    BB_B7,
+    BB_C7,
+    BB_D7,
+    BB_E7,
+    BB_F7,
+    BB_G7,
+    BB_H7,
+    BB_I7,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A8,
+    BB_B8,
+    BB_C8,
+    BB_D8,
+    BB_E8,
+    BB_F8,
+    BB_G8,
+    BB_H8,
+    BB_I8,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    BB_A9,
+    BB_B9,
+    BB_C9,
+    BB_D9,
+    BB_E9,
+    BB_F9,
+    BB_G9,
+    BB_H9,
+    BB_I9,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _____,
+    _,
+    _,
+    _,
+    _,
+] = [1 << sq for sq in SQUARES]
+
+BB_CORNERS = BB_A0 | BB_I0 | BB_A9 | BB_I9
+BB_RED_PAWNS = BB_A3 | BB_C3 | BB_E3 | BB_G3 | BB_I3
+BB_BLACK_PAWNS = BB_A6 | BB_C6 | BB_E6 | BB_G6 | BB_I6
+
+BB_IN_PALACE = (
+    BB_D0
+    | BB_E0
+    | BB_F0
+    | BB_D1
+    | BB_E1
+    | BB_F1
+    | BB_D2
+    | BB_E2
+    | BB_F2
+    | BB_D7
+    | BB_E7
+    | BB_F7
+    | BB_D8
+    | BB_E8
+    | BB_F8
+    | BB_D9
+    | BB_E9
+    | BB_F9
+)
+
+SQUARES_IN_BOARD = [sq for sq in SQUARES if BB_SQUARES[sq] & BB_IN_BOARD]
+
+BB_FILES = [
+    _,
+    _,
+    _,
+    BB_FILE_A,
+    BB_FILE_B,
+    BB_FILE_C,
+    BB_FILE_D,
+    BB_FILE_E,
+    BB_FILE_F,
+    BB_FILE_G,
+    BB_FILE_H,
+    BB_FILE_I,
+    _,
+    _,
+    _,
+    _,
+] = [
+    0x0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001_0001
+    << i
+    for i in range(16)
+]
+
+BB_RANKS = [
+    _,
+    _,
+    _,
+    BB_RANK_0,
+    BB_RANK_1,
+    BB_RANK_2,
+    BB_RANK_3,
+    BB_RANK_4,
+    BB_RANK_5,
+    BB_RANK_6,
+    BB_RANK_7,
+    BB_RANK_8,
+    BB_RANK_9,
+    _,
+    _,
+    _,
+] = [0xFFFF << (16 * i) for i in range(16)]
+
+BB_SQUARES_BISHOP = (
+    BB_C0
+    | BB_G0
+    | BB_A2
+    | BB_E2
+    | BB_I2
+    | BB_C4
+    | BB_G4
+    | BB_C5
+    | BB_G5
+    | BB_A7
+    | BB_E7
+    | BB_I7
+    | BB_C9
+    | BB_G9
+)
+BB_SQUARES_ADVISOR = (
+    BB_D0 | BB_F0 | BB_E1 | BB_D2 | BB_F2 | BB_D7 | BB_F7 | BB_E8 | BB_D9 | BB_F9
+)
+
+
+def msb(bb: Bitboard) -> int:
+    return bb.bit_length() - 1
+
+
+def scan_reversed(bb: Bitboard) -> Iterator[Square]:
+    while bb:
+        r = bb.bit_length() - 1
+        yield r
+        bb ^= BB_SQUARES[r]
+
+
+if hasattr(int, "bit_count"):
+
+    def popcount(bb: Bitboard) -> int:
+        return bb.bit_count()
+
+else:
+
+    def popcount(bb: Bitboard) -> int:
+        return bin(bb).count("1")
+
+
+count_ones = popcount
+
+
+def between(a: Square, b: Square) -> Bitboard:
+    return BB_BETWEEN[a][b]
+
+
+def line(a: Square, b: Square) -> Bitboard:
+    return BB_LINE[a][b]
+
+
+def _between(a: Square, b: Square) -> Bitboard:
+    file_a, file_b = square_file(a), square_file(b)
+    rank_a, rank_b = square_rank(a), square_rank(b)
+    if file_a == file_b:
+        bb = BB_FILES[file_a] & ((BB_ALL << a) ^ (BB_ALL << b))
+    elif rank_a == rank_b:
+        bb = BB_RANKS[rank_a] & ((BB_ALL << a) ^ (BB_ALL << b))
+    else:
+        bb = BB_EMPTY
+    return bb & (bb - 1)
+
+
+def _line(a: Square, b: Square) -> Bitboard:
+    file_a, file_b = square_file(a), square_file(b)
+    rank_a, rank_b = square_rank(a), square_rank(b)
+    if file_a == file_b:
+        return BB_FILES[file_a]
+    elif rank_a == rank_b:
+        return BB_RANKS[rank_a]
+    else:
+        return BB_EMPTY
+
+
+def _sliding_attacks(
+    square: Square, occupied: Bitboard, deltas: Iterable[int]
+) -> Bitboard:
+    attacks = BB_EMPTY
+
+    for delta in deltas:
+        sq = square
+        while True:
+            sq += delta
+            if not (0 <= sq < 256) or square_distance(sq, sq - delta) > 2:
+                break
+
+            attacks |= BB_SQUARES[sq]
+
+            if occupied & BB_SQUARES[sq]:
+                break
+
+    return attacks
+
+
+def _jump_attacks(
+    square: Square, occupied: Bitboard, deltas: Iterable[int]
+) -> Bitboard:
+    attacks = BB_EMPTY
+    for delta in deltas:
+        hops = 0
+        sq = square
+        while True:
+            sq += delta
+            if not (0 <= sq < 256) or square_distance(sq, sq - delta) > 2:
+                break
+
+            if occupied & BB_SQUARES[sq]:
+                if hops == 1:
+                    attacks |= BB_SQUARES[sq]
+                    break
+                else:
+                    hops += 1
+
+    return attacks
+
+
+def _edges(square: Square) -> Bitboard:
+    return ((BB_RANK_0 | BB_RANK_9) & ~BB_RANKS[square_rank(square)]) | (
+        (BB_FILE_A | BB_FILE_I) & ~BB_FILES[square_file(square)]
+    )
+
+
+def _carry_rippler(mask: Bitboard) -> Iterator[Bitboard]:
+    # Carry-Rippler trick to iterate subsets of mask.
+    subset = BB_EMPTY
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+
+
+def _attack_table(
+    deltas: List[int], jump=False
+) -> Tuple[List[Bitboard], List[Dict[Bitboard, Bitboard]]]:
+    mask_table = []
+    attack_table = []
+
+    for square in SQUARES:
+        attacks = {}
+
+        mask = _sliding_attacks(square, BB_EMPTY, deltas) & BB_IN_BOARD
+        if not jump:
+            mask &= ~_edges(square)
+        for subset in _carry_rippler(mask):
+            attacks[subset] = (
+                _jump_attacks(square, subset, deltas)
+                if jump
+                else _sliding_attacks(square, subset, deltas)
+            )
+
+        attack_table.append(attacks)
+        mask_table.append(mask)
+
+    return mask_table, attack_table
+
+
+def _step_attacks(square: Square, deltas: Iterable[int]) -> Bitboard:
+    return _sliding_attacks(square, BB_ALL, deltas)
+
+
+def _pawn_attacks(reverse=False) -> List[List[Bitboard]]:
+    attacks = [[], []]
+    direction = -1 if reverse else 1
+    for sq in SQUARES:
+        # 红兵
+        if sq > I4:
+            # 过河兵
+            attacks[RED].append(_step_attacks(sq, [-1, 16 * direction, 1]))
+        else:
+            attacks[RED].append(_step_attacks(sq, [16 * direction]))
+    for sq in SQUARES:
+        # 黑卒
+        if sq < A5:
+            # 过河兵
+            attacks[BLACK].append(_step_attacks(sq, [-1, -16 * direction, 1]))
+        else:
+            attacks[BLACK].append(_step_attacks(sq, [-16 * direction]))
+    return attacks
+
+
+def _knight_attacks(
+    reverse=False,
+) -> Tuple[List[Bitboard], List[Dict[Bitboard, Bitboard]]]:
+    mask_table = []
+    attack_table = []
+    knight_deltas = (
+        [33, 31, -14, 18, -33, -31, -18, 14]
+        if not reverse
+        else [14, 31, 33, 18, -14, -31, -18, -33]
+    )
+    directions = [16, 1, -16, -1] if not reverse else [15, 17, -15, -17]
+    for square in SQUARES:
+        if not square_in_board(square):
+            attack_table.append({BB_EMPTY: BB_EMPTY})
+            mask_table.append(BB_EMPTY)
+            continue
+        attacks = {}
+        mask = BB_EMPTY
+        for d in directions:
+            mask |= BB_SQUARES[square + d]
+
+        for i in range(16):
+            # 马脚位置
+            subset = BB_EMPTY
+            deltas = []
+            for j in range(4):
+                if i >> j & 1:
+                    # 别马脚
+                    subset |= BB_SQUARES[square + directions[j]]
+                else:
+                    deltas.append(knight_deltas[2 * j])
+                    deltas.append(knight_deltas[2 * j + 1])
+            attacks[subset] = _step_attacks(square, deltas)
+
+        attack_table.append(attacks)
+        mask_table.append(mask)
+    return mask_table, attack_table
+
+
+def _bishop_attacks() -> List[Bitboard]:
+    mask_table = []
+    attack_table = []
+    directions = [15, 17, -15, -17]
+    for square in SQUARES:
+        square_side = BB_RED_SIDE if BB_SQUARES[square] & BB_RED_SIDE else BB_BLACK_SIDE
+        if not (BB_SQUARES[square] & BB_SQUARES_BISHOP):
+            attack_table.append({BB_EMPTY: BB_EMPTY})
+            mask_table.append(BB_EMPTY)
+            continue
+        attacks = {}
+        mask = BB_EMPTY
+        for d in directions:
+            mask |= BB_SQUARES[square + d]
+        for i in range(16):
+            # 象眼位置
+            subset = BB_EMPTY
+            deltas = []
+            for j in range(4):
+                if i >> j & 1:
+                    # 塞象眼
+                    subset |= BB_SQUARES[square + directions[j]]
+                else:
+                    deltas.append(2 * directions[j])
+            attacks[subset] = _step_attacks(square, deltas) & square_side
+        attack_table.append(attacks)
+        mask_table.append(mask)
+    return mask_table, attack_table
+
+
+def _king_attacks() -> List[Bitboard]:
+    attacks = []
+    for square in SQUARES:
+        if not (BB_SQUARES[square] & BB_IN_PALACE):
+            attacks.append(BB_EMPTY)
+            continue
+        attacks.append(_step_attacks(square, [-16, 16, 1, -1]) & BB_IN_PALACE)
+    return attacks
+
+
+def _advisor_attacks() -> List[Bitboard]:
+    attacks = []
+    for square in SQUARES:
+        if not (BB_SQUARES[square] & BB_SQUARES_ADVISOR):
+            attacks.append(BB_EMPTY)
+            continue
+        attacks.append(_step_attacks(square, [15, 17, -15, -17]) & BB_IN_PALACE)
+    return attacks
+
+
+def _between_and_line_tables() -> Tuple[List[List[Bitboard]], List[List[Bitboard]]]:
+    between_table = []
+    line_table = []
+    for a in SQUARES:
+        between_table.append([_between(a, b) for b in SQUARES])
+        line_table.append([_line(a, b) for b in SQUARES])
+    return between_table, line_table
+
+
+# 一行/一列的占位压缩成 9/10 位整数后直接作为下标查表
+_FILE_OCCUPANCY_BITS = sum(1 << (16 * i) for i in range(10))
+_FILE_OCCUPANCY_SHIFT = 135
+# 乘法把间隔 16 位的 10 个占位收拢到连续的 10 位，各项互不重叠，不会产生进位
+_FILE_OCCUPANCY_MAGIC = sum(1 << (_FILE_OCCUPANCY_SHIFT - 15 * i) for i in range(10))
+
+
+def rank_occupancy(square: Square, occupied: Bitboard) -> int:
+    return (occupied >> ((square & 0xF0) + 3)) & 0x1FF
+
+
+def file_occupancy(square: Square, occupied: Bitboard) -> int:
+    return (
+        ((occupied >> ((square & 0xF) + 48)) & _FILE_OCCUPANCY_BITS)
+        * _FILE_OCCUPANCY_MAGIC
+        >> _FILE_OCCUPANCY_SHIFT
+    ) & 0x3FF
+
+
+def knight_leg_index(square: Square, occupied: Bitboard) -> int:
+    # 马腿 +16, +1, -16, -1 依次对应第 0~3 位
+    o = occupied >> (square - 17)
+    return (o >> 33 & 1) | (o >> 17 & 2) | (o << 1 & 4) | (o >> 13 & 8)
+
+
+def diagonal_index(square: Square, occupied: Bitboard) -> int:
+    # 象眼（以及反向马腿）+15, +17, -15, -17 依次对应第 0~3 位
+    o = occupied >> (square - 17)
+    return (o >> 32 & 1) | (o >> 33 & 2) | (o & 4) | (o << 3 & 8)
+
+
+def _line_attacks(index: int, occupancy: int, length: int, jump: bool) -> int:
+    attacks = 0
+    for delta in [-1, 1]:
+        i = index + delta
+        hops = 0
+        while 0 <= i < length:
+            if not jump:
+                attacks |= 1 << i
+                if occupancy >> i & 1:
+                    break
+            elif occupancy >> i & 1:
+                if hops:
+                    attacks |= 1 << i
+                    break
+                hops += 1
+            i += delta
+    return attacks
+
+
+def _flat_line_tables(
+    jump=False,
+) -> Tuple[List[List[Bitboard]], List[List[Bitboard]]]:
+    spread = [
+        sum(1 << (16 * i) for i in range(10) if occupancy >> i & 1)
+        for occupancy in range(1 << 10)
+    ]
+    rank_table = []
+    file_table = []
+    for square in SQUARES:
+        if not square_in_board(square):
+            rank_table.append([])
+            file_table.append([])
+            continue
+        file_index, rank_index = square_file(square) - 3, square_rank(square) - 3
+        rank_shift, file_shift = (square & 0xF0) + 3, (square & 0xF) + 48
+        # 相同的攻击 bitboard 共用一个对象
+        shared: Dict[Bitboard, Bitboard] = {}
+        rank_table.append(
+            [
+                shared.setdefault(bb, bb)
+                for bb in (
+                    _line_attacks(file_index, occupancy, 9, jump) << rank_shift
+                    for occupancy in range(1 << 9)
+                )
+            ]
+        )
+        file_table.append(
+            [
+                shared.setdefault(bb, bb)
+                for bb in (
+                    spread[_line_attacks(rank_index, occupancy, 10, jump)]
+                    << file_shift
+                    for occupancy in range(1 << 10)
+                )
+            ]
+        )
+    return rank_table, file_table
+
+
+def _flat_step_table(
+    attack_table: List[Dict[Bitboard, Bitboard]], directions: List[int]
+) -> List[List[Bitboard]]:
+    flat_table = []
+    for square in SQUARES:
+        if len(attack_table[square]) == 1:
+            flat_table.append([BB_EMPTY] * 16)
+            continue
+        row = []
+        for i in range(16):
+            subset = BB_EMPTY
+            for j, d in enumerate(directions):
+                if i >> j & 1:
+                    subset |= BB_SQUARES[square + d]
+            row.append(attack_table[square][subset])
+        flat_table.append(row)
+    return flat_table
+
+
+def _knight_blocker(king: Square, knight: Square) -> Bitboard:
+    masks = [
+        BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king + 15],
+        BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king + 17],
+        BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king - 15],
+        BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king - 17],
+    ]
+    for mask in masks:
+        if BB_KNIGHT_REVERSED_ATTACKS[king][mask] & BB_SQUARES[knight]:
+            return BB_KNIGHT_REVERSED_MASKS[king] & ~mask
+    return BB_EMPTY
+
+
+MOVES_TABLE_VERSION = 2
+MOVES_TABLE_NAME = "moves_table.bin"
+
+# magic, version, bitboard 个数, 索引个数, crc32
+_MOVES_TABLE_HEADER = struct.Struct("<4sIIII")
+_MOVES_TABLE_MAGIC = b"XQMT"
+_BITBOARD_BYTES = 32
+
+# L: 每个格子一个 bitboard，D: 每个格子一个 {占位: 攻击} 字典，LL: 二维列表
+_MOVES_TABLE_LAYOUT = (
+    ("BB_KNIGHT_MASKS", "L"),
+    ("BB_KNIGHT_ATTACKS", "D"),
+    ("BB_KNIGHT_REVERSED_MASKS", "L"),
+    ("BB_KNIGHT_REVERSED_ATTACKS", "D"),
+    ("BB_BISHOP_MASKS", "L"),
+    ("BB_BISHOP_ATTACKS", "D"),
+    ("BB_CANNON_RANK_MASKS", "L"),
+    ("BB_CANNON_RANK_ATTACKS", "D"),
+    ("BB_CANNON_FILE_MASKS", "L"),
+    ("BB_CANNON_FILE_ATTACKS", "D"),
+    ("BB_RANK_MASKS", "L"),
+    ("BB_RANK_ATTACKS", "D"),
+    ("BB_FILE_MASKS", "L"),
+    ("BB_FILE_ATTACKS", "D"),
+    ("BB_PAWN_ATTACKS", "LL"),
+    ("BB_PAWN_REVERSED_ATTACKS", "LL"),
+    ("BB_KING_ATTACKS", "L"),
+    ("BB_ADVISOR_ATTACKS", "L"),
+    ("BB_BETWEEN", "LL"),
+    ("BB_LINE", "LL"),
+    ("BB_RANK_ATTACKS_FLAT", "LL"),
+    ("BB_FILE_ATTACKS_FLAT", "LL"),
+    ("BB_CANNON_RANK_ATTACKS_FLAT", "LL"),
+    ("BB_CANNON_FILE_ATTACKS_FLAT", "LL"),
+    ("BB_KNIGHT_ATTACKS_FLAT", "LL"),
+    ("BB_KNIGHT_REVERSED_ATTACKS_FLAT", "LL"),
+    ("BB_BISHOP_ATTACKS_FLAT", "LL"),
+)
+
+
+def moves_table_dir() -> pathlib.Path:
+    directory = os.environ.get("CHESS_TABLES_DIR")
+    return pathlib.Path(directory) if directory else pathlib.Path(__file__).parent
+
+
+def _build_moves_table() -> tuple:
+    knight_masks, knight_attacks = _knight_attacks()
+    knight_reversed_masks, knight_reversed_attacks = _knight_attacks(reverse=True)
+    bishop_masks, bishop_attacks = _bishop_attacks()
+    return (
+        knight_masks,
+        knight_attacks,
+        knight_reversed_masks,
+        knight_reversed_attacks,
+        bishop_masks,
+        bishop_attacks,
+        *_attack_table([-1, 1], jump=True),
+        *_attack_table([-16, 16], jump=True),
+        *_attack_table([-1, 1]),
+        *_attack_table([-16, 16]),
+        _pawn_attacks(),
+        _pawn_attacks(reverse=True),
+        _king_attacks(),
+        _advisor_attacks(),
+        *_between_and_line_tables(),
+        *_flat_line_tables(),
+        *_flat_line_tables(jump=True),
+        _flat_step_table(knight_attacks, [16, 1, -16, -1]),
+        _flat_step_table(knight_reversed_attacks, [15, 17, -15, -17]),
+        _flat_step_table(bishop_attacks, [15, 17, -15, -17]),
+    )
+
+
+def _encode_moves_table(table: tuple) -> bytes:
+    # 相同的 bitboard 只存一次，表结构存成 bitboard 的下标
+    pool: Dict[Bitboard, int] = {}
+    index = array("I")
+
+    def ref(bb: Bitboard) -> int:
+        try:
+            return pool[bb]
+        except KeyError:
+            pool[bb] = len(pool)
+            return pool[bb]
+
+    def encode_list(bbs: List[Bitboard]) -> None:
+        index.append(len(bbs))
+        index.extend(ref(bb) for bb in bbs)
+
+    for (_, kind), value in zip(_MOVES_TABLE_LAYOUT, table):
+        if kind == "L":
+            encode_list(value)
+        elif kind == "LL":
+            index.append(len(value))
+            for bbs in value:
+                encode_list(bbs)
+        else:
+            index.append(len(value))
+            for attacks in value:
+                index.append(len(attacks))
+                for subset, bb in attacks.items():
+                    index.append(ref(subset))
+                    index.append(ref(bb))
+
+    if sys.byteorder == "big":
+        index.byteswap()
+    payload = b"".join(bb.to_bytes(_BITBOARD_BYTES, "little") for bb in pool)
+    payload += index.tobytes()
+    header = _MOVES_TABLE_HEADER.pack(
+        _MOVES_TABLE_MAGIC,
+        MOVES_TABLE_VERSION,
+        len(pool),
+        len(index),
+        zlib.crc32(payload),
+    )
+    return header + payload
+
+
+def _decode_moves_table(data: bytes) -> tuple:
+    if len(data) < _MOVES_TABLE_HEADER.size:
+        raise ValueError("moves table is truncated")
+    magic, version, pool_size, index_size, checksum = _MOVES_TABLE_HEADER.unpack_from(
+        data
+    )
+    if magic != _MOVES_TABLE_MAGIC:
+        raise ValueError("not a moves table")
+    if version != MOVES_TABLE_VERSION:
+        raise ValueError(
+            f"moves table version {version} does not match {MOVES_TABLE_VERSION}"
+        )
+    payload = memoryview(data)[_MOVES_TABLE_HEADER.size :]
+    pool_bytes = pool_size * _BITBOARD_BYTES
+    if len(payload) != pool_bytes + 4 * index_size:
+        raise ValueError("moves table is truncated")
+    if zlib.crc32(payload) != checksum:
+        raise ValueError("moves table checksum mismatch")
+
+    pool = [
+        int.from_bytes(payload[i : i + _BITBOARD_BYTES], "little")
+        for i in range(0, pool_bytes, _BITBOARD_BYTES)
+    ]
+    index = array("I")
+    index.frombytes(payload[pool_bytes:])
+    if sys.byteorder == "big":
+        index.byteswap()
+
+    pos = 0
+
+    def decode_list() -> List[Bitboard]:
+        nonlocal pos
+        n = index[pos]
+        bbs = [pool[i] for i in index[pos + 1 : pos + 1 + n]]
+        pos += 1 + n
+        return bbs
+
+    table = []
+    for _, kind in _MOVES_TABLE_LAYOUT:
+        if kind == "L":
+            table.append(decode_list())
+        elif kind == "LL":
+            n = index[pos]
+            pos += 1
+            table.append([decode_list() for _ in range(n)])
+        else:
+            n = index[pos]
+            pos += 1
+            attack_table = []
+            for _ in range(n):
+                size = index[pos]
+                pairs = index[pos + 1 : pos + 1 + 2 * size]
+                subsets = [pool[i] for i in pairs[::2]]
+                attack_table.append(dict(zip(subsets, [pool[i] for i in pairs[1::2]])))
+                pos += 1 + 2 * size
+            table.append(attack_table)
+    return tuple(table)
+
+
+def _load_moves_table(path: pathlib.Path) -> tuple:
+    with open(path, "rb") as f:
+        data = f.read()
+    return _decode_moves_table(data)
+
+
+def _dump_moves_table(table: tuple, path: pathlib.Path) -> None:
+    # 先写临时文件再替换，其他进程不会读到写了一半的表
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(_encode_moves_table(table))
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _init_moves_table() -> tuple:
+    path = moves_table_dir() / MOVES_TABLE_NAME
+    try:
+        return _load_moves_table(path)
+    except FileNotFoundError:
+        pass
+    except ValueError as err:
+        warnings.warn(f"rebuilding {path}: {err}")
+
+    table = _build_moves_table()
+    try:
+        _dump_moves_table(table, path)
+    except OSError:
+        # 只读目录：每次启动都会重新生成，可以事先运行 python -m chess build-tables
+        pass
+    return table
+
+
+(
+    BB_KNIGHT_MASKS,
+    BB_KNIGHT_ATTACKS,
+    BB_KNIGHT_REVERSED_MASKS,
+    BB_KNIGHT_REVERSED_ATTACKS,
+    BB_BISHOP_MASKS,
+    BB_BISHOP_ATTACKS,
+    BB_CANNON_RANK_MASKS,
+    BB_CANNON_RANK_ATTACKS,
+    BB_CANNON_FILE_MASKS,
+    BB_CANNON_FILE_ATTACKS,
+    BB_RANK_MASKS,
+    BB_RANK_ATTACKS,
+    BB_FILE_MASKS,
+    BB_FILE_ATTACKS,
+    BB_PAWN_ATTACKS,
+    BB_PAWN_REVERSED_ATTACKS,
+    BB_KING_ATTACKS,
+    BB_ADVISOR_ATTACKS,
+    BB_BETWEEN,
+    BB_LINE,
+    BB_RANK_ATTACKS_FLAT,
+    BB_FILE_ATTACKS_FLAT,
+    BB_CANNON_RANK_ATTACKS_FLAT,
+    BB_CANNON_FILE_ATTACKS_FLAT,
+    BB_KNIGHT_ATTACKS_FLAT,
+    BB_KNIGHT_REVERSED_ATTACKS_FLAT,
+    BB_BISHOP_ATTACKS_FLAT,
+) = _init_moves_table()
+
+
+def _zobrist_table(seed: int = 0x5A0B_8157) -> Tuple[List[List[List[int]]], int]:
+    # 固定种子，保证不同进程、不同机器得到相同的 key
+    rng = random.Random(seed)
+    pieces = [
+        [[rng.getrandbits(64) for _ in SQUARES] for _ in range(len(PIECE_SYMBOLS))]
+        for _ in COLORS
+    ]
+    return pieces, rng.getrandbits(64)
+
+
+ZOBRIST_PIECES, ZOBRIST_TURN = _zobrist_table()
+
+
+@dataclasses.dataclass
+class Piece:
+    piece_type: PieceType
+
+    color: Color
+
+    def symbol(self) -> str:
+        symbol = piece_symbol(self.piece_type)
+        return symbol.upper() if self.color else symbol
+
+    def chinese(self) -> str:
+        symbol = piece_symbol(self.piece_type)
+        name = PIECES_NAMES[symbol.upper() if self.color else symbol]
+        return name
+
+    def __hash__(self) -> int:
+        return self.piece_type + (-1 if self.color else 6)
+
+    def __repr__(self) -> str:
+        return f"Piece.from_symbol({self.symbol()!r})"
+
+    def __str__(self) -> str:
+        return self.symbol()
+
+    @classmethod
+    def from_symbol(cls, symbol: str) -> Piece:
+        return cls(PIECE_SYMBOLS.index(symbol.lower()), symbol.isupper())
+
+
+@dataclasses.dataclass(unsafe_hash=True)
+class Move:
+    from_square: Square
+
+    to_square: Square
+
+    def iccs(self) -> str:
+        if self:
+            return SQUARE_NAMES[self.from_square] + SQUARE_NAMES[self.to_square]
+        else:
+            return "0000"
+
+    def __bool__(self) -> bool:
+        return bool(self.from_square or self.to_square)
+
+    def __repr__(self) -> str:
+        return f"Move.from_uci({self.iccs()!r})"
+
+    def __str__(self) -> str:
+        return self.iccs()
+
+    def packed(self) -> int:
+        return self.from_square << 8 | self.to_square
+
+    @classmethod
+    def from_packed(cls, packed: int) -> Move:
+        return cls(packed >> 8, packed & 0xFF)
+
+    @classmethod
+    def from_iccs(cls, iccs: str) -> Move:
+        if iccs == "0000":
+            return cls.null()
+        elif len(iccs) == 4:
+            from_square = SQUARE_NAMES.index(iccs[:2])
+            to_square = SQUARE_NAMES.index(iccs[2:])
+            return cls(from_square, to_square)
+        else:
+            raise ValueError(f"expected iccs string to be of length 4: {iccs!r}")
+
+    @classmethod
+    def null(cls) -> Move:
+        return cls(0, 0)
+
+
+class _MoveDelta:
+    # 只记录走动的棋子、被吃的棋子和走子前的半回合计数，撤销时按相同的异或操作还原
+    __slots__ = ("from_square", "to_square", "piece_type", "captured", "halfmove_clock")
+
+    def __init__(
+        self,
+        from_square: Square,
+        to_square: Square,
+        piece_type: Optional[PieceType],
+        captured: Optional[PieceType],
+        halfmove_clock: int,
+    ) -> None:
+        self.from_square = from_square
+        self.to_square = to_square
+        self.piece_type = piece_type
+        self.captured = captured
+        self.halfmove_clock = halfmove_clock
+
+
+class Termination(enum.Enum):
+    CHECKMATE = enum.auto()
+    # 困毙，无子可走的一方判负
+    STALEMATE = enum.auto()
+    # 60 回合（120 个半回合）没有吃子
+    SIXTY_MOVES = enum.auto()
+    THREEFOLD_REPETITION = enum.auto()
+
+
+@dataclasses.dataclass
+class Outcome:
+    termination: Termination
+
+    winner: Optional[Color]
+
+    def result(self) -> str:
+        return "1/2-1/2" if self.winner is None else ("1-0" if self.winner else "0-1")
+
+
+class CheckInfo:
+    # 同一局面下判断合法性所需的将军信息，由 Board.check_info() 按局面缓存
+    __slots__ = ("key", "king", "checkers", "slider_blockers", "knight_blockers")
+
+    def __init__(
+        self,
+        key: int,
+        king: Optional[Square],
+        checkers: Bitboard,
+        slider_blockers: List[Tuple[Bitboard, Bitboard, int]],
+        knight_blockers: List[Tuple[Bitboard, Bitboard]],
+    ) -> None:
+        self.key = key
+        self.king = king
+        self.checkers = checkers
+        self.slider_blockers = slider_blockers
+        self.knight_blockers = knight_blockers
+
+
+class _CachedPosition:
+    # 一个局面的全部合法走法（from << 8 | to）和将军的棋子
+    __slots__ = ("moves", "checkers")
+
+    def __init__(self, moves: array, checkers: Bitboard) -> None:
+        self.moves = moves
+        self.checkers = checkers
+
+
+class PositionCache:
+    # 按 zobrist_hash 缓存局面的合法走法和将军状态，超过 maxsize 时淘汰最久未用的局面，
+    # 可以在多个 Board 之间共用
+    def __init__(self, maxsize: int = 4096) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive: {maxsize!r}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[int, _CachedPosition] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: int) -> Optional[_CachedPosition]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: int, entry: _CachedPosition) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<PositionCache at {id(self):#x} ({len(self)}/{self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})>"
+        )
+
+
+class BaseBoard:
+    def __init__(self, board_fen: Optional[str] = STARTING_BOARD_FEN) -> None:
+        self.occupied_co = [BB_EMPTY, BB_EMPTY]
+        if board_fen is None:
+            self._clear_board()
+        elif board_fen == STARTING_BOARD_FEN:
+            self._reset_board()
+        else:
+            self._set_board_fen(board_fen)
+
+    def _reset_board(self) -> None:
+        self.pawns = BB_RED_PAWNS | BB_BLACK_PAWNS
+        self.knights = BB_B0 | BB_H0 | BB_B9 | BB_H9
+        self.bishops = BB_C0 | BB_G0 | BB_C9 | BB_G9
+        self.rooks = BB_CORNERS
+        self.cannons = BB_B2 | BB_H2 | BB_B7 | BB_H7
+        self.advisors = BB_D0 | BB_F0 | BB_D9 | BB_F9
+        self.kings = BB_E0 | BB_E9
+
+        self.occupied_co[RED] = (
+            (BB_RANK_0 & BB_IN_BOARD) | BB_B2 | BB_H2 | BB_RED_PAWNS
+        )
+        self.occupied_co[BLACK] = (
+            (BB_RANK_9 & BB_IN_BOARD) | BB_B7 | BB_H7 | BB_BLACK_PAWNS
+        )
+        self.occupied = self.occupied_co[RED] | self.occupied_co[BLACK]
+        self._zobrist = self._board_zobrist_hash()
+        self._sync_piece_lists()
+
+    def reset_board(self) -> None:
+        self._reset_board()
+
+    def _clear_board(self) -> None:
+        self.pawns = BB_EMPTY
+        self.knights = BB_EMPTY
+        self.bishops = BB_EMPTY
+        self.rooks = BB_EMPTY
+        self.cannons = BB_EMPTY
+        self.advisors = BB_EMPTY
+        self.kings = BB_EMPTY
+
+        self.occupied_co[RED] = BB_EMPTY
+        self.occupied_co[BLACK] = BB_EMPTY
+        self.occupied = BB_EMPTY
+        self._zobrist = 0
+        # 每个格子上的棋子类型，以及双方棋子所在的格子
+        self._piece_types: List[Optional[PieceType]] = [None] * 256
+        self._piece_squares: List[Set[Square]] = [set(), set()]
+
+    def clear_board(self) -> None:
+        self._clear_board()
+
+    def _set_board_fen(self, fen: str) -> None:
+        fen = fen.strip()
+        if " " in fen:
+            raise ValueError(
+                f"expected position part of fen, got multiple parts: {fen!r}"
+            )
+
+        rows = fen.split("/")
+        if len(rows) != 10:
+            raise ValueError(f"expected 9 rows in position part of fen: {fen!r}")
+
+        for row in rows:
+            field_sum = 0
+            previous_was_digit = False
+
+            for c in row:
+                if c in ["1", "2", "3", "4", "5", "6", "7", "8", "9"]:
+                    if previous_was_digit:
+                        raise ValueError(
+                            f"two subsequent digits in position part of fen: {fen!r}"
+                        )
+                    field_sum += int(c)
+                    previous_was_digit = True
+                elif c.lower() in PIECE_SYMBOLS:
+                    field_sum += 1
+                    previous_was_digit = False
+                else:
+                    raise ValueError(
+                        f"invalid character in position part of fen: {fen!r}"
+                    )
+
+            if field_sum != 9:
+                raise ValueError(
+                    f"expected 9 columns per row in position part of fen: {fen!r}"
+                )
+
+        self._clear_board()
+        square_index = A0
+        for c in fen:
+            if c in ["1", "2", "3", "4", "5", "6", "7", "8", "9"]:
+                square_index += int(c)
+            elif c.lower() in PIECE_SYMBOLS:
+                piece = Piece.from_symbol(c)
+                self._set_piece_at(
+                    SQUARES_180[square_index], piece.piece_type, piece.color
+                )
+                square_index += 1
+            else:
+                square_index += 7
+
+    def set_board_fen(self, fen: str) -> None:
+        self._set_board_fen(fen)
+
+    def board_fen(self) -> str:
+        builder = []
+        empty = 0
+
+        for square in SQUARES_180:
+            if not square_in_board(square):
+                continue
+
+            piece = self.piece_at(square)
+
+            if not piece:
+                empty += 1
+            else:
+                if empty:
+                    builder.append(str(empty))
+                    empty = 0
+                builder.append(piece.symbol())
+
+            if BB_SQUARES[square] & BB_FILE_I:
+                if empty:
+                    builder.append(str(empty))
+                    empty = 0
+
+                if square != I0:
+                    builder.append("/")
+
+        return "".join(builder)
+
+    def _remove_piece_at(self, square: Square) -> Optional[PieceType]:
+        piece_type = self._piece_types[square]
+        mask = BB_SQUARES[square]
+        color = bool(self.occupied_co[RED] & mask)
+
+        if piece_type == PAWN:
+            self.pawns ^= mask
+        elif piece_type == KNIGHT:
+            self.knights ^= mask
+        elif piece_type == BISHOP:
+            self.bishops ^= mask
+        elif piece_type == ROOK:
+            self.rooks ^= mask
+        elif piece_type == CANNON:
+            self.cannons ^= mask
+        elif piece_type == KING:
+            self.kings ^= mask
+        elif piece_type == ADVISOR:
+            self.advisors ^= mask
+        else:
+            return None
+
+        self.occupied ^= mask
+        self.occupied_co[RED] &= ~mask
+        self.occupied_co[BLACK] &= ~mask
+        self._zobrist ^= ZOBRIST_PIECES[color][piece_type][square]
+        self._piece_types[square] = None
+        self._piece_squares[color].discard(square)
+
+        return piece_type
+
+    def remove_piece_at(self, square: Square) -> Optional[Piece]:
+        color = bool(self.occupied_co[RED] & BB_SQUARES[square])
+        piece_type = self._remove_piece_at(square)
+        return Piece(piece_type, color) if piece_type else None
+
+    def _set_piece_at(
+        self, square: Square, piece_type: PieceType, color: Color
+    ) -> None:
+        self._remove_piece_at(square)
+
+        mask = BB_SQUARES[square]
+
+        if piece_type == PAWN:
+            self.pawns |= mask
+        elif piece_type == KNIGHT:
+            self.knights |= mask
+        elif piece_type == BISHOP:
+            self.bishops |= mask
+        elif piece_type == ROOK:
+            self.rooks |= mask
+        elif piece_type == CANNON:
+            self.cannons |= mask
+        elif piece_type == KING:
+            self.kings |= mask
+        elif piece_type == ADVISOR:
+            self.advisors |= mask
+        else:
+            return
+
+        self.occupied ^= mask
+        self.occupied_co[color] ^= mask
+        self._zobrist ^= ZOBRIST_PIECES[color][piece_type][square]
+        self._piece_types[square] = piece_type
+        self._piece_squares[color].add(square)
+
+    def set_piece_at(self, square: Square, piece: Optional[Piece]) -> None:
+        if piece is None:
+            self._remove_piece_at(square)
+        else:
+            self._set_piece_at(square, piece.piece_type, piece.color)
+
+    def pieces_mask(self, piece_type: PieceType, color: Color) -> Bitboard:
+        if piece_type == PAWN:
+            bb = self.pawns
+        elif piece_type == KNIGHT:
+            bb = self.knights
+        elif piece_type == BISHOP:
+            bb = self.bishops
+        elif piece_type == ROOK:
+            bb = self.rooks
+        elif piece_type == CANNON:
+            bb = self.cannons
+        elif piece_type == ADVISOR:
+            bb = self.advisors
+        elif piece_type == KING:
+            bb = self.kings
+        else:
+            assert False, f"expected PieceType, got {piece_type!r}"
+
+        return bb & self.occupied_co[color]
+
+    def piece_at(self, square: Square) -> Optional[Piece]:
+        piece_type = self._piece_types[square]
+        if piece_type:
+            color = bool(self.occupied_co[RED] & BB_SQUARES[square])
+            return Piece(piece_type, color)
+        else:
+            return None
+
+    def piece_type_at(self, square: Square) -> Optional[PieceType]:
+        return self._piece_types[square]
+
+    def piece_squares(self, color: Color) -> AbstractSet[Square]:
+        # 返回内部集合本身，调用方不要修改
+        return self._piece_squares[color]
+
+    def _sync_piece_lists(self) -> None:
+        piece_types: List[Optional[PieceType]] = [None] * 256
+        for piece_type in PIECE_TYPES:
+            for square in scan_reversed(
+                self.pieces_mask(piece_type, RED) | self.pieces_mask(piece_type, BLACK)
+            ):
+                piece_types[square] = piece_type
+        self._piece_types = piece_types
+        self._piece_squares = [
+            set(scan_reversed(self.occupied_co[BLACK])),
+            set(scan_reversed(self.occupied_co[RED])),
+        ]
+
+    def color_at(self, square: Square) -> Optional[Color]:
+        mask = BB_SQUARES[square]
+        if self.occupied_co[RED] & mask:
+            return RED
+        elif self.occupied_co[BLACK] & mask:
+            return BLACK
+        else:
+            return None
+
+    def king(self, color: Color) -> Optional[Square]:
+        king_mask = self.occupied_co[color] & self.kings
+        return msb(king_mask) if king_mask else None
+
+    def attacks_mask(self, square: Square) -> Bitboard:
+        bb_square = BB_SQUARES[square]
+
+        if bb_square & self.pawns:
+            color = bool(bb_square & self.occupied_co[RED])
+            return BB_PAWN_ATTACKS[color][square]
+        # 查表下标的计算见 rank_occupancy/file_occupancy/knight_leg_index/diagonal_index，
+        # 这里内联以省去函数调用
+        occupied = self.occupied
+        if bb_square & self.kings:
+            # 老将对脸杀
+            return BB_KING_ATTACKS[square] | (
+                BB_FILE_ATTACKS_FLAT[square][
+                    (
+                        ((occupied >> ((square & 0xF) + 48)) & _FILE_OCCUPANCY_BITS)
+                        * _FILE_OCCUPANCY_MAGIC
+                        >> _FILE_OCCUPANCY_SHIFT
+                    )
+                    & 0x3FF
+                ]
+                & self.kings
+            )
+        if bb_square & self.advisors:
+            return BB_ADVISOR_ATTACKS[square]
+        elif bb_square & self.knights:
+            o = occupied >> (square - 17)
+            return BB_KNIGHT_ATTACKS_FLAT[square][
+                (o >> 33 & 1) | (o >> 17 & 2) | (o << 1 & 4) | (o >> 13 & 8)
+            ]
+        elif bb_square & self.bishops:
+            o = occupied >> (square - 17)
+            return BB_BISHOP_ATTACKS_FLAT[square][
+                (o >> 32 & 1) | (o >> 33 & 2) | (o & 4) | (o << 3 & 8)
+            ]
+
+        file_index = (
+            ((occupied >> ((square & 0xF) + 48)) & _FILE_OCCUPANCY_BITS)
+            * _FILE_OCCUPANCY_MAGIC
+            >> _FILE_OCCUPANCY_SHIFT
+        ) & 0x3FF
+        rank_index = (occupied >> ((square & 0xF0) + 3)) & 0x1FF
+        if bb_square & self.rooks:
+            return (
+                BB_FILE_ATTACKS_FLAT[square][file_index]
+                | BB_RANK_ATTACKS_FLAT[square][rank_index]
+            )
+        elif bb_square & self.cannons:
+            return (
+                BB_CANNON_FILE_ATTACKS_FLAT[square][file_index]
+                | BB_CANNON_RANK_ATTACKS_FLAT[square][rank_index]
+                | (
+                    (
+                        BB_FILE_ATTACKS_FLAT[square][file_index]
+                        | BB_RANK_ATTACKS_FLAT[square][rank_index]
+                    )
+                    & ~occupied
+                )
+            )
+        else:
+            return BB_EMPTY
+
+    def _attackers_mask(
+        self, color: Color, square: Square, occupied: Bitboard
+    ) -> Bitboard:
+        file_index = (
+            ((occupied >> ((square & 0xF) + 48)) & _FILE_OCCUPANCY_BITS)
+            * _FILE_OCCUPANCY_MAGIC
+            >> _FILE_OCCUPANCY_SHIFT
+        ) & 0x3FF
+        rank_index = (occupied >> ((square & 0xF0) + 3)) & 0x1FF
+        o = occupied >> (square - 17)
+        diagonal_index = (o >> 32 & 1) | (o >> 33 & 2) | (o & 4) | (o << 3 & 8)
+        rook_attacks = (
+            BB_FILE_ATTACKS_FLAT[square][file_index]
+            | BB_RANK_ATTACKS_FLAT[square][rank_index]
+        )
+        attackers = (
+            (
+                (
+                    BB_CANNON_FILE_ATTACKS_FLAT[square][file_index]
+                    | BB_CANNON_RANK_ATTACKS_FLAT[square][rank_index]
+                )
+                & self.cannons
+            )
+            | (rook_attacks & (self.rooks | self.kings))
+            | (BB_KNIGHT_REVERSED_ATTACKS_FLAT[square][diagonal_index] & self.knights)
+            | (BB_BISHOP_ATTACKS_FLAT[square][diagonal_index] & self.bishops)
+            | (BB_PAWN_REVERSED_ATTACKS[color][square] & self.pawns)
+            | (BB_ADVISOR_ATTACKS[square] & self.advisors)
+            | (BB_KING_ATTACKS[square] & self.kings)
+        )
+        return attackers & self.occupied_co[color]
+
+    def attackers_mask(self, color: Color, square: Square) -> Bitboard:
+        return self._attackers_mask(color, square, self.occupied)
+
+    def is_attacked_by(self, color: Color, square: Square) -> bool:
+        return bool(self.attackers_mask(color, square))
+
+    def _board_zobrist_hash(self) -> int:
+        # 从头计算，只在重置棋盘时使用，走子时增量更新
+        zobrist_hash = 0
+        for color in COLORS:
+            for piece_type in PIECE_TYPES:
+                for square in scan_reversed(self.pieces_mask(piece_type, color)):
+                    zobrist_hash ^= ZOBRIST_PIECES[color][piece_type][square]
+        return zobrist_hash
+
+    def piece_map(self, *, mask: Bitboard = BB_IN_BOARD) -> Dict[Square, Piece]:
+        result = {}
+        for square in scan_reversed(self.occupied & mask):
+            result[square] = typing.cast(Piece, self.piece_at(square))
+        return result
+
+    def __str__(self) -> str:
+        builder = []
+
+        for square in SQUARES_180:
+            if not BB_SQUARES[square] & BB_IN_BOARD:
+                continue
+
+            piece = self.piece_at(square)
+
+            if piece:
+                builder.append(piece.symbol())
+            else:
+                builder.append(".")
+
+            if BB_SQUARES[square] & BB_FILE_I:
+                if square != I0:
+                    builder.append("\n")
+            else:
+                builder.append(" ")
+
+        return "".join(builder)
+
+    def copy(self: BaseBoard) -> BaseBoard:
+        board = type(self)(None)
+
+        board.pawns = self.pawns
+        board.knights = self.knights
+        board.bishops = self.bishops
+        board.rooks = self.rooks
+        board.cannons = self.cannons
+        board.advisors = self.advisors
+        board.kings = self.kings
+
+        board.occupied_co[RED] = self.occupied_co[RED]
+        board.occupied_co[BLACK] = self.occupied_co[BLACK]
+        board.occupied = self.occupied
+        board._zobrist = self._zobrist
+        board._piece_types = self._piece_types.copy()
+        board._piece_squares = [
+            self._piece_squares[BLACK].copy(),
+            self._piece_squares[RED].copy(),
+        ]
+
+        return board
+
+    def chinese(self) -> str:
+        builder = []
+
+        for square in SQUARES_180:
+            if not BB_SQUARES[square] & BB_IN_BOARD:
+                continue
+
+            piece = self.piece_at(square)
+
+            if BB_SQUARES[square] & BB_FILE_A:
+                builder.append(RANK_NAMES[square_rank(square)] + " ")
+
+            if piece:
+                builder.append(piece.chinese())
+            else:
+                builder.append("．")
+
+            if BB_SQUARES[square] & BB_FILE_I:
+                builder.append("\n")
+        builder.append("  ａｂｃｄｅｆｇｈｉ")
+
+        return "".join(builder)
+
+
+class Board(BaseBoard):
+    turn: Color
+
+    fullmove_number: int
+
+    halfmove_clock: int
+
+    move_stack: List[Move]
+
+    def __init__(
+        self: Board,
+        fen: Optional[str] = STARTING_FEN,
+        *,
+        position_cache: Optional[PositionCache] = None,
+    ) -> None:
+        BaseBoard.__init__(self, None)
+        # 默认不缓存，传入 PositionCache 后合法走法、将军和终局判断按局面缓存
+        self.position_cache = position_cache
+        self.move_stack = []
+        self._stack: List[_MoveDelta] = []
+        self._check_info: Optional[CheckInfo] = None
+        # 本局出现过的局面（zobrist_hash）及次数，push/pop 时增量维护
+        self._repetitions: Dict[int, int] = {}
+
+        if fen is None:
+            self.clear()
+        elif fen == STARTING_FEN:
+            self.reset()
+        else:
+            self.set_fen(fen)
+
+    @property
+    def legal_moves(self) -> LegalMoveGenerator:
+        return LegalMoveGenerator(self)
+
+    def copy(self: Board) -> Board:
+        board = BaseBoard.copy(self)
+        board.position_cache = self.position_cache
+        board.turn = self.turn
+        board.fullmove_number = self.fullmove_number
+        board.halfmove_clock = self.halfmove_clock
+        board.move_stack = self.move_stack.copy()
+        board._stack = self._stack.copy()
+        board._repetitions = self._repetitions.copy()
+        return board
+
+    @property
+    def pseudo_legal_moves(self) -> PseudoLegalMoveGenerator:
+        return PseudoLegalMoveGenerator(self)
+
+    # 直接改棋盘后 move_stack 里的增量记录对不上新的局面，和 reset/set_fen 一样清空
+    def reset_board(self) -> None:
+        super().reset_board()
+        self.clear_stack()
+
+    def clear_board(self) -> None:
+        super().clear_board()
+        self.clear_stack()
+
+    def set_board_fen(self, fen: str) -> None:
+        super().set_board_fen(fen)
+        self.clear_stack()
+
+    def set_piece_at(self, square: Square, piece: Optional[Piece]) -> None:
+        super().set_piece_at(square, piece)
+        self.clear_stack()
+
+    def remove_piece_at(self, square: Square) -> Optional[Piece]:
+        piece = super().remove_piece_at(square)
+        self.clear_stack()
+        return piece
+
+    def clear(self) -> None:
+        self.turn = RED
+        self.fullmove_number = 1
+        self.halfmove_clock = 0
+        self.clear_board()
+        self.clear_stack()
+
+    def reset(self) -> None:
+        self.turn = RED
+        self.fullmove_number = 1
+        self.halfmove_clock = 0
+        self.reset_board()
+        self.clear_stack()
+
+    def set_fen(self, fen: str) -> None:
+        parts = fen.split()
+
+        try:
+            board_part = parts.pop(0)
+        except IndexError:
+            raise ValueError("empty fen")
+
+        try:
+            turn_part = parts.pop(0)
+        except IndexError:
+            turn = RED
+        else:
+            if turn_part == "w":
+                turn = RED
+            elif turn_part == "b":
+                turn = BLACK
+            else:
+                raise ValueError(f"expected 'w' or 'b' for turn part of fen: {fen!r}")
+
+        # 象棋没有易位和吃过路兵，这两段只占位
+        parts = parts[2:]
+
+        try:
+            halfmove_part = parts.pop(0)
+        except IndexError:
+            halfmove_clock = 0
+        else:
+            try:
+                halfmove_clock = int(halfmove_part)
+            except ValueError:
+                raise ValueError(f"invalid halfmove clock in fen: {fen!r}")
+
+            if halfmove_clock < 0:
+                raise ValueError(f"halfmove clock cannot be negative: {fen!r}")
+
+        try:
+            fullmove_part = parts.pop(0)
+        except IndexError:
+            fullmove_number = 1
+        else:
+            try:
+                fullmove_number = int(fullmove_part)
+            except ValueError:
+                raise ValueError(f"invalid fullmove number in fen: {fen!r}")
+
+            if fullmove_number < 0:
+                raise ValueError(f"fullmove number cannot be negative: {fen!r}")
+
+            fullmove_number = max(fullmove_number, 1)
+
+        if parts:
+            raise ValueError(f"fen string has more parts than expected: {fen!r}")
+
+        self._set_board_fen(board_part)
+        self.turn = turn
+        self.fullmove_number = fullmove_number
+        self.halfmove_clock = halfmove_clock
+        self.clear_stack()
+
+    def check_info(self) -> CheckInfo:
+        # 以 zobrist key 判断缓存是否属于当前局面，push/pop 时清空
+        key = self.zobrist_hash()
+        info = self._check_info
+        if info is None or info.key != key:
+            king = self.king(self.turn)
+            if king is None:
+                info = CheckInfo(key, None, BB_EMPTY, [], [])
+            else:
+                info = CheckInfo(
+                    key,
+                    king,
+                    self.attackers_mask(not self.turn, king),
+                    self._slider_blockers(king),
+                    self._knight_blockers(king),
+                )
+            self._check_info = info
+        return info
+
+    def checkers_mask(self) -> Bitboard:
+        return self.check_info().checkers
+
+    def is_check(self) -> bool:
+        if self.position_cache is not None:
+            return bool(self._cached_position().checkers)
+        return bool(self.check_info().checkers)
+
+    def _cached_position(self) -> _CachedPosition:
+        key = self.zobrist_hash()
+        entry = self.position_cache.get(key)
+        if entry is None:
+            entry = _CachedPosition(
+                array("H", self._generate_legal_packed()), self.check_info().checkers
+            )
+            self.position_cache.put(key, entry)
+        return entry
+
+    def zobrist_hash(self) -> int:
+        # 棋子部分由 _set_piece_at/_remove_piece_at 增量维护
+        return self._zobrist ^ ZOBRIST_TURN if self.turn == BLACK else self._zobrist
+
+    def is_checkmate(self) -> bool:
+        if self.position_cache is not None:
+            return not self._cached_position().moves
+        return not any(self.generate_legal_moves())
+
+    def is_repetition(self, count: int = 3) -> bool:
+        # 当前局面（含行棋方）在本局中至少出现了 count 次
+        return self._repetitions.get(self.zobrist_hash(), 0) >= count
+
+    def is_sixty_moves(self) -> bool:
+        return self.halfmove_clock >= 120
+
+    def can_claim_draw(self) -> bool:
+        return self.is_sixty_moves() or self.is_repetition(3)
+
+    def outcome(self, *, claim_draw: bool = False) -> Optional[Outcome]:
+        if self.is_checkmate():
+            termination = Termination.CHECKMATE if self.is_check() else Termination.STALEMATE
+            return Outcome(termination, not self.turn)
+
+        if claim_draw:
+            if self.is_sixty_moves():
+                return Outcome(Termination.SIXTY_MOVES, None)
+            if self.is_repetition(3):
+                return Outcome(Termination.THREEFOLD_REPETITION, None)
+
+        return None
+
+    def is_game_over(self, *, claim_draw: bool = False) -> bool:
+        return self.outcome(claim_draw=claim_draw) is not None
+
+    def _is_safe(
+        self,
+        king: Square,
+        slider_blockers: List[Tuple[Bitboard, Bitboard]],
+        knight_blockers: List[Tuple(Bitboard, Bitboard)],
+        from_square: Square,
+        to_square: Square,
+    ) -> bool:
+        if from_square == king:
+            # 把将去掉
+            return not bool(
+                self._attackers_mask(
+                    not self.turn, to_square, self.occupied & ~BB_SQUARES[king]
+                )
+            )
+
+        bb_from = BB_SQUARES[from_square]
+        bb_to = BB_SQUARES[to_square]
+
+        for blocker, to in knight_blockers:
+            # 如果正在移动马腿棋子
+            if blocker & bb_from and (not bb_to & to):
+                return False
+
+        for mask, sniper, limit in slider_blockers:
+            # 如果正在移动阻挡棋子
+            if mask & bb_from or mask & bb_to:
+                if (
+                    not (sniper & bb_to)
+                    and popcount(self.occupied & mask & ~bb_from | bb_to & mask)
+                    == limit
+                ):
+                    return False
+
+        return True
+
+    def is_pseudo_legal(self, move: Move) -> bool:
+        if not move:
+            return False
+        # 必须有棋子
+        piece = self.piece_type_at(move.from_square)
+        if not piece:
+            return False
+
+        from_mask = BB_SQUARES[move.from_square]
+        to_mask = BB_SQUARES[move.to_square]
+
+        # 是否是自己的棋子
+        if not self.occupied_co[self.turn] & from_mask:
+            return False
+
+        # 目标格子不能有自己的棋子，也不能在棋盘外
+        if self.occupied_co[self.turn] & to_mask or not to_mask & BB_IN_BOARD:
+            return False
+
+        return bool(self.attacks_mask(move.from_square) & to_mask)
+
+    def is_legal(self, move: Move) -> bool:
+        if self.position_cache is not None:
+            return bool(move) and move.packed() in self._cached_position().moves
+        return self.is_pseudo_legal(move) and not self.is_into_check(move)
+
+    def is_into_check(self, move: Move) -> bool:
+        info = self.check_info()
+        king = info.king
+        if king is None:
+            return False
+
+        if info.checkers and move.packed() not in self._generate_evasions(
+            king,
+            info.checkers,
+            BB_SQUARES[move.from_square],
+            BB_SQUARES[move.to_square],
+        ):
+            return True
+
+        return not self._is_safe(
+            king,
+            info.slider_blockers,
+            info.knight_blockers,
+            move.from_square,
+            move.to_square,
+        )
+
+    def gives_check(self, move: Move) -> bool:
+        king = self.king(not self.turn)
+        if king is None:
+            return False
+        return self._gives_check(king, move.from_square, move.to_square)
+
+    def _gives_check(self, king: Square, from_square: Square, to_square: Square) -> bool:
+        # king 为对方的将，按走子后的占位重新计算
+        bb_from = BB_SQUARES[from_square]
+        bb_to = BB_SQUARES[to_square]
+        occupied = self.occupied & ~bb_from | bb_to
+
+        # 没有动的棋子：闪将、架炮、拆车前的阻挡
+        if self._attackers_mask(self.turn, king, occupied) & ~bb_from:
+            return True
+
+        # 动的棋子
+        piece_type = self._piece_types[from_square]
+        if piece_type == PAWN:
+            return bool(BB_PAWN_REVERSED_ATTACKS[self.turn][king] & bb_to)
+        elif piece_type == KNIGHT:
+            return bool(
+                BB_KNIGHT_REVERSED_ATTACKS_FLAT[king][diagonal_index(king, occupied)]
+                & bb_to
+            )
+        elif piece_type == ROOK or piece_type == KING:
+            return bool(
+                (
+                    BB_FILE_ATTACKS_FLAT[king][file_occupancy(king, occupied)]
+                    | BB_RANK_ATTACKS_FLAT[king][rank_occupancy(king, occupied)]
+                )
+                & bb_to
+            )
+        elif piece_type == CANNON:
+            return bool(
+                (
+                    BB_CANNON_FILE_ATTACKS_FLAT[king][file_occupancy(king, occupied)]
+                    | BB_CANNON_RANK_ATTACKS_FLAT[king][rank_occupancy(king, occupied)]
+                )
+                & bb_to
+            )
+        return False
+
+    def _see_attackers(self, color: Color, square: Square, occupied: Bitboard) -> Bitboard:
+        # occupied 中已经拿掉参与交换的棋子，车和炮背后的棋子、新出现或消失的炮架都会按新占位计算；
+        # 将只能吃相邻的棋子
+        attackers = self._attackers_mask(color, square, occupied) & occupied
+        return attackers & (~self.kings | BB_KING_ATTACKS[square])
+
+    def _see_least_valuable(self, attackers: Bitboard) -> Tuple[Square, PieceType]:
+        for piece_type in _SEE_ORDER:
+            bb = attackers & self.pieces_mask(piece_type, RED) | attackers & self.pieces_mask(
+                piece_type, BLACK
+            )
+            if bb:
+                return msb(bb), piece_type
+        assert False, f"expected attackers, got {attackers!r}"
+
+    def see(self, move: Move) -> int:
+        # 只在 move.to_square 上轮流用价值最低的棋子吃子，双方都可以随时停止
+        from_square = move.from_square
+        to_square = move.to_square
+        captured = self._piece_types[to_square]
+        color = bool(self.occupied_co[RED] & BB_SQUARES[from_square])
+
+        gain = [PIECE_VALUES[captured] if captured else 0]
+        value = PIECE_VALUES[self._piece_types[from_square]]
+        occupied = self.occupied & ~BB_SQUARES[from_square]
+        while True:
+            color = not color
+            attackers = self._see_attackers(color, to_square, occupied)
+            if not attackers:
+                break
+            square, piece_type = self._see_least_valuable(attackers)
+            occupied &= ~BB_SQUARES[square]
+            # 将不能吃进对方还能吃到的格子
+            if piece_type == KING and self._see_attackers(not color, to_square, occupied):
+                break
+            gain.append(value - gain[-1])
+            value = PIECE_VALUES[piece_type]
+
+        for i in range(len(gain) - 1, 0, -1):
+            gain[i - 1] = -max(-gain[i - 1], gain[i])
+        return gain[0]
+
+    def see_ge(self, move: Move, threshold: int = 0) -> bool:
+        # 与 see(move) >= threshold 相同，结果确定后提前返回
+        from_square = move.from_square
+        to_square = move.to_square
+        captured = self._piece_types[to_square]
+
+        swap = (PIECE_VALUES[captured] if captured else 0) - threshold
+        if swap < 0:
+            return False
+        swap = PIECE_VALUES[self._piece_types[from_square]] - swap
+        if swap <= 0:
+            return True
+
+        color = bool(self.occupied_co[RED] & BB_SQUARES[from_square])
+        occupied = self.occupied & ~BB_SQUARES[from_square]
+        result = True
+        while True:
+            color = not color
+            attackers = self._see_attackers(color, to_square, occupied)
+            if not attackers:
+                break
+            square, piece_type = self._see_least_valuable(attackers)
+            occupied &= ~BB_SQUARES[square]
+            if piece_type == KING:
+                # 对方还能吃回来时将不能吃
+                if self._see_attackers(not color, to_square, occupied):
+                    break
+                return not result
+            result = not result
+            swap = PIECE_VALUES[piece_type] - swap
+            if swap < result:
+                break
+        return result
+
+    def _slider_blockers(self, king: Square) -> List[Tuple[Bitboard, Bitboard, int]]:
+        rays = BB_FILE_ATTACKS[king][BB_EMPTY] | BB_RANK_ATTACKS[king][BB_EMPTY]
+        cannons = rays & self.cannons & self.occupied_co[not self.turn]
+        rooks_and_kings = (
+            rays & (self.kings | self.rooks) & self.occupied_co[not self.turn]
+        )
+
+        blockers = []
+
+        for sniper in scan_reversed(cannons):
+            mask = BB_BETWEEN[king][sniper]
+            b = mask & self.occupied
+            # 如果路线上只有两个棋子
+            if popcount(b) == 2:
+                blockers.append((mask, BB_SQUARES[sniper], 1))
+            # 空头炮
+            elif popcount(b) == 0:
+                blockers.append((mask, BB_SQUARES[sniper], 1))
+
+        for sniper in scan_reversed(rooks_and_kings):
+            mask = BB_BETWEEN[king][sniper]
+            b = mask & self.occupied
+            # 如果路线上只有一个棋子则是一个 blocker
+            if b and popcount(b) == 1:
+                blockers.append((mask, BB_SQUARES[sniper], 0))
+
+        return blockers
+
+    def _knight_blockers(self, king: Square) -> List[Tuple(Bitboard, Bitboard)]:
+        # 生成正在别马脚的棋子
+        knights = self.knights & self.occupied_co[not self.turn]
+        blockers = BB_EMPTY
+        blockers_detail = []
+        occupied = BB_KNIGHT_REVERSED_MASKS[king] & self.occupied_co[self.turn]
+        masks = [
+            BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king + 15],
+            BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king + 17],
+            BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king - 15],
+            BB_KNIGHT_REVERSED_MASKS[king] & ~BB_SQUARES[king - 17],
+        ]
+        for mask in masks:
+            attack_knights = BB_KNIGHT_REVERSED_ATTACKS[king][mask] & knights
+            if attack_knights and (occupied & ~mask):
+                blockers |= occupied & ~mask
+                if popcount(attack_knights) == 1:
+                    blockers_detail.append((occupied & ~mask, attack_knights))
+                else:
+                    blockers_detail.append((occupied & ~mask, BB_EMPTY))
+
+        return blockers_detail
+
+    def _generate_evasions(
+        self,
+        king: Square,
+        checkers: Bitboard,
+        from_mask: Bitboard = BB_IN_BOARD,
+        to_mask: Bitboard = BB_IN_BOARD,
+    ) -> Iterator[int]:
+        # 走法用 from << 8 | to 表示
+        attacked = BB_EMPTY
+        for checker in scan_reversed(checkers & self.rooks):
+            attacked |= BB_LINE[king][checker] & ~BB_SQUARES[checker]
+
+        for checker in scan_reversed(checkers & self.cannons):
+            # 吃掉炮架后不再被这个炮将军
+            middle = BB_BETWEEN[king][checker] & self.occupied
+            attacked |= BB_LINE[king][checker] & ~middle & ~BB_SQUARES[checker]
+
+        if BB_SQUARES[king] & from_mask:
+            for to_square in scan_reversed(
+                BB_KING_ATTACKS[king]
+                & ~self.occupied_co[self.turn]
+                & ~attacked
+                & to_mask
+            ):
+                yield king << 8 | to_square
+
+        if popcount(checkers) == 1:
+            # 只有一个子将
+            checker = msb(checkers)
+            if checkers & (self.rooks | self.kings | self.pawns):
+                target = BB_BETWEEN[king][checker] | checkers
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask, target & to_mask
+                )
+            elif checkers & self.cannons:
+                target = BB_BETWEEN[king][checker] | checkers
+                # 吃掉炮
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask, checkers & to_mask
+                )
+                # 垫子但不能吃子
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask & ~target, target & to_mask & ~self.occupied
+                )
+                # 拆炮架
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask & target, ~target & to_mask
+                )
+            elif checkers & self.knights:
+                target = _knight_blocker(king, checker) | checkers
+                # 别马腿
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask, target & to_mask
+                )
+
+        elif popcount(checkers) == 2:
+            # 车炮双将
+            cannon_checker = msb(checkers & self.cannons)
+            rook_checker = msb(checkers & self.rooks)
+            if BB_LINE[cannon_checker][rook_checker] & BB_SQUARES[king] and not (
+                BB_BETWEEN[cannon_checker][rook_checker] & BB_SQUARES[king]
+            ):
+                yield from self._generate_pseudo_legal_packed(
+                    ~self.kings & from_mask, BB_BETWEEN[king][rook_checker] & to_mask
+                )
+
+    def generate_pseudo_legal_moves(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[Move]:
+        our_pieces = self.occupied_co[self.turn]
+
+        from_squares = our_pieces & from_mask
+        for from_square in scan_reversed(from_squares):
+            moves = self.attacks_mask(from_square) & ~our_pieces & to_mask
+            for to_square in scan_reversed(moves):
+                yield Move(from_square, to_square)
+
+    def _generate_pseudo_legal_packed(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[int]:
+        our_pieces = self.occupied_co[self.turn]
+
+        from_squares = our_pieces & from_mask
+        for from_square in scan_reversed(from_squares):
+            moves = self.attacks_mask(from_square) & ~our_pieces & to_mask
+            packed_from = from_square << 8
+            for to_square in scan_reversed(moves):
+                yield packed_from | to_square
+
+    def _generate_legal_packed(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[int]:
+        info = self.check_info()
+        king = info.king
+        if king is not None:
+            slider_blockers = info.slider_blockers
+            knight_blockers = info.knight_blockers
+            checkers = info.checkers
+            if checkers:
+                moves = self._generate_evasions(king, checkers, from_mask, to_mask)
+            else:
+                moves = self._generate_pseudo_legal_packed(from_mask, to_mask)
+            for move in moves:
+                if self._is_safe(
+                    king, slider_blockers, knight_blockers, move >> 8, move & 0xFF
+                ):
+                    yield move
+        else:
+            yield from self._generate_pseudo_legal_packed(from_mask, to_mask)
+
+    def _generate_legal_packed_cached(
+        self, from_mask: Bitboard, to_mask: Bitboard
+    ) -> Iterator[int]:
+        moves = self._cached_position().moves
+        if from_mask == BB_IN_BOARD and to_mask == BB_IN_BOARD:
+            return iter(moves)
+        return (
+            move
+            for move in moves
+            if BB_SQUARES[move >> 8] & from_mask and BB_SQUARES[move & 0xFF] & to_mask
+        )
+
+    def generate_legal_moves(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[Move]:
+        if self.position_cache is not None:
+            moves = self._generate_legal_packed_cached(from_mask, to_mask)
+        else:
+            moves = self._generate_legal_packed(from_mask, to_mask)
+        for move in moves:
+            yield Move(move >> 8, move & 0xFF)
+
+    def generate_legal_moves_packed(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> array:
+        if self.position_cache is not None:
+            return array("H", self._generate_legal_packed_cached(from_mask, to_mask))
+        return array("H", self._generate_legal_packed(from_mask, to_mask))
+
+    def generate_legal_captures(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[Move]:
+        for move in self._generate_legal_packed(
+            from_mask, to_mask & self.occupied_co[not self.turn]
+        ):
+            yield Move(move >> 8, move & 0xFF)
+
+    def generate_legal_quiets(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[Move]:
+        for move in self._generate_legal_packed(from_mask, to_mask & ~self.occupied):
+            yield Move(move >> 8, move & 0xFF)
+
+    def _generate_legal_checks_packed(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[int]:
+        king = self.king(not self.turn)
+        if king is None:
+            return
+
+        our_pieces = self.occupied_co[self.turn] & from_mask
+        if self.attackers_mask(self.turn, king):
+            # 对方已经被将军的局面，逐个判断
+            for move in self._generate_legal_packed(our_pieces, to_mask):
+                if self._gives_check(king, move >> 8, move & 0xFF):
+                    yield move
+            return
+
+        # 将所在的直线和马腿：从这里走开或走到直线上可能改变车炮马的攻击，需要按走子后的占位判断；
+        # 兵只能在将的前后左右将军，都在直线上，所以其余走法只剩马能直接将军
+        rays = BB_FILE_ATTACKS[king][BB_EMPTY] | BB_RANK_ATTACKS[king][BB_EMPTY]
+        legs = BB_KNIGHT_REVERSED_MASKS[king]
+        for move in self._generate_legal_packed(our_pieces & (rays | legs), to_mask):
+            if self._gives_check(king, move >> 8, move & 0xFF):
+                yield move
+
+        others = our_pieces & ~(rays | legs)
+        for move in self._generate_legal_packed(others, to_mask & rays):
+            if self._gives_check(king, move >> 8, move & 0xFF):
+                yield move
+
+        knight_checks = BB_KNIGHT_REVERSED_ATTACKS_FLAT[king][
+            diagonal_index(king, self.occupied)
+        ]
+        yield from self._generate_legal_packed(
+            others & self.knights, to_mask & knight_checks & ~rays
+        )
+
+    def generate_legal_checks(
+        self, from_mask: Bitboard = BB_IN_BOARD, to_mask: Bitboard = BB_IN_BOARD
+    ) -> Iterator[Move]:
+        for move in self._generate_legal_checks_packed(from_mask, to_mask):
+            yield Move(move >> 8, move & 0xFF)
+
+    def push(self, move: Move) -> None:
+        self.move_stack.append(move)
+        if move:
+            self._push(move.from_square, move.to_square)
+        else:
+            self._push_null()
+
+    def push_packed(self, move: int) -> None:
+        # 走法为 from << 8 | to，由 pop() 撤销
+        self.move_stack.append(Move(move >> 8, move & 0xFF))
+        self._push(move >> 8, move & 0xFF)
+
+    def _push_null(self) -> None:
+        self._check_info = None
+        self._stack.append(_MoveDelta(0, 0, None, None, self.halfmove_clock))
+        self.halfmove_clock += 1
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+        key = self.zobrist_hash()
+        self._repetitions[key] = self._repetitions.get(key, 0) + 1
+
+    def _push(self, from_square: Square, to_square: Square) -> None:
+        piece_types = self._piece_types
+        piece_type = piece_types[from_square]
+        assert (
+            piece_type is not None
+        ), f"push() expects move to be pseudo-legal, but got {Move(from_square, to_square)} in {self.board_fen()}"
+        captured = piece_types[to_square]
+
+        self._check_info = None
+        self._stack.append(
+            _MoveDelta(from_square, to_square, piece_type, captured, self.halfmove_clock)
+        )
+        self._xor_move(from_square, to_square, piece_type, captured, self.turn)
+        piece_types[from_square] = None
+        piece_types[to_square] = piece_type
+        squares = self._piece_squares[self.turn]
+        squares.remove(from_square)
+        squares.add(to_square)
+        if captured:
+            self._piece_squares[not self.turn].remove(to_square)
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+        key = self.zobrist_hash()
+        self._repetitions[key] = self._repetitions.get(key, 0) + 1
+
+    def _xor_piece_bb(self, piece_type: PieceType, mask: Bitboard) -> None:
+        if piece_type == PAWN:
+            self.pawns ^= mask
+        elif piece_type == KNIGHT:
+            self.knights ^= mask
+        elif piece_type == BISHOP:
+            self.bishops ^= mask
+        elif piece_type == ROOK:
+            self.rooks ^= mask
+        elif piece_type == CANNON:
+            self.cannons ^= mask
+        elif piece_type == KING:
+            self.kings ^= mask
+        elif piece_type == ADVISOR:
+            self.advisors ^= mask
+
+    def _xor_move(
+        self,
+        from_square: Square,
+        to_square: Square,
+        piece_type: PieceType,
+        captured: Optional[PieceType],
+        color: Color,
+    ) -> None:
+        # 全部是异或操作，走子和撤销是同一个操作
+        bb_from = BB_SQUARES[from_square]
+        bb_to = BB_SQUARES[to_square]
+        bb_move = bb_from | bb_to
+        self._xor_piece_bb(piece_type, bb_move)
+        self.occupied_co[color] ^= bb_move
+        zobrist = ZOBRIST_PIECES[color][piece_type]
+        self._zobrist ^= zobrist[from_square] ^ zobrist[to_square]
+
+        if captured:
+            self._xor_piece_bb(captured, bb_to)
+            self.occupied_co[not color] ^= bb_to
+            self.occupied ^= bb_from
+            self._zobrist ^= ZOBRIST_PIECES[not color][captured][to_square]
+        else:
+            self.occupied ^= bb_move
+
+    def fen(self) -> str:
+        return " ".join(
+            [
+                self.board_fen(),
+                "w" if self.turn == RED else "b",
+                "-",
+                "-",
+                str(self.halfmove_clock),
+                str(self.fullmove_number),
+            ]
+        )
+
+    def pop(self) -> Move:
+        if not len(self.move_stack):
+            return None
+        move = self.move_stack.pop()
+        delta = self._stack.pop()
+        self._check_info = None
+        key = self.zobrist_hash()
+        count = self._repetitions[key] - 1
+        if count:
+            self._repetitions[key] = count
+        else:
+            del self._repetitions[key]
+        self.halfmove_clock = delta.halfmove_clock
+        self.turn = not self.turn
+        if self.turn == BLACK:
+            self.fullmove_number -= 1
+        if delta.piece_type is not None:
+            from_square, to_square = delta.from_square, delta.to_square
+            self._xor_move(
+                from_square, to_square, delta.piece_type, delta.captured, self.turn
+            )
+            self._piece_types[from_square] = delta.piece_type
+            self._piece_types[to_square] = delta.captured
+            squares = self._piece_squares[self.turn]
+            squares.remove(to_square)
+            squares.add(from_square)
+            if delta.captured:
+                self._piece_squares[not self.turn].add(to_square)
+        return move
+
+    def clear_stack(self) -> None:
+        self.move_stack.clear()
+        self._stack.clear()
+        self._check_info = None
+        self._repetitions = {self.zobrist_hash(): 1}
+
+    def peek(self) -> Move:
+        if len(self.move_stack):
+            return self.move_stack[-1]
+        else:
+            return None
+
+    def push_iccs(self, iccs: str):
+        # TODO:检查合法
+        move = Move.from_iccs(iccs)
+        if move in self.generate_legal_moves():
+            self.push(move)
+
+    def chinese_move(self, move: Move, full_width=False) -> str:
+        return self._chinese_from_wxf(self.wxf(move), full_width)
+
+    def chinese_many(self, moves: Iterable[Move], full_width=False) -> List[str]:
+        # 当前局面下多步走法的中文记法，同类棋子的前后位置只算一次
+        return [self._chinese_from_wxf(wxf_move, full_width) for wxf_move in self.wxf_many(moves)]
+
+    def to_chinese(self, move_stack: Optional[Iterable[Move]] = None, full_width=False) -> List[str]:
+        # 从当前局面依次走 move_stack，返回每一步的中文记法；不传时返回本局从开局起 move_stack 里的每一步
+        board = self.copy()
+        if move_stack is None:
+            move_stack = self.move_stack.copy()
+            while board.move_stack:
+                board.pop()
+        result = []
+        for move in move_stack:
+            prefixes = board._wxf_prefixes()
+            result.append(board._chinese_from_wxf(
+                prefixes[move.from_square] + board._wxf_action(move), full_width
+            ))
+            board.push(move)
+        return result
+
+    def _chinese_from_wxf(self, wxf_move: str, full_width=False) -> str:
+        build = []
+        piece_type = wxf_move[0]
+        if self.turn == RED:
+            piece_type = piece_type.upper()
+        build.append(PIECES_NAMES[piece_type])
+
+        if wxf_move[1] in "+-.abced":
+            pos = POSITION_NAMES[wxf_move[1]]
+            build.insert(0, pos)
+        else:
+            if self.turn == RED:
+                build.append(CHINESE_NUMBERS[int(wxf_move[1])])
+            else:
+                build.append(wxf_move[1])
+
+        build.append(ACTION_NAMES[wxf_move[2]])
+
+        if self.turn == RED:
+            build.append(CHINESE_NUMBERS[int(wxf_move[3])])
+        else:
+            build.append(wxf_move[3])
+
+        if full_width:
+            chars = "１２３４５６７８９"
+            for i, c in enumerate(build):
+                if c in "123456789":
+                    build[i] = chars[int(c) - 1]
+
+        return "".join(build)
+
+    def wxf(self, move: Move) -> str:
+        from_square = move.from_square
+        from_square_file = square_file(from_square)
+        from_file_wxf = square_file_wxf(from_square, self.turn)
+        piece = self.piece_type_at(from_square)
+        result = ""
+        plus_symbol = "+" if self.turn == RED else "-"
+        minus_symbol = "-" if self.turn == RED else "+"
+        chars = ["a", "b", "c", "d", "e"]
+
+        # 相象仕士
+        if piece == ADVISOR or piece == BISHOP:
+            result += PIECE_SYMBOLS[piece] + str(from_file_wxf)
+
+        # 兵卒
+        elif piece == PAWN:
+            other = (
+                self.pieces_mask(piece, self.turn)
+                & BB_FILES[from_square_file]
+                & ~BB_SQUARES[from_square]
+            )
+            if not other:
+                result += PIECE_SYMBOLS[piece] + str(from_file_wxf)
+            else:
+                pawns = []
+                for bb_file in BB_FILES[::-1]:
+                    file_pawns = []
+                    for p in scan_reversed(
+                        bb_file & self.pawns & self.occupied_co[self.turn]
+                    ):
+                        file_pawns.append(p)
+                    if len(file_pawns) > 1:
+                        pawns += file_pawns
+                if len(pawns) == 2:
+                    result = (
+                        PIECE_SYMBOLS[piece]
+                        + [plus_symbol, minus_symbol][pawns.index(from_square)]
+                    )
+                elif len(pawns) == 3:
+                    result = (
+                        PIECE_SYMBOLS[piece]
+                        + [plus_symbol, ".", minus_symbol][pawns.index(from_square)]
+                    )
+                else:
+                    if self.turn == RED:
+                        result = PIECE_SYMBOLS[piece] + chars[pawns.index(from_square)]
+                    else:
+                        result = (
+                            PIECE_SYMBOLS[piece] + chars[pawns[::-1].index(from_square)]
+                        )
+
+        # 车马帅将炮
+        else:
+            other = (
+                self.pieces_mask(piece, self.turn)
+                & BB_FILES[from_square_file]
+                & ~BB_SQUARES[from_square]
+            )
+            if other:
+                result += PIECE_SYMBOLS[piece] + (
+                    plus_symbol if msb(other) < from_square else minus_symbol
+                )
+            else:
+                result += PIECE_SYMBOLS[piece] + str(from_file_wxf)
+
+        return result + self._wxf_action(move)
+
+    def wxf_many(self, moves: Iterable[Move]) -> List[str]:
+        # 当前局面下多步走法的 wxf 记法：每个棋子的前两个字符整盘只算一次，之后每步只算动作和数字
+        prefixes = self._wxf_prefixes()
+        return [prefixes[move.from_square] + self._wxf_action(move) for move in moves]
+
+    def _wxf_prefixes(self) -> Dict[Square, str]:
+        # 走子方每个棋子在 wxf 记法里的前两个字符：棋子和所在的路，同一路有同类棋子时是前后位置
+        turn = self.turn
+        plus_symbol = "+" if turn == RED else "-"
+        minus_symbol = "-" if turn == RED else "+"
+        prefixes = {}
+
+        # 相象仕士总是用所在的路；车马帅将炮同一路最多两个，分前后
+        for piece in (ROOK, KNIGHT, BISHOP, ADVISOR, KING, CANNON):
+            symbol = PIECE_SYMBOLS[piece]
+            mask = self.pieces_mask(piece, turn)
+            for square in scan_reversed(mask):
+                other = mask & BB_FILES[square_file(square)] & ~BB_SQUARES[square]
+                if other and piece != BISHOP and piece != ADVISOR:
+                    prefixes[square] = symbol + (plus_symbol if msb(other) < square else minus_symbol)
+                else:
+                    prefixes[square] = symbol + str(square_file_wxf(square, turn))
+
+        # 兵卒：所有多兵的路合在一起排序，两个分前后，三个分前中后，更多时用 a-e
+        symbol = PIECE_SYMBOLS[PAWN]
+        mask = self.pieces_mask(PAWN, turn)
+        pawns = []
+        for bb_file in BB_FILES[::-1]:
+            file_pawns = list(scan_reversed(bb_file & mask))
+            if len(file_pawns) > 1:
+                pawns += file_pawns
+            elif file_pawns:
+                prefixes[file_pawns[0]] = symbol + str(square_file_wxf(file_pawns[0], turn))
+        if len(pawns) == 2:
+            positions = [plus_symbol, minus_symbol]
+        elif len(pawns) == 3:
+            positions = [plus_symbol, ".", minus_symbol]
+        elif turn == RED:
+            positions = ["a", "b", "c", "d", "e"]
+        else:
+            positions = ["a", "b", "c", "d", "e"][:len(pawns)][::-1]
+        for square, position in zip(pawns, positions):
+            prefixes[square] = symbol + position
+        return prefixes
+
+    def _wxf_action(self, move: Move) -> str:
+        # wxf 记法的后两个字符：进退平和步数或目标的路
+        from_square = move.from_square
+        to_square = move.to_square
+        piece = self.piece_type_at(from_square)
+        plus_symbol = "+" if self.turn == RED else "-"
+        minus_symbol = "-" if self.turn == RED else "+"
+
+        # 马相象仕士
+        if piece == KNIGHT or piece == BISHOP or piece == ADVISOR:
+            return (plus_symbol if from_square < to_square else minus_symbol) + str(
+                square_file_wxf(to_square, self.turn)
+            )
+
+        # 车帅将炮兵卒
+        offset = popcount(BB_BETWEEN[from_square][to_square]) + 1
+        if abs(from_square - to_square) > 15:
+            return (minus_symbol if from_square > to_square else plus_symbol) + str(offset)
+        return "." + str(square_file_wxf(to_square, self.turn))
+
+
+class PseudoLegalMoveGenerator:
+    def __init__(self, board: Board) -> None:
+        self.board = board
+
+    def __bool__(self) -> bool:
+        return any(self.board.generate_pseudo_legal_moves())
+
+    def count(self) -> int:
+        return len(list(self))
+
+    def __iter__(self) -> Iterator[Move]:
+        return self.board.generate_pseudo_legal_moves()
+
+    def __contains__(self, move: Move) -> bool:
+        return self.board.is_pseudo_legal(move)
+
+    def __repr__(self) -> str:
+        builder = []
+        prefixes = self.board._wxf_prefixes()
+
+        for move in self:
+            if self.board.is_legal(move):
+                builder.append(prefixes[move.from_square] + self.board._wxf_action(move))
+            else:
+                builder.append(move.iccs())
+
+        sans = ", ".join(builder)
+        return f"<PseudoLegalMoveGenerator at {id(self):#x} ({sans})>"
+
+
+class LegalMoveGenerator:
+    def __init__(self, board: Board) -> None:
+        self.board = board
+
+    def __bool__(self) -> bool:
+        return any(self.board.generate_legal_moves())
+
+    def count(self) -> int:
+        return len(self.board.generate_legal_moves_packed())
+
+    def chinese(self) -> str:
+        s = ", ".join(self.board.chinese_many(self))
+        return s
+
+    def __iter__(self) -> Iterator[Move]:
+        return self.board.generate_legal_moves()
+
+    def __contains__(self, move: Move) -> bool:
+        return self.board.is_legal(move)
+
+    def __repr__(self) -> str:
+        sans = ", ".join(self.board.wxf_many(self))
+        return f"<LegalMoveGenerator at {id(self):#x} ({sans})>"
+
+
+def perft(board: Board, depth: int) -> int:
+    if depth < 1:
+        return 1
+    elif depth == 1:
+        return len(board.generate_legal_moves_packed())
+
+    nodes = 0
+    for move in board.generate_legal_moves_packed():
+        board.push_packed(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def perft_divide(board: Board, depth: int) -> Dict[Move, int]:
+    result = {}
+    for move in list(board.generate_legal_moves()):
+        board.push(move)
+        result[move] = perft(board, depth - 1)
+        board.pop()
+    return result
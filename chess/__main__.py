@@ -0,0 +1,382 @@
+import argparse
+import pathlib
+import random
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import chess
+
+PERFT_SUITE = pathlib.Path(__file__).with_name("xiangqi.perft")
+
+
+def read_perft_suite(path: pathlib.Path) -> Iterator[Tuple[str, str, List[Tuple[int, int]]]]:
+    id_ = fen = None
+    counts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, _, value = line.partition(" ")
+            if key == "id":
+                if fen is not None:
+                    yield id_, fen, counts
+                id_, fen, counts = value, None, []
+            elif key == "fen":
+                fen = value
+            elif key == "perft":
+                depth, nodes = value.split()
+                counts.append((int(depth), int(nodes)))
+            else:
+                raise ValueError(f"unexpected line in perft suite: {line!r}")
+    if fen is not None:
+        yield id_, fen, counts
+
+
+def _nps(nodes: int, seconds: float) -> int:
+    return int(nodes / seconds) if seconds > 0 else 0
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def cmd_perft(args: argparse.Namespace) -> int:
+    if args.fen:
+        board = chess.Board(args.fen)
+        start = time.perf_counter()
+        if args.divide:
+            nodes = 0
+            for move, count in chess.perft_divide(board, args.depth).items():
+                print(f"{move.iccs()}: {count}")
+                nodes += count
+        else:
+            nodes = chess.perft(board, args.depth)
+        elapsed = time.perf_counter() - start
+        print(f"depth {args.depth}: {nodes} nodes in {elapsed:.3f}s ({_nps(nodes, elapsed)} nodes/s)")
+        return 0
+
+    failed = 0
+    total_nodes = 0
+    total_time = 0.0
+    for id_, fen, counts in read_perft_suite(args.suite):
+        board = chess.Board(fen)
+        for depth, expected in counts:
+            if depth > args.depth:
+                continue
+            start = time.perf_counter()
+            nodes = chess.perft(board, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            failed += nodes != expected
+            print(f"{id_} depth {depth}: {nodes} {status} {elapsed:.3f}s ({_nps(nodes, elapsed)} nodes/s)")
+
+    print(f"total: {total_nodes} nodes in {total_time:.3f}s ({_nps(total_nodes, total_time)} nodes/s), {failed} failed")
+    return 1 if failed else 0
+
+
+def cmd_build_tables(args: argparse.Namespace) -> int:
+    directory = args.dir if args.dir is not None else chess.moves_table_dir()
+    path = directory / chess.MOVES_TABLE_NAME
+    start = time.perf_counter()
+    # import chess 时已经加载或重新生成了走法表，直接写出内存里的这份，不再生成一遍
+    table = tuple(getattr(chess, name) for name, _ in chess._MOVES_TABLE_LAYOUT)
+    chess._dump_moves_table(table, path)
+    elapsed = time.perf_counter() - start
+    print(f"wrote {path} ({path.stat().st_size} bytes, version {chess.MOVES_TABLE_VERSION}) in {elapsed:.3f}s")
+    return 0
+
+
+def _deep_sizeof(obj: object, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, list):
+        size += sum(_deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def cmd_bench_tables(args: argparse.Namespace) -> int:
+    rng = random.Random(args.seed)
+    occupancies = [rng.getrandbits(256) & chess.BB_IN_BOARD for _ in range(args.positions)]
+    squares = chess.SQUARES_IN_BOARD
+
+    def dict_lookups() -> None:
+        for occupied in occupancies:
+            for square in squares:
+                chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+                chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                chess.BB_CANNON_FILE_ATTACKS[square][chess.BB_CANNON_FILE_MASKS[square] & occupied]
+                chess.BB_CANNON_RANK_ATTACKS[square][chess.BB_CANNON_RANK_MASKS[square] & occupied]
+                chess.BB_KNIGHT_ATTACKS[square][chess.BB_KNIGHT_MASKS[square] & occupied]
+
+    def flat_lookups() -> None:
+        for occupied in occupancies:
+            for square in squares:
+                file_index = chess.file_occupancy(square, occupied)
+                rank_index = chess.rank_occupancy(square, occupied)
+                chess.BB_FILE_ATTACKS_FLAT[square][file_index]
+                chess.BB_RANK_ATTACKS_FLAT[square][rank_index]
+                chess.BB_CANNON_FILE_ATTACKS_FLAT[square][file_index]
+                chess.BB_CANNON_RANK_ATTACKS_FLAT[square][rank_index]
+                chess.BB_KNIGHT_ATTACKS_FLAT[square][chess.knight_leg_index(square, occupied)]
+
+    layouts = [
+        ("dict", dict_lookups, [
+            chess.BB_FILE_ATTACKS,
+            chess.BB_RANK_ATTACKS,
+            chess.BB_CANNON_FILE_ATTACKS,
+            chess.BB_CANNON_RANK_ATTACKS,
+            chess.BB_KNIGHT_ATTACKS,
+            chess.BB_KNIGHT_REVERSED_ATTACKS,
+            chess.BB_BISHOP_ATTACKS,
+        ]),
+        ("flat", flat_lookups, [
+            chess.BB_FILE_ATTACKS_FLAT,
+            chess.BB_RANK_ATTACKS_FLAT,
+            chess.BB_CANNON_FILE_ATTACKS_FLAT,
+            chess.BB_CANNON_RANK_ATTACKS_FLAT,
+            chess.BB_KNIGHT_ATTACKS_FLAT,
+            chess.BB_KNIGHT_REVERSED_ATTACKS_FLAT,
+            chess.BB_BISHOP_ATTACKS_FLAT,
+        ]),
+    ]
+    lookups = len(occupancies) * len(squares)
+    for name, func, tables in layouts:
+        memory = _deep_sizeof(tables, set())
+        elapsed = min(_timed(func) for _ in range(args.repeat))
+        print(f"{name}: {memory / 1024:.0f} KiB, {elapsed / lookups * 1e9:.0f} ns per square (5 lookups)")
+    return 0
+
+
+def cmd_bench_board(args: argparse.Namespace) -> int:
+    import chess.compact
+
+    backends = [("16x16", chess.Board), ("90", chess.compact.Board)]
+    totals = {name: [0, 0.0] for name, _ in backends}
+    mismatches = 0
+    for id_, fen, _ in read_perft_suite(args.suite):
+        results = []
+        counts = set()
+        for name, board_class in backends:
+            board = board_class(fen)
+            start = time.perf_counter()
+            nodes = chess.perft(board, args.depth)
+            elapsed = time.perf_counter() - start
+            totals[name][0] += nodes
+            totals[name][1] += elapsed
+            counts.add(nodes)
+            results.append(f"{name} {nodes} {elapsed:.3f}s ({_nps(nodes, elapsed)} nodes/s)")
+        mismatches += len(counts) != 1
+        status = "ok" if len(counts) == 1 else "MISMATCH"
+        print(f"{id_} depth {args.depth}: {status}, " + ", ".join(results))
+
+    for name, (nodes, elapsed) in totals.items():
+        print(f"{name}: {nodes} nodes in {elapsed:.3f}s ({_nps(nodes, elapsed)} nodes/s)")
+    return 1 if mismatches else 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    import chess.engine
+
+    board = chess.Board(args.fen) if args.fen else chess.Board()
+    limit = chess.engine.Limit(depth=args.depth, nodes=args.nodes, time=args.movetime)
+    if limit.depth is None and limit.nodes is None and limit.time is None:
+        limit.depth = 5
+
+    def info(info: chess.engine.SearchInfo) -> None:
+        print(f"info {info}")
+
+    if args.threads > 1:
+        result = chess.engine.search(board, limit, info, threads=args.threads, hash_mb=args.hash)
+    else:
+        searcher = chess.engine.Searcher(hash_mb=args.hash)
+        result = searcher.search(board, limit, info)
+        tt = searcher.tt
+        print(f"hash {tt.size_mb:g} MB, fill rate {tt.fill_rate:.1%}, hit rate {tt.hit_rate:.1%}")
+    move = result.move.iccs() if result.move else "(none)"
+    print(f"bestmove {move} score {result.score} depth {result.depth} nodes {result.nodes} "
+          f"in {result.time:.3f}s ({result.nps} nodes/s)")
+    if args.threads > 1:
+        print("worker nodes: " + ", ".join(str(nodes) for nodes in result.worker_nodes))
+    return 0
+
+
+def cmd_bench_smp(args: argparse.Namespace) -> int:
+    import chess.engine
+
+    board = chess.Board(args.fen) if args.fen else chess.Board()
+    limit = chess.engine.Limit(depth=args.depth)
+    baseline = None
+    for threads in [1] + [n for n in args.threads if n > 1]:
+        result = chess.engine.search(board, limit, threads=threads, hash_mb=args.hash)
+        if baseline is None:
+            baseline = result.time
+        speedup = baseline / result.time if result.time > 0 else 0.0
+        move = result.move.iccs() if result.move else "(none)"
+        print(f"threads {threads}: {move} score {result.score} in {result.time:.3f}s, speedup {speedup:.2f}x, "
+              f"{result.nodes} nodes ({result.nps} nodes/s), worker nodes "
+              + " ".join(str(nodes) for nodes in result.worker_nodes))
+    return 0
+
+
+def cmd_build_book(args: argparse.Namespace) -> int:
+    import chess.book
+
+    start = time.perf_counter()
+    suffix = args.games.suffix.lower()
+    if suffix in (".pgn", ".xqf"):
+        import chess.pgn
+        import chess.xqf
+
+        games = chess.pgn.read_games(args.games) if suffix == ".pgn" else [chess.xqf.read_xqf(args.games)]
+        # 开局库只收从初始局面开始的对局
+        records = (
+            ([move.iccs() for move in game.moves], game.result)
+            for game in games
+            if game.fen == chess.STARTING_FEN
+        )
+        count = chess.book.build_book(records, args.output, max_plies=args.plies)
+    else:
+        with open(args.games, encoding="utf-8") as f:
+            count = chess.book.build_book(chess.book.read_game_records(f), args.output, max_plies=args.plies)
+    elapsed = time.perf_counter() - start
+    print(f"wrote {args.output} ({count} entries, {args.output.stat().st_size} bytes) in {elapsed:.3f}s")
+    return 0
+
+
+def cmd_build_tablebase(args: argparse.Namespace) -> int:
+    import chess.tablebase
+
+    output = args.output if args.output is not None else chess.tablebase.default_path()
+    start = time.perf_counter()
+    signatures = chess.tablebase.generate(args.signatures, output, verbose=True)
+    elapsed = time.perf_counter() - start
+    print(f"wrote {output} ({len(signatures)} tables, {output.stat().st_size} bytes) in {elapsed:.3f}s")
+    return 0
+
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    import os
+
+    import chess.analysis
+    import chess.engine
+
+    limit = chess.engine.Limit(depth=args.depth, nodes=args.nodes, time=args.movetime)
+    if limit.depth is None and limit.nodes is None and limit.time is None:
+        limit.depth = 4
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    stats = chess.analysis.analyze(
+        args.games,
+        args.output if args.output is not None else sys.stdout,
+        limit,
+        workers=workers,
+        queue_size=args.queue_size,
+        checkpoint=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval,
+        hash_mb=args.hash,
+    )
+    elapsed = time.perf_counter() - start
+    for worker in stats:
+        print(worker, file=sys.stderr)
+    positions = sum(worker.positions for worker in stats)
+    nodes = sum(worker.nodes for worker in stats)
+    print(
+        f"total: {positions} positions, {nodes} nodes in {elapsed:.3f}s "
+        f"({_nps(nodes, elapsed)} nodes/s, {positions / elapsed if elapsed > 0 else 0:.2f} positions/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m chess")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    perft_parser = subparsers.add_parser("perft", help="count leaf nodes of the legal move tree")
+    perft_parser.add_argument("--fen", help="run a single position instead of the bundled suite")
+    perft_parser.add_argument("--depth", type=int, default=3, help="maximum depth (default: 3)")
+    perft_parser.add_argument("--divide", action="store_true", help="print node counts per root move (with --fen)")
+    perft_parser.add_argument("--suite", type=pathlib.Path, default=PERFT_SUITE, help="perft suite file")
+    perft_parser.set_defaults(func=cmd_perft)
+
+    tables_parser = subparsers.add_parser("build-tables", help="precompute the attack tables")
+    tables_parser.add_argument(
+        "--dir", type=pathlib.Path, help="output directory (default: $CHESS_TABLES_DIR or the package directory)"
+    )
+    tables_parser.set_defaults(func=cmd_build_tables)
+
+    bench_parser = subparsers.add_parser("bench-tables", help="compare memory and lookup time of the table layouts")
+    bench_parser.add_argument("--positions", type=int, default=1000, help="random occupancies (default: 1000)")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="take the best of this many runs (default: 5)")
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.set_defaults(func=cmd_bench_tables)
+
+    board_parser = subparsers.add_parser("bench-board", help="compare perft speed of the 16x16 and 90-square boards")
+    board_parser.add_argument("--depth", type=int, default=3, help="perft depth (default: 3)")
+    board_parser.add_argument("--suite", type=pathlib.Path, default=PERFT_SUITE, help="perft suite file")
+    board_parser.set_defaults(func=cmd_bench_board)
+
+    search_parser = subparsers.add_parser("search", help="search a position with the built-in engine")
+    search_parser.add_argument("--fen", help="position to search (default: the starting position)")
+    search_parser.add_argument("--depth", type=int, help="maximum depth (default: 5 if no other limit is given)")
+    search_parser.add_argument("--nodes", type=int, help="stop after this many nodes")
+    search_parser.add_argument("--movetime", type=float, help="stop after this many seconds")
+    search_parser.add_argument("--hash", type=float, default=16, help="transposition table size in MB (default: 16)")
+    search_parser.add_argument("--threads", type=int, default=1, help="search processes (default: 1)")
+    search_parser.set_defaults(func=cmd_search)
+
+    smp_parser = subparsers.add_parser("bench-smp", help="compare time to depth of the parallel search")
+    smp_parser.add_argument("--fen", help="position to search (default: the starting position)")
+    smp_parser.add_argument("--depth", type=int, default=6, help="search depth (default: 6)")
+    smp_parser.add_argument("--threads", type=int, nargs="+", default=[2, 4], help="process counts (default: 2 4)")
+    smp_parser.add_argument("--hash", type=float, default=16, help="transposition table size in MB (default: 16)")
+    smp_parser.set_defaults(func=cmd_bench_smp)
+
+    book_parser = subparsers.add_parser("build-book", help="build an opening book from game records")
+    book_parser.add_argument(
+        "games", type=pathlib.Path, help="a PGN or XQF file, or one game per line: ICCS moves and an optional result"
+    )
+    book_parser.add_argument("-o", "--output", type=pathlib.Path, default=pathlib.Path("book.bin"))
+    book_parser.add_argument("--plies", type=int, default=20, help="plies to take from each game (default: 20)")
+    book_parser.set_defaults(func=cmd_build_book)
+
+    tablebase_parser = subparsers.add_parser("build-tablebase", help="generate endgame tablebases")
+    tablebase_parser.add_argument("signatures", nargs="+", help="material signatures, red first (e.g. KRKAA KNPK)")
+    tablebase_parser.add_argument(
+        "-o", "--output", type=pathlib.Path, help="output file (default: tablebase.bin in the tables directory)"
+    )
+    tablebase_parser.set_defaults(func=cmd_build_tablebase)
+
+    analyze_parser = subparsers.add_parser("analyze", help="evaluate every move of many games in parallel")
+    analyze_parser.add_argument(
+        "games", type=pathlib.Path, nargs="+", help="PGN or XQF files, or game records: one game of ICCS moves per line"
+    )
+    analyze_parser.add_argument("-o", "--output", type=pathlib.Path, help="JSONL output file (default: stdout)")
+    analyze_parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    analyze_parser.add_argument("--depth", type=int, help="search depth per position (default: 4 if no other limit)")
+    analyze_parser.add_argument("--nodes", type=int, help="nodes per position")
+    analyze_parser.add_argument("--movetime", type=float, help="seconds per position")
+    analyze_parser.add_argument("--hash", type=float, default=16, help="transposition table size per worker in MB")
+    analyze_parser.add_argument("--queue-size", type=int, default=64, help="bound of the task and result queues")
+    analyze_parser.add_argument("--checkpoint", type=pathlib.Path, help="resume from and save progress to this file")
+    analyze_parser.add_argument(
+        "--checkpoint-interval", type=float, default=10.0, help="seconds between checkpoints (default: 10)"
+    )
+    analyze_parser.set_defaults(func=cmd_analyze)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import multiprocessing
+import os
+import pathlib
+import queue
+import sys
+import threading
+import time
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import chess
+import chess.book
+import chess.engine
+import chess.pgn
+import chess.xqf
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclasses.dataclass
+class WorkerStats:
+    worker: int
+
+    positions: int = 0
+
+    nodes: int = 0
+
+    # 搜索耗时，不含等待任务的时间
+    time: float = 0.0
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+    @property
+    def positions_per_second(self) -> float:
+        return self.positions / self.time if self.time > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"worker {self.worker}: {self.positions} positions, {self.nodes} nodes in {self.time:.3f}s "
+            f"({self.nps} nodes/s, {self.positions_per_second:.2f} positions/s)"
+        )
+
+
+@dataclasses.dataclass
+class _Checkpoint:
+    # 输出文件里 output_offset 之前的内容都已经记在 completed 和 partial 里
+    output_offset: int = 0
+
+    completed: Set[str] = dataclasses.field(default_factory=set)
+
+    # 没分析完的对局里已经分析过的半回合
+    partial: Dict[str, Set[int]] = dataclasses.field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> _Checkpoint:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported checkpoint version in {path}: {data.get('version')!r}")
+        return cls(
+            data["output_offset"],
+            set(data["completed"]),
+            {game: set(plies) for game, plies in data["partial"].items()},
+        )
+
+    def dump(self, path: pathlib.Path) -> None:
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "output_offset": self.output_offset,
+            "completed": sorted(self.completed),
+            "partial": {game: sorted(plies) for game, plies in self.partial.items()},
+        }
+        # 先写临时文件再替换，中途被打断也不会留下写了一半的检查点
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+
+def read_games(paths: List[pathlib.Path]) -> Iterator[Tuple[str, str, List[str]]]:
+    # 返回 (对局编号, 开始局面的 FEN, ICCS 走法)；对局编号是 "文件名:行号"（PGN 是 "文件名:第几局"，XQF 是文件名），
+    # 输入文件的顺序变了也能从检查点恢复
+    for path in paths:
+        suffix = path.suffix.lower()
+        if suffix == ".pgn":
+            for number, game in enumerate(chess.pgn.read_games(path), 1):
+                yield f"{path}:{number}", game.fen, [move.iccs() for move in game.moves]
+        elif suffix == ".xqf":
+            game = chess.xqf.read_xqf(path)
+            yield str(path), game.fen, [move.iccs() for move in game.moves]
+        else:
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    for moves, _ in chess.book.read_game_records([line]):
+                        yield f"{path}:{line_number}", chess.STARTING_FEN, moves
+
+
+def _replay(fen: str, moves: List[str]) -> List[Tuple[str, str]]:
+    # 按棋谱走一遍，返回每一步之前的 FEN 和这一步的走法；遇到不合法的走法就停下
+    board = chess.Board(fen)
+    positions = []
+    for iccs in moves:
+        try:
+            move = chess.Move.from_iccs(iccs)
+        except ValueError:
+            break
+        if not board.is_legal(move):
+            break
+        positions.append((board.fen(), move.iccs()))
+        board.push(move)
+    return positions
+
+
+def _worker(index: int, tasks, results, limit: chess.engine.Limit, hash_mb: float) -> None:
+    # 同一个进程的置换表在任务之间保留，同一局相邻的局面能互相利用
+    searcher = chess.engine.Searcher(hash_mb=hash_mb)
+    stats = WorkerStats(index)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        game, ply, fen, move = task
+        result = searcher.search(chess.Board(fen), limit)
+        stats.positions += 1
+        stats.nodes += result.nodes
+        stats.time += result.time
+        results.put(("move", {
+            "game": game,
+            "ply": ply,
+            "fen": fen,
+            "move": move,
+            "best": result.move.iccs() if result.move else None,
+            "score": result.score,
+            "depth": result.depth,
+            "nodes": result.nodes,
+            "time": round(result.time, 4),
+            "pv": [pv_move.iccs() for pv_move in result.pv],
+            "worker": index,
+        }))
+    results.put(("stats", stats))
+
+
+def analyze(
+    paths: List[Union[str, os.PathLike]],
+    output: Union[str, os.PathLike, IO[str]],
+    limit: chess.engine.Limit,
+    *,
+    workers: int = 1,
+    queue_size: int = 64,
+    checkpoint: Optional[Union[str, os.PathLike]] = None,
+    checkpoint_interval: float = 10.0,
+    hash_mb: float = 16,
+) -> List[WorkerStats]:
+    # 主进程的一个线程读棋谱、复盘并把局面放进有界的任务队列，工作进程搜索后把结果放进有界的结果队列，
+    # 主进程一边收结果一边写 JSONL；队列满时读棋谱的线程会等待，内存占用不随棋谱数量增长
+    paths = [pathlib.Path(path) for path in paths]
+    checkpoint_path = pathlib.Path(checkpoint) if checkpoint is not None else None
+    state = _Checkpoint()
+    if checkpoint_path is not None and checkpoint_path.exists():
+        state = _Checkpoint.load(checkpoint_path)
+
+    if isinstance(output, (str, os.PathLike)):
+        out = open(output, "a+", encoding="utf-8")
+        # 检查点之后写的结果不一定记在检查点里，截掉重新分析
+        out.truncate(state.output_offset if checkpoint_path is not None else 0)
+        out.seek(0, os.SEEK_END)
+        close_output = True
+    else:
+        if checkpoint_path is not None:
+            raise ValueError("checkpoints need an output file")
+        out = output
+        close_output = False
+
+    context = multiprocessing.get_context()
+    tasks = context.Queue(maxsize=queue_size)
+    results = context.Queue(maxsize=queue_size)
+    processes = [
+        context.Process(target=_worker, args=(index, tasks, results, limit, hash_mb), daemon=True)
+        for index in range(1, workers + 1)
+    ]
+    lock = threading.Lock()
+    totals: Dict[str, int] = {}
+    producer_error: List[BaseException] = []
+
+    def produce() -> None:
+        try:
+            for game, fen, moves in read_games(paths):
+                with lock:
+                    if game in state.completed:
+                        continue
+                    done = state.partial.get(game, set())
+                positions = _replay(fen, moves)
+                pending = [ply for ply in range(len(positions)) if ply not in done]
+                with lock:
+                    if not pending:
+                        state.completed.add(game)
+                        state.partial.pop(game, None)
+                        continue
+                    totals[game] = len(positions)
+                    state.partial.setdefault(game, set())
+                for ply in pending:
+                    fen, move = positions[ply]
+                    tasks.put((game, ply, fen, move))
+        except BaseException as err:
+            producer_error.append(err)
+        finally:
+            for _ in processes:
+                tasks.put(None)
+
+    def save_checkpoint() -> None:
+        out.flush()
+        with lock:
+            state.output_offset = out.tell()
+            state.dump(checkpoint_path)
+
+    stats: List[WorkerStats] = []
+    producer = threading.Thread(target=produce, daemon=True)
+    try:
+        for process in processes:
+            process.start()
+        producer.start()
+        last_checkpoint = time.monotonic()
+        while len(stats) < len(processes):
+            try:
+                kind, payload = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("all analysis workers exited unexpectedly")
+                continue
+            if kind == "stats":
+                stats.append(payload)
+                continue
+            out.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            out.flush()
+            game = payload["game"]
+            with lock:
+                done = state.partial.setdefault(game, set())
+                done.add(payload["ply"])
+                if len(done) >= totals.get(game, sys.maxsize):
+                    state.completed.add(game)
+                    del state.partial[game]
+            if checkpoint_path is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                save_checkpoint()
+                last_checkpoint = time.monotonic()
+        producer.join()
+        if producer_error:
+            raise producer_error[0]
+        if checkpoint_path is not None:
+            save_checkpoint()
+    except KeyboardInterrupt:
+        # 已经写出的结果都记在 state 里，中断时也保存一次，下次从这里继续
+        if checkpoint_path is not None:
+            save_checkpoint()
+        raise
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        if close_output:
+            out.close()
+    return sorted(stats, key=lambda worker: worker.worker)
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Tuple, Union
+
+import numpy as np
+
+import chess
+
+# 批量局面用紧凑的 90 格布局：下标为 rank * 9 + file，第 0~4 行放在低位字，
+# 第 5~9 行放在高位字，每个位棋盘是两个 uint64，一行或一列的占位都不会跨字
+SQUARES_90 = list(chess.SQUARES_IN_BOARD)
+SQUARE_INDEX = [-1] * 256
+for _index, _square in enumerate(SQUARES_90):
+    SQUARE_INDEX[_square] = _index
+
+_U = np.uint64
+_FILE_BITS = _U(sum(1 << (9 * i) for i in range(5)))
+# 把间隔 9 位的 5 个占位收拢到第 36~40 位，各项落在不同的位上，不会产生进位
+_FILE_MAGIC = _U(sum(1 << (36 - 8 * i) for i in range(5)))
+
+
+def to_compact(bb: chess.Bitboard) -> Tuple[int, int]:
+    words = [0, 0]
+    for rank in range(10):
+        row = (bb >> ((rank + 3) * 16 + 3)) & 0x1FF
+        words[rank // 5] |= row << (9 * (rank % 5))
+    return words[0], words[1]
+
+
+def from_compact(lo: int, hi: int) -> chess.Bitboard:
+    bb = chess.BB_EMPTY
+    for rank in range(10):
+        word = hi if rank >= 5 else lo
+        bb |= ((int(word) >> (9 * (rank % 5))) & 0x1FF) << ((rank + 3) * 16 + 3)
+    return bb
+
+
+def _compact_table(bbs: Iterable[chess.Bitboard], cache: Dict[int, Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # 同一张表里重复的位棋盘很多，转换结果按值缓存
+    table = []
+    for bb in bbs:
+        words = cache.get(bb)
+        if words is None:
+            words = cache[bb] = to_compact(bb)
+        table.append(words)
+    return table
+
+
+def _build_tables() -> Dict[str, np.ndarray]:
+    cache: Dict[int, Tuple[int, int]] = {}
+
+    def per_square(tables: List[List[chess.Bitboard]]) -> np.ndarray:
+        return np.array([_compact_table(tables[square], cache) for square in SQUARES_90], dtype=np.uint64)
+
+    def single(table: Union[List[chess.Bitboard], Mapping[int, chess.Bitboard]]) -> np.ndarray:
+        return np.array(_compact_table((table[square] for square in SQUARES_90), cache), dtype=np.uint64)
+
+    return {
+        "square": single(chess.BB_SQUARES),
+        "rank": per_square(chess.BB_RANK_ATTACKS_FLAT),
+        "file": per_square(chess.BB_FILE_ATTACKS_FLAT),
+        "cannon_rank": per_square(chess.BB_CANNON_RANK_ATTACKS_FLAT),
+        "cannon_file": per_square(chess.BB_CANNON_FILE_ATTACKS_FLAT),
+        "knight": per_square(chess.BB_KNIGHT_ATTACKS_FLAT),
+        "knight_reversed": per_square(chess.BB_KNIGHT_REVERSED_ATTACKS_FLAT),
+        "bishop": per_square(chess.BB_BISHOP_ATTACKS_FLAT),
+        "advisor": single(chess.BB_ADVISOR_ATTACKS),
+        "king": single(chess.BB_KING_ATTACKS),
+        # 将所在的直线和马腿，用来筛出可能送将的走法
+        "king_rays": single({
+            square: chess.BB_FILE_ATTACKS[square][chess.BB_EMPTY] | chess.BB_RANK_ATTACKS[square][chess.BB_EMPTY]
+            for square in SQUARES_90
+        }),
+        "knight_legs": single(chess.BB_KNIGHT_REVERSED_MASKS),
+        # 按 Color 下标：BLACK = 0, RED = 1
+        "pawn": np.stack([single(chess.BB_PAWN_ATTACKS[color]) for color in [chess.BLACK, chess.RED]]),
+        "pawn_reversed": np.stack(
+            [single(chess.BB_PAWN_REVERSED_ATTACKS[color]) for color in [chess.BLACK, chess.RED]]
+        ),
+    }
+
+
+def _neighbour_bits(deltas: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    # 马腿和象眼按 knight_leg_index/diagonal_index 的位序排列，
+    # 棋盘外的邻格指向始终为 0 的第 63 位
+    words = np.zeros((90, len(deltas)), dtype=np.uint64)
+    bits = np.full((90, len(deltas)), 63, dtype=np.uint64)
+    for index, square in enumerate(SQUARES_90):
+        for i, delta in enumerate(deltas):
+            neighbour = SQUARE_INDEX[square + delta]
+            if neighbour >= 0:
+                words[index, i] = neighbour // 45
+                bits[index, i] = neighbour % 45
+    return words, bits
+
+
+TABLES = _build_tables()
+_RANK_WORD = np.array([index // 45 for index in range(90)], dtype=np.intp)
+_RANK_SHIFT = np.array([9 * ((index // 9) % 5) for index in range(90)], dtype=np.uint64)
+_FILE_SHIFT = np.array([index % 9 for index in range(90)], dtype=np.uint64)
+_KNIGHT_LEG_WORDS, _KNIGHT_LEG_BITS = _neighbour_bits([16, 1, -16, -1])
+_DIAGONAL_WORDS, _DIAGONAL_BITS = _neighbour_bits([15, 17, -15, -17])
+
+
+def _rank_index(squares: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+    rows = occupied[np.arange(len(squares)), _RANK_WORD[squares]]
+    return ((rows >> _RANK_SHIFT[squares]) & _U(0x1FF)).astype(np.intp)
+
+
+def _file_index(squares: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+    shift = _FILE_SHIFT[squares]
+    lo = (((occupied[:, 0] >> shift) & _FILE_BITS) * _FILE_MAGIC >> _U(36)) & _U(0x1F)
+    hi = (((occupied[:, 1] >> shift) & _FILE_BITS) * _FILE_MAGIC >> _U(36)) & _U(0x1F)
+    return (lo | hi << _U(5)).astype(np.intp)
+
+
+def _neighbour_index(squares: np.ndarray, occupied: np.ndarray, words: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    rows = np.arange(len(squares))[:, np.newaxis]
+    occupancy = occupied[rows, words[squares]] >> bits[squares] & _U(1)
+    return (occupancy << np.arange(4, dtype=np.uint64)).sum(axis=1).astype(np.intp)
+
+
+def attacks(
+    squares: np.ndarray, piece_types: np.ndarray, colors: np.ndarray, occupied: np.ndarray, kings: np.ndarray
+) -> np.ndarray:
+    # 与 BaseBoard.attacks_mask 相同，squares/piece_types/colors 为一维数组，
+    # occupied/kings 为 (M, 2) 的紧凑位棋盘，返回 (M, 2)
+    file_index = _file_index(squares, occupied)
+    rank_index = _rank_index(squares, occupied)
+    rook = TABLES["file"][squares, file_index] | TABLES["rank"][squares, rank_index]
+    cannon = (
+        TABLES["cannon_file"][squares, file_index] | TABLES["cannon_rank"][squares, rank_index] | (rook & ~occupied)
+    )
+    knight = TABLES["knight"][squares, _neighbour_index(squares, occupied, _KNIGHT_LEG_WORDS, _KNIGHT_LEG_BITS)]
+    bishop = TABLES["bishop"][squares, _neighbour_index(squares, occupied, _DIAGONAL_WORDS, _DIAGONAL_BITS)]
+    # 老将对脸杀
+    king = TABLES["king"][squares] | (TABLES["file"][squares, file_index] & kings)
+    pawn = TABLES["pawn"][colors.astype(np.intp), squares]
+
+    piece_types = piece_types[:, np.newaxis]
+    result = np.zeros_like(occupied)
+    for piece_type, table in [
+        (chess.PAWN, pawn),
+        (chess.CANNON, cannon),
+        (chess.ROOK, rook),
+        (chess.KNIGHT, knight),
+        (chess.BISHOP, bishop),
+        (chess.ADVISOR, TABLES["advisor"][squares]),
+        (chess.KING, king),
+    ]:
+        result = np.where(piece_types == piece_type, table, result)
+    return result
+
+
+def attackers(
+    colors: np.ndarray, squares: np.ndarray, occupied: np.ndarray, pieces: np.ndarray, occupied_co: np.ndarray
+) -> np.ndarray:
+    # 与 BaseBoard._attackers_mask 相同，pieces 为 (M, 8, 2)，按 PieceType 下标，
+    # occupied_co 为攻击方的 (M, 2)
+    file_index = _file_index(squares, occupied)
+    rank_index = _rank_index(squares, occupied)
+    diagonal_index = _neighbour_index(squares, occupied, _DIAGONAL_WORDS, _DIAGONAL_BITS)
+    rook_attacks = TABLES["file"][squares, file_index] | TABLES["rank"][squares, rank_index]
+    result = (
+        (
+            (TABLES["cannon_file"][squares, file_index] | TABLES["cannon_rank"][squares, rank_index])
+            & pieces[:, chess.CANNON]
+        )
+        | (rook_attacks & (pieces[:, chess.ROOK] | pieces[:, chess.KING]))
+        | (TABLES["knight_reversed"][squares, diagonal_index] & pieces[:, chess.KNIGHT])
+        | (TABLES["bishop"][squares, diagonal_index] & pieces[:, chess.BISHOP])
+        | (TABLES["pawn_reversed"][colors.astype(np.intp), squares] & pieces[:, chess.PAWN])
+        | (TABLES["advisor"][squares] & pieces[:, chess.ADVISOR])
+        | (TABLES["king"][squares] & pieces[:, chess.KING])
+    )
+    return result & occupied_co
+
+
+def _has_bit(masks: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    words = masks[np.arange(len(squares)), squares // 45]
+    return (words >> (squares % 45).astype(np.uint64) & _U(1)).astype(bool)
+
+
+def _bit_indices(masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # (M, 2) 的紧凑位棋盘展开为 (行号, 格子下标)
+    bits = np.unpackbits(masks.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+    rows, bit = np.nonzero(bits)
+    return rows, (bit // 64) * 45 + bit % 64
+
+
+class BoardBatch:
+    def __init__(self, boards: Iterable[chess.Board]) -> None:
+        boards = list(boards)
+        n = len(boards)
+        # pieces[i, piece_type] 为双方该兵种的位棋盘，occupied_co[i, color] 按 BLACK = 0, RED = 1
+        self.pieces = np.zeros((n, 8, 2), dtype=np.uint64)
+        self.occupied_co = np.zeros((n, 2, 2), dtype=np.uint64)
+        self.piece_types = np.zeros((n, 90), dtype=np.uint8)
+        self.turn = np.zeros(n, dtype=bool)
+
+        for i, board in enumerate(boards):
+            for piece_type in chess.PIECE_TYPES:
+                self.pieces[i, piece_type] = to_compact(
+                    board.pieces_mask(piece_type, chess.RED) | board.pieces_mask(piece_type, chess.BLACK)
+                )
+            for color in chess.COLORS:
+                self.occupied_co[i, int(color)] = to_compact(board.occupied_co[color])
+            for square in board.piece_squares(chess.RED) | board.piece_squares(chess.BLACK):
+                self.piece_types[i, SQUARE_INDEX[square]] = board.piece_type_at(square)
+            self.turn[i] = board.turn
+
+    @classmethod
+    def from_fens(cls, fens: Iterable[str]) -> BoardBatch:
+        return cls(chess.Board(fen) for fen in fens)
+
+    def __len__(self) -> int:
+        return len(self.turn)
+
+    @property
+    def occupied(self) -> np.ndarray:
+        return self.occupied_co[:, 0] | self.occupied_co[:, 1]
+
+    def _us(self) -> np.ndarray:
+        return self.occupied_co[np.arange(len(self)), self.turn.astype(np.intp)]
+
+    def _them(self) -> np.ndarray:
+        return self.occupied_co[np.arange(len(self)), (~self.turn).astype(np.intp)]
+
+    def attacks_mask(self) -> np.ndarray:
+        # (N, 90, 2)：每个格子上棋子的攻击范围，空格为 0
+        n = len(self)
+        red = self.occupied_co[:, 1]
+        occupied = self.occupied
+        kings = self.pieces[:, chess.KING]
+        result = np.zeros((n, 90, 2), dtype=np.uint64)
+        for index in range(90):
+            squares = np.full(n, index, dtype=np.intp)
+            word, bit = index // 45, _U(index % 45)
+            colors = (red[:, word] >> bit) & _U(1)
+            result[:, index] = attacks(squares, self.piece_types[:, index], colors, occupied, kings)
+        return result
+
+    def king_squares(self) -> np.ndarray:
+        # 行棋方将的格子下标，没有将为 -1
+        rows, squares = _bit_indices(self.pieces[:, chess.KING] & self._us())
+        result = np.full(len(self), -1, dtype=np.intp)
+        result[rows] = squares
+        return result
+
+    def checkers_mask(self) -> np.ndarray:
+        kings = self.king_squares()
+        has_king = kings >= 0
+        result = attackers(
+            ~self.turn, np.where(has_king, kings, 0), self.occupied, self.pieces, self._them()
+        )
+        result[~has_king] = 0
+        return result
+
+    def is_check(self) -> np.ndarray:
+        return self.checkers_mask().any(axis=1)
+
+    def _pseudo_legal_moves(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        us = self._us()
+        rows, from_squares = _bit_indices(us)
+        targets = attacks(
+            from_squares,
+            self.piece_types[rows, from_squares],
+            self.turn[rows],
+            self.occupied[rows],
+            self.pieces[rows, chess.KING],
+        ) & ~us[rows]
+        move_rows, to_squares = _bit_indices(targets)
+        return rows[move_rows], from_squares[move_rows], to_squares
+
+    def _legal_moves(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # 把所有伪合法走法展开成一维数组，按走子后的占位一次算出是否被将军。
+        # 没被将军时，只有动将、离开将的直线或马腿、走到将的直线上（炮架）的走法才可能送将
+        rows, from_squares, to_squares = self._pseudo_legal_moves()
+        kings = self.king_squares()[rows]
+        has_king = kings >= 0
+        kings = np.maximum(kings, 0)
+        rays = TABLES["king_rays"][kings]
+        risky = has_king & (
+            self.is_check()[rows]
+            | (kings == from_squares)
+            | _has_bit(rays | TABLES["knight_legs"][kings], from_squares)
+            | _has_bit(rays, to_squares)
+        )
+
+        r, f, t = rows[risky], from_squares[risky], to_squares[risky]
+        bb_from = TABLES["square"][f]
+        bb_to = TABLES["square"][t]
+        occupied = self.occupied[r] & ~bb_from | bb_to
+        them = self._them()[r] & ~bb_to
+        kings = np.where(kings[risky] == f, t, kings[risky])
+        checked = attackers(~self.turn[r], kings, occupied, self.pieces[r], them).any(axis=1)
+
+        legal = np.ones(len(rows), dtype=bool)
+        legal[risky] = ~checked
+        return rows[legal], from_squares[legal], to_squares[legal]
+
+    def legal_moves_mask(self) -> np.ndarray:
+        # (N, 90, 2)：每个起点格子的合法目标格子
+        rows, from_squares, to_squares = self._legal_moves()
+        result = np.zeros((len(self), 90, 2), dtype=np.uint64)
+        np.bitwise_or.at(result, (rows, from_squares), TABLES["square"][to_squares])
+        return result
+
+    def legal_moves(self) -> List[List[chess.Move]]:
+        result: List[List[chess.Move]] = [[] for _ in range(len(self))]
+        for row, from_square, to_square in zip(*(a.tolist() for a in self._legal_moves())):
+            result[row].append(chess.Move(SQUARES_90[from_square], SQUARES_90[to_square]))
+        return result
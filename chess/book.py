@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import dataclasses
+import mmap
+import os
+import pathlib
+import random
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import chess
+
+BOOK_VERSION = 1
+
+# magic, version, 条目数
+_BOOK_HEADER = struct.Struct("<4sII")
+_BOOK_MAGIC = b"XQBK"
+# 局面 zobrist 键, 压缩走法 (from << 8 | to), 权重；按 (键, 走法) 排序
+_BOOK_ENTRY = struct.Struct("<QHH")
+_MAX_WEIGHT = 0xFFFF
+
+# 胜方的走法权重加倍，负方的走法不计
+_RESULT_WEIGHTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1), "*": (1, 1)}
+
+
+@dataclasses.dataclass(frozen=True)
+class BookEntry:
+    key: int
+
+    move: chess.Move
+
+    weight: int
+
+
+class OpeningBook:
+    # 用 mmap 打开的二进制开局库，按局面键二分查找，不把整个文件读进内存
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < _BOOK_HEADER.size:
+                raise ValueError("truncated header")
+            magic, version, count = _BOOK_HEADER.unpack_from(self._mmap, 0)
+            if magic != _BOOK_MAGIC:
+                raise ValueError(f"bad magic {magic!r}")
+            if version != BOOK_VERSION:
+                raise ValueError(f"version {version}, expected {BOOK_VERSION}")
+            if len(self._mmap) != _BOOK_HEADER.size + count * _BOOK_ENTRY.size:
+                raise ValueError(f"size {len(self._mmap)} does not match {count} entries")
+        except ValueError as err:
+            self._mmap.close()
+            raise ValueError(f"invalid opening book {self.path}: {err}") from None
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> OpeningBook:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _entry_at(self, index: int) -> Tuple[int, int, int]:
+        return _BOOK_ENTRY.unpack_from(self._mmap, _BOOK_HEADER.size + index * _BOOK_ENTRY.size)
+
+    def _lower_bound(self, key: int) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry_at(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_all(self, board: chess.Board) -> Iterator[BookEntry]:
+        # 只返回当前局面下合法的走法，防止键冲突
+        key = board.zobrist_hash()
+        for index in range(self._lower_bound(key), self._count):
+            entry_key, packed, weight = self._entry_at(index)
+            if entry_key != key:
+                break
+            move = chess.Move.from_packed(packed)
+            if weight and board.is_legal(move):
+                yield BookEntry(key, move, weight)
+
+    def find(self, board: chess.Board) -> Optional[BookEntry]:
+        return max(self.find_all(board), key=lambda entry: entry.weight, default=None)
+
+    def choice(self, board: chess.Board, *, rng: Optional[random.Random] = None) -> Optional[BookEntry]:
+        # 按权重随机选一步，让电脑的开局有变化
+        entries = list(self.find_all(board))
+        if not entries:
+            return None
+        rng = rng if rng is not None else random
+        return rng.choices(entries, weights=[entry.weight for entry in entries])[0]
+
+    def __repr__(self) -> str:
+        return f"<OpeningBook {str(self.path)!r} entries={self._count}>"
+
+
+def read_game_records(lines: Iterable[str]) -> Iterator[Tuple[List[str], str]]:
+    # 每行一局：用空格分隔的 ICCS 走法，最后可以跟一个结果（1-0、0-1、1/2-1/2、*），# 开头的行是注释
+    for line in lines:
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+        result = "*"
+        if tokens[-1] in _RESULT_WEIGHTS:
+            result = tokens.pop()
+        yield tokens, result
+
+
+def build_book(
+    games: Iterable[Tuple[List[str], str]],
+    path: Union[str, os.PathLike],
+    *,
+    max_plies: int = 20,
+    fen: str = chess.STARTING_FEN,
+) -> int:
+    weights: Dict[Tuple[int, int], int] = {}
+    for moves, result in games:
+        red_weight, black_weight = _RESULT_WEIGHTS[result]
+        board = chess.Board(fen)
+        for iccs in moves[:max_plies]:
+            try:
+                move = chess.Move.from_iccs(iccs)
+            except ValueError:
+                move = None
+            if move is None or not board.is_legal(move):
+                # 棋谱有错，这局后面的走法都不要了
+                break
+            weight = red_weight if board.turn == chess.RED else black_weight
+            key = (board.zobrist_hash(), move.from_square << 8 | move.to_square)
+            weights[key] = min(weights.get(key, 0) + weight, _MAX_WEIGHT)
+            board.push(move)
+
+    entries = sorted((key, packed, weight) for (key, packed), weight in weights.items() if weight)
+    data = bytearray(_BOOK_HEADER.pack(_BOOK_MAGIC, BOOK_VERSION, len(entries)))
+    for entry in entries:
+        data += _BOOK_ENTRY.pack(*entry)
+
+    # 先写临时文件再替换，正在使用旧文件的进程不受影响
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return len(entries)
@@ -0,0 +1,622 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+import chess
+from chess import (
+    ADVISOR,
+    BISHOP,
+    BLACK,
+    CANNON,
+    KING,
+    KNIGHT,
+    PAWN,
+    RED,
+    ROOK,
+    Color,
+    Move,
+    Piece,
+    PieceType,
+)
+
+# 紧凑的 90 格布局：格子下标为 rank * 9 + file，位棋盘只有 90 位，
+# 对外的 Move 和格子仍然使用 chess 模块的 16x16 编号
+Square90 = int
+Bitboard90 = int
+
+SQUARES_90 = list(chess.SQUARES_IN_BOARD)
+SQUARE_INDEX = [-1] * 256
+for _index, _square in enumerate(SQUARES_90):
+    SQUARE_INDEX[_square] = _index
+
+BB_EMPTY = 0
+BB_ALL = (1 << 90) - 1
+BB_SQUARES = [1 << index for index in range(90)]
+
+_FILE_BITS = sum(1 << (9 * rank) for rank in range(10))
+_FILE_SHIFT = 81
+# 把间隔 9 位的一列收拢到第 81~90 位（第 rank 行落在 90 - rank 位），各项互不重叠，不会产生进位
+_FILE_MAGIC = sum(1 << (_FILE_SHIFT + 9 - 10 * rank) for rank in range(10))
+_RANK_SHIFTS = [9 * (index // 9) for index in range(90)]
+
+# 马腿 +9, +1, -9, -1 与象眼（以及反向马腿）+8, +10, -8, -10 的坐标，按查表下标的位序排列
+_LEG_DELTAS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+_DIAGONAL_DELTAS = [(-1, 1), (1, 1), (1, -1), (-1, -1)]
+_KNIGHT_DELTAS = [(1, 2), (-1, 2), (2, 1), (-2, 1), (2, -1), (-2, -1), (1, -2), (-1, -2)]
+
+
+def _coords(index: Square90) -> Tuple[int, int]:
+    return index % 9, index // 9
+
+
+def _index(file: int, rank: int) -> Optional[Square90]:
+    if 0 <= file < 9 and 0 <= rank < 10:
+        return rank * 9 + file
+    return None
+
+
+def _in_palace(file: int, rank: int) -> bool:
+    return 3 <= file <= 5 and (rank <= 2 or rank >= 7)
+
+
+def rank_occupancy(index: Square90, occupied: Bitboard90) -> int:
+    return (occupied >> _RANK_SHIFTS[index]) & 0x1FF
+
+
+def file_occupancy(index: Square90, occupied: Bitboard90) -> int:
+    return ((occupied >> (index % 9)) & _FILE_BITS) * _FILE_MAGIC >> _FILE_SHIFT & 0x3FF
+
+
+def knight_leg_index(index: Square90, occupied: Bitboard90) -> int:
+    o = occupied << 10 >> index
+    return (o >> 19 & 1) | (o >> 10 & 2) | (o << 1 & 4) | (o >> 6 & 8)
+
+
+def diagonal_index(index: Square90, occupied: Bitboard90) -> int:
+    o = occupied << 10 >> index
+    return (o >> 18 & 1) | (o >> 19 & 2) | (o & 4) | (o << 3 & 8)
+
+
+def _line_table(index: Square90, direction: Tuple[int, int], jump: bool) -> List[Bitboard90]:
+    # 按 rank_occupancy（direction 为横向）或 file_occupancy（纵向）的下标列出攻击范围
+    file, rank = _coords(index)
+    length = 9 if direction[0] else 10
+    position = file if direction[0] else rank
+    table = []
+    for occupancy in range(1 << length):
+        attacks = BB_EMPTY
+        for step in [-1, 1]:
+            hops = 0
+            i = position + step
+            while 0 <= i < length:
+                bit = i if direction[0] else 9 - i
+                target = _index(i, rank) if direction[0] else _index(file, i)
+                if occupancy >> bit & 1:
+                    hops += 1
+                    if (hops == 2) if jump else (hops == 1):
+                        attacks |= BB_SQUARES[target]
+                        break
+                elif not jump:
+                    attacks |= BB_SQUARES[target]
+                i += step
+        table.append(attacks)
+    return table
+
+
+def _blocked(occupancy: int) -> List[bool]:
+    # 下标的第 i 位对应第 i 个方向的马腿或象眼是否被占
+    return [bool(occupancy >> i & 1) for i in range(4)]
+
+
+def _knight_table(index: Square90) -> List[Bitboard90]:
+    file, rank = _coords(index)
+    table = []
+    for occupancy in range(16):
+        blocked = _blocked(occupancy)
+        attacks = BB_EMPTY
+        for df, dr in _KNIGHT_DELTAS:
+            leg = (0, dr // 2) if abs(dr) == 2 else (df // 2, 0)
+            target = _index(file + df, rank + dr)
+            if target is not None and not blocked[_LEG_DELTAS.index(leg)]:
+                attacks |= BB_SQUARES[target]
+        table.append(attacks)
+    return table
+
+
+def _knight_reversed_table(index: Square90) -> List[Bitboard90]:
+    # 能走到 index 的马，马腿是 index 的斜邻格
+    file, rank = _coords(index)
+    table = []
+    for occupancy in range(16):
+        blocked = _blocked(occupancy)
+        attacks = BB_EMPTY
+        for df, dr in _KNIGHT_DELTAS:
+            leg = (0, dr // 2) if abs(dr) == 2 else (df // 2, 0)
+            source = _index(file - df, rank - dr)
+            if source is not None and not blocked[_DIAGONAL_DELTAS.index((leg[0] - df, leg[1] - dr))]:
+                attacks |= BB_SQUARES[source]
+        table.append(attacks)
+    return table
+
+
+def _bishop_table(index: Square90) -> List[Bitboard90]:
+    file, rank = _coords(index)
+    table = []
+    for occupancy in range(16):
+        blocked = _blocked(occupancy)
+        attacks = BB_EMPTY
+        if BB_SQUARES_BISHOP & BB_SQUARES[index]:
+            for i, (df, dr) in enumerate(_DIAGONAL_DELTAS):
+                target = _index(file + 2 * df, rank + 2 * dr)
+                # 象不过河
+                if target is not None and not blocked[i] and (rank + 2 * dr <= 4) == (rank <= 4):
+                    attacks |= BB_SQUARES[target]
+        table.append(attacks)
+    return table
+
+
+def _step_attacks(index: Square90, deltas: List[Tuple[int, int]], palace: bool = False) -> Bitboard90:
+    file, rank = _coords(index)
+    attacks = BB_EMPTY
+    for df, dr in deltas:
+        target = _index(file + df, rank + dr)
+        if target is not None and (not palace or _in_palace(file + df, rank + dr)):
+            attacks |= BB_SQUARES[target]
+    return attacks
+
+
+def _step_table(deltas: List[Tuple[int, int]], origins: Bitboard90) -> List[Bitboard90]:
+    # 只在 origins 中的格子上有走法，目标限制在九宫内
+    return [
+        _step_attacks(index, deltas, palace=True) if origins & BB_SQUARES[index] else BB_EMPTY
+        for index in range(90)
+    ]
+
+
+def _pawn_tables() -> Tuple[List[List[Bitboard90]], List[List[Bitboard90]]]:
+    # 按 Color 下标，过河后可以横走
+    attacks: List[List[Bitboard90]] = [[], []]
+    for index in range(90):
+        rank = index // 9
+        attacks[RED].append(_step_attacks(index, [(0, 1), (-1, 0), (1, 0)] if rank >= 5 else [(0, 1)]))
+        attacks[BLACK].append(_step_attacks(index, [(0, -1), (-1, 0), (1, 0)] if rank <= 4 else [(0, -1)]))
+    reversed_attacks: List[List[Bitboard90]] = [[BB_EMPTY] * 90, [BB_EMPTY] * 90]
+    for color in [BLACK, RED]:
+        for source in range(90):
+            for target in _scan(attacks[color][source]):
+                reversed_attacks[color][target] |= BB_SQUARES[source]
+    return attacks, reversed_attacks
+
+
+def _scan(bb: Bitboard90) -> Iterator[Square90]:
+    while bb:
+        index = bb.bit_length() - 1
+        yield index
+        bb ^= 1 << index
+
+
+def _line(index: Square90, delta: Tuple[int, int]) -> Iterator[Square90]:
+    file, rank = _coords(index)
+    target = _index(file + delta[0], rank + delta[1])
+    while target is not None:
+        yield target
+        file, rank = _coords(target)
+        target = _index(file + delta[0], rank + delta[1])
+
+
+def _mask_from_points(points: List[Tuple[int, int]]) -> Bitboard90:
+    mask = BB_EMPTY
+    for file, rank in points:
+        mask |= BB_SQUARES[_index(file, rank)] | BB_SQUARES[_index(file, 9 - rank)]
+    return mask
+
+
+BB_SQUARES_BISHOP = _mask_from_points([(2, 0), (6, 0), (0, 2), (4, 2), (8, 2), (2, 4), (6, 4)])
+BB_SQUARES_ADVISOR = _mask_from_points([(3, 0), (5, 0), (4, 1), (3, 2), (5, 2)])
+BB_IN_PALACE = _mask_from_points([(file, rank) for file in range(3, 6) for rank in range(3)])
+
+BB_RANK_ATTACKS = [_line_table(index, (1, 0), False) for index in range(90)]
+BB_FILE_ATTACKS = [_line_table(index, (0, 1), False) for index in range(90)]
+BB_CANNON_RANK_ATTACKS = [_line_table(index, (1, 0), True) for index in range(90)]
+BB_CANNON_FILE_ATTACKS = [_line_table(index, (0, 1), True) for index in range(90)]
+BB_KNIGHT_ATTACKS = [_knight_table(index) for index in range(90)]
+BB_KNIGHT_REVERSED_ATTACKS = [_knight_reversed_table(index) for index in range(90)]
+BB_BISHOP_ATTACKS = [_bishop_table(index) for index in range(90)]
+BB_ADVISOR_ATTACKS = _step_table(_DIAGONAL_DELTAS, BB_SQUARES_ADVISOR)
+BB_KING_ATTACKS = _step_table(_LEG_DELTAS, BB_IN_PALACE)
+BB_PAWN_ATTACKS, BB_PAWN_REVERSED_ATTACKS = _pawn_tables()
+
+# 将所在直线的四个方向和马腿，用来筛出需要检查是否送将的走法
+BB_KING_RAYS = [
+    [
+        sum(BB_SQUARES[target] for target in _line(index, delta))
+        for delta in _LEG_DELTAS
+    ]
+    for index in range(90)
+]
+BB_KNIGHT_LEGS = [
+    sum(
+        BB_SQUARES[target]
+        for target in (_index(index % 9 + df, index // 9 + dr) for df, dr in _DIAGONAL_DELTAS)
+        if target is not None
+    )
+    for index in range(90)
+]
+
+
+class Board:
+    turn: Color
+
+    fullmove_number: int
+
+    halfmove_clock: int
+
+    move_stack: List[Move]
+
+    def __init__(self, fen: Optional[str] = chess.STARTING_FEN) -> None:
+        self.move_stack = []
+        # (from, to, 被吃的棋子, 走子前的半回合计数)
+        self._stack: List[Tuple[Square90, Square90, Optional[PieceType], int]] = []
+        self.clear()
+        if fen is not None:
+            self.set_fen(fen)
+
+    def clear(self) -> None:
+        # 按 PieceType 下标的位棋盘，下标 0 不用
+        self._bitboards = [BB_EMPTY] * 8
+        self.occupied_co = [BB_EMPTY, BB_EMPTY]
+        self.occupied = BB_EMPTY
+        self._piece_types: List[Optional[PieceType]] = [None] * 90
+        self.turn = RED
+        self.fullmove_number = 1
+        self.halfmove_clock = 0
+        self.move_stack.clear()
+        self._stack.clear()
+
+    def reset(self) -> None:
+        self.set_fen(chess.STARTING_FEN)
+
+    def set_fen(self, fen: str) -> None:
+        # 解析和校验交给 chess.Board
+        board = chess.Board(fen)
+        self.clear()
+        for color in chess.COLORS:
+            for square in board.piece_squares(color):
+                self._set_piece_at(SQUARE_INDEX[square], board.piece_type_at(square), color)
+        self.turn = board.turn
+        self.fullmove_number = board.fullmove_number
+        self.halfmove_clock = board.halfmove_clock
+
+    def _set_piece_at(self, index: Square90, piece_type: PieceType, color: Color) -> None:
+        mask = BB_SQUARES[index]
+        self._bitboards[piece_type] |= mask
+        self.occupied_co[color] |= mask
+        self.occupied |= mask
+        self._piece_types[index] = piece_type
+
+    def piece_at(self, square: chess.Square) -> Optional[Piece]:
+        index = SQUARE_INDEX[square]
+        piece_type = self._piece_types[index] if index >= 0 else None
+        if not piece_type:
+            return None
+        return Piece(piece_type, bool(self.occupied_co[RED] & BB_SQUARES[index]))
+
+    def piece_type_at(self, square: chess.Square) -> Optional[PieceType]:
+        index = SQUARE_INDEX[square]
+        return self._piece_types[index] if index >= 0 else None
+
+    def king(self, color: Color) -> Optional[chess.Square]:
+        king_mask = self._bitboards[KING] & self.occupied_co[color]
+        return SQUARES_90[king_mask.bit_length() - 1] if king_mask else None
+
+    def board_fen(self) -> str:
+        builder = []
+        for rank in range(9, -1, -1):
+            empty = 0
+            for file in range(9):
+                piece = self.piece_at(SQUARES_90[rank * 9 + file])
+                if not piece:
+                    empty += 1
+                    continue
+                if empty:
+                    builder.append(str(empty))
+                    empty = 0
+                builder.append(piece.symbol())
+            if empty:
+                builder.append(str(empty))
+            if rank:
+                builder.append("/")
+        return "".join(builder)
+
+    def fen(self) -> str:
+        return " ".join(
+            [
+                self.board_fen(),
+                "w" if self.turn == RED else "b",
+                "-",
+                "-",
+                str(self.halfmove_clock),
+                str(self.fullmove_number),
+            ]
+        )
+
+    def copy(self) -> Board:
+        board = type(self)(None)
+        board._bitboards = self._bitboards.copy()
+        board.occupied_co = self.occupied_co.copy()
+        board.occupied = self.occupied
+        board._piece_types = self._piece_types.copy()
+        board.turn = self.turn
+        board.fullmove_number = self.fullmove_number
+        board.halfmove_clock = self.halfmove_clock
+        board.move_stack = self.move_stack.copy()
+        board._stack = self._stack.copy()
+        return board
+
+    def _attacks(self, index: Square90, piece_type: PieceType, color: Color) -> Bitboard90:
+        occupied = self.occupied
+        if piece_type == PAWN:
+            return BB_PAWN_ATTACKS[color][index]
+        elif piece_type == KNIGHT:
+            o = occupied << 10 >> index
+            return BB_KNIGHT_ATTACKS[index][(o >> 19 & 1) | (o >> 10 & 2) | (o << 1 & 4) | (o >> 6 & 8)]
+        elif piece_type == BISHOP:
+            o = occupied << 10 >> index
+            return BB_BISHOP_ATTACKS[index][(o >> 18 & 1) | (o >> 19 & 2) | (o & 4) | (o << 3 & 8)]
+        elif piece_type == ADVISOR:
+            return BB_ADVISOR_ATTACKS[index]
+
+        file_index = ((occupied >> (index % 9)) & _FILE_BITS) * _FILE_MAGIC >> _FILE_SHIFT & 0x3FF
+        if piece_type == KING:
+            # 老将对脸杀
+            return BB_KING_ATTACKS[index] | (BB_FILE_ATTACKS[index][file_index] & self._bitboards[KING])
+
+        rank_index = (occupied >> _RANK_SHIFTS[index]) & 0x1FF
+        rook = BB_FILE_ATTACKS[index][file_index] | BB_RANK_ATTACKS[index][rank_index]
+        if piece_type == ROOK:
+            return rook
+        return (
+            BB_CANNON_FILE_ATTACKS[index][file_index]
+            | BB_CANNON_RANK_ATTACKS[index][rank_index]
+            | (rook & ~occupied)
+        )
+
+    def attacks_mask(self, square: chess.Square) -> chess.Bitboard:
+        index = SQUARE_INDEX[square]
+        piece_type = self._piece_types[index] if index >= 0 else None
+        if not piece_type:
+            return chess.BB_EMPTY
+        color = bool(self.occupied_co[RED] & BB_SQUARES[index])
+        return _to_bitboard(self._attacks(index, piece_type, color))
+
+    def _attackers_mask(self, color: Color, index: Square90, occupied: Bitboard90) -> Bitboard90:
+        bitboards = self._bitboards
+        file_index = ((occupied >> (index % 9)) & _FILE_BITS) * _FILE_MAGIC >> _FILE_SHIFT & 0x3FF
+        rank_index = (occupied >> _RANK_SHIFTS[index]) & 0x1FF
+        o = occupied << 10 >> index
+        diagonal_index = (o >> 18 & 1) | (o >> 19 & 2) | (o & 4) | (o << 3 & 8)
+        attackers = (
+            (
+                (BB_CANNON_FILE_ATTACKS[index][file_index] | BB_CANNON_RANK_ATTACKS[index][rank_index])
+                & bitboards[CANNON]
+            )
+            | (
+                (BB_FILE_ATTACKS[index][file_index] | BB_RANK_ATTACKS[index][rank_index])
+                & (bitboards[ROOK] | bitboards[KING])
+            )
+            | (BB_KNIGHT_REVERSED_ATTACKS[index][diagonal_index] & bitboards[KNIGHT])
+            | (BB_BISHOP_ATTACKS[index][diagonal_index] & bitboards[BISHOP])
+            | (BB_PAWN_REVERSED_ATTACKS[color][index] & bitboards[PAWN])
+            | (BB_ADVISOR_ATTACKS[index] & bitboards[ADVISOR])
+            | (BB_KING_ATTACKS[index] & bitboards[KING])
+        )
+        return attackers & self.occupied_co[color]
+
+    def _checkers(self) -> Bitboard90:
+        king_mask = self._bitboards[KING] & self.occupied_co[self.turn]
+        if not king_mask:
+            return BB_EMPTY
+        return self._attackers_mask(not self.turn, king_mask.bit_length() - 1, self.occupied)
+
+    def checkers_mask(self) -> chess.Bitboard:
+        return _to_bitboard(self._checkers())
+
+    def is_check(self) -> bool:
+        return bool(self._checkers())
+
+    def is_checkmate(self) -> bool:
+        return not any(self._generate_legal_packed())
+
+    def _generate_pseudo_legal_packed(self) -> Iterator[int]:
+        # 走法用 from << 8 | to 表示，格子为 90 格下标
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        piece_types = self._piece_types
+        for from_index in _scan(our_pieces):
+            packed_from = from_index << 8
+            for to_index in _scan(self._attacks(from_index, piece_types[from_index], turn) & ~our_pieces):
+                yield packed_from | to_index
+
+    def _generate_legal_packed(self) -> Iterator[int]:
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        king_mask = self._bitboards[KING] & our_pieces
+        if not king_mask:
+            yield from self._generate_pseudo_legal_packed()
+            return
+
+        king = king_mask.bit_length() - 1
+        # 没被将军时，只有动将、离开将所在直线或马腿、走到将所在直线上（炮架）的走法才可能送将，
+        # 直线只看有对方车、炮、将的方向，马腿（象眼）只在对方有马或象够得着时才看
+        if self._attackers_mask(not turn, king, self.occupied):
+            rays = from_risky = BB_ALL
+        else:
+            them = self.occupied_co[not turn]
+            bitboards = self._bitboards
+            sliders = (bitboards[ROOK] | bitboards[CANNON] | bitboards[KING]) & them
+            rays = BB_EMPTY
+            for ray in BB_KING_RAYS[king]:
+                if ray & sliders:
+                    rays |= ray
+            from_risky = rays | king_mask
+            if (
+                BB_KNIGHT_REVERSED_ATTACKS[king][0] & bitboards[KNIGHT] | BB_BISHOP_ATTACKS[king][0] & bitboards[BISHOP]
+            ) & them:
+                from_risky |= BB_KNIGHT_LEGS[king]
+
+        piece_types = self._piece_types
+        pieces = our_pieces
+        while pieces:
+            from_index = pieces.bit_length() - 1
+            pieces ^= BB_SQUARES[from_index]
+            packed_from = from_index << 8
+            targets = self._attacks(from_index, piece_types[from_index], turn) & ~our_pieces
+            risky = targets if BB_SQUARES[from_index] & from_risky else targets & rays
+            targets ^= risky
+            while targets:
+                to_index = targets.bit_length() - 1
+                targets ^= BB_SQUARES[to_index]
+                yield packed_from | to_index
+            while risky:
+                to_index = risky.bit_length() - 1
+                risky ^= BB_SQUARES[to_index]
+                if self._is_safe(king, from_index, to_index):
+                    yield packed_from | to_index
+
+    def _is_safe(self, king: Square90, from_index: Square90, to_index: Square90) -> bool:
+        # 按走子后的占位检查将是否被攻击，被吃掉的棋子不再参与攻击
+        bb_to = BB_SQUARES[to_index]
+        target = to_index if from_index == king else king
+        occupied = self.occupied & ~BB_SQUARES[from_index] | bb_to
+        return not self._attackers_mask(not self.turn, target, occupied) & ~bb_to
+
+    def generate_legal_moves(self) -> Iterator[Move]:
+        for move in self._generate_legal_packed():
+            yield Move(SQUARES_90[move >> 8], SQUARES_90[move & 0xFF])
+
+    def generate_legal_moves_packed(self) -> array:
+        return array("H", self._generate_legal_packed())
+
+    @property
+    def legal_moves(self) -> LegalMoveGenerator:
+        return LegalMoveGenerator(self)
+
+    def is_legal(self, move: Move) -> bool:
+        from_index = SQUARE_INDEX[move.from_square]
+        to_index = SQUARE_INDEX[move.to_square]
+        if from_index < 0 or to_index < 0 or not self.occupied_co[self.turn] & BB_SQUARES[from_index]:
+            return False
+        attacks = self._attacks(from_index, self._piece_types[from_index], self.turn)
+        if not attacks & ~self.occupied_co[self.turn] & BB_SQUARES[to_index]:
+            return False
+        king_mask = self._bitboards[KING] & self.occupied_co[self.turn]
+        return not king_mask or self._is_safe(king_mask.bit_length() - 1, from_index, to_index)
+
+    def push(self, move: Move) -> None:
+        self.move_stack.append(move)
+        if move:
+            self._push(SQUARE_INDEX[move.from_square], SQUARE_INDEX[move.to_square])
+        else:
+            self._push_null()
+
+    def push_packed(self, move: int) -> None:
+        # 走法为 90 格下标的 from << 8 | to，由 pop() 撤销
+        self.move_stack.append(Move(SQUARES_90[move >> 8], SQUARES_90[move & 0xFF]))
+        self._push(move >> 8, move & 0xFF)
+
+    def _push_null(self) -> None:
+        # 空着只换走子方，from 记为 -1，pop() 据此只撤销计数
+        self._stack.append((-1, -1, None, self.halfmove_clock))
+        self.halfmove_clock += 1
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+
+    def _push(self, from_index: Square90, to_index: Square90) -> None:
+        piece_types = self._piece_types
+        bitboards = self._bitboards
+        piece_type = piece_types[from_index]
+        captured = piece_types[to_index]
+        bb_from = BB_SQUARES[from_index]
+        bb_to = BB_SQUARES[to_index]
+        bb_move = bb_from | bb_to
+
+        self._stack.append((from_index, to_index, captured, self.halfmove_clock))
+        self.halfmove_clock = 0 if captured else self.halfmove_clock + 1
+        if captured:
+            bitboards[captured] ^= bb_to
+            self.occupied_co[not self.turn] ^= bb_to
+            self.occupied ^= bb_from
+        else:
+            self.occupied ^= bb_move
+        bitboards[piece_type] ^= bb_move
+        self.occupied_co[self.turn] ^= bb_move
+        piece_types[to_index] = piece_type
+        piece_types[from_index] = None
+
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+
+    def pop(self) -> Move:
+        # 和 chess.Board 一样，没有走法可撤销时返回 None
+        if not self.move_stack:
+            return None
+        move = self.move_stack.pop()
+        from_index, to_index, captured, self.halfmove_clock = self._stack.pop()
+        self.turn = not self.turn
+        if self.turn == BLACK:
+            self.fullmove_number -= 1
+        if from_index < 0:
+            return move
+
+        piece_types = self._piece_types
+        bitboards = self._bitboards
+        piece_type = piece_types[to_index]
+        bb_from = BB_SQUARES[from_index]
+        bb_to = BB_SQUARES[to_index]
+        bb_move = bb_from | bb_to
+
+        bitboards[piece_type] ^= bb_move
+        self.occupied_co[self.turn] ^= bb_move
+        if captured:
+            bitboards[captured] ^= bb_to
+            self.occupied_co[not self.turn] ^= bb_to
+            self.occupied ^= bb_from
+        else:
+            self.occupied ^= bb_move
+        piece_types[from_index] = piece_type
+        piece_types[to_index] = captured
+        return move
+
+    def peek(self) -> Optional[Move]:
+        return self.move_stack[-1] if self.move_stack else None
+
+
+class LegalMoveGenerator:
+    def __init__(self, board: Board) -> None:
+        self.board = board
+
+    def __bool__(self) -> bool:
+        return any(self.board._generate_legal_packed())
+
+    def count(self) -> int:
+        return len(self.board.generate_legal_moves_packed())
+
+    def __iter__(self) -> Iterator[Move]:
+        return self.board.generate_legal_moves()
+
+    def __contains__(self, move: Move) -> bool:
+        return self.board.is_legal(move)
+
+    def __repr__(self) -> str:
+        iccs = ", ".join(move.iccs() for move in self)
+        return f"<LegalMoveGenerator at {id(self):#x} ({iccs})>"
+
+
+def _to_bitboard(bb: Bitboard90) -> chess.Bitboard:
+    result = chess.BB_EMPTY
+    for index in _scan(bb):
+        result |= chess.BB_SQUARES[SQUARES_90[index]]
+    return result
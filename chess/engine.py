@@ -0,0 +1,686 @@
+from __future__ import annotations
+
+import dataclasses
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import chess
+import chess.tablebase
+from chess import BLACK, CANNON, KING, KNIGHT, PAWN, PIECE_TYPES, PIECE_VALUES, RED, ROOK, Board, Move
+
+MATE_SCORE = 30000
+# 超过这个分数的都是杀棋，按距根节点的步数修正
+MATE_BOUND = MATE_SCORE - 1000
+MAX_PLY = 64
+
+# 置换表条目的分数类型
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# 置换表条目数据字的布局：走法 16 位，分数 16 位（加偏移），深度 8 位，类型 2 位，代数 6 位，最高的占用位
+_TT_SCORE_SHIFT = 16
+_TT_DEPTH_SHIFT = 32
+_TT_BOUND_SHIFT = 40
+_TT_AGE_SHIFT = 42
+_TT_OCCUPIED = 1 << 48
+_TT_SCORE_OFFSET = 1 << 15
+_TT_AGES = 64
+# 每个桶两个槽（深度优先、总是替换），每个槽两个 64 位字（校验键、数据）
+_TT_BUCKET_WORDS = 4
+_TT_BUCKET_BYTES = _TT_BUCKET_WORDS * 8
+# 估算填充率时抽样的桶数
+_TT_FILL_SAMPLE = 1000
+
+# 每走这么多个节点检查一次时间和节点数限制
+_CHECK_INTERVAL = 1024
+
+
+def _positional_bonus(piece_type: chess.PieceType, file: int, rank: int) -> int:
+    # 以红方视角，rank 0 为己方底线
+    centre = 4 - abs(file - 4)
+    if piece_type == PAWN:
+        if rank < 5:
+            return 10 * max(rank - 3, 0)
+        # 过河兵，靠近九宫更有威胁，沉底兵作用变小
+        return 70 + 10 * centre + (20 if rank in (6, 7) else 0) - (50 if rank == 9 else 0)
+    elif piece_type == KNIGHT:
+        return 6 * centre + (10 if 3 <= rank <= 7 else 0)
+    elif piece_type == ROOK:
+        return 10 if rank >= 5 else 0
+    elif piece_type == CANNON:
+        return 20 if file == 4 else 0
+    return 0
+
+
+def _piece_square_table() -> List[List[List[int]]]:
+    # 按 [color][piece_type][square] 查子力加位置分，将的子力不计
+    table = [[[0] * 256 for _ in range(8)] for _ in chess.COLORS]
+    for piece_type in PIECE_TYPES:
+        material = 0 if piece_type == KING else PIECE_VALUES[piece_type]
+        for square in chess.SQUARES_IN_BOARD:
+            file = chess.square_file(square) - 3
+            rank = chess.square_rank(square) - 3
+            table[RED][piece_type][square] = material + _positional_bonus(piece_type, file, rank)
+            table[BLACK][piece_type][square] = material + _positional_bonus(piece_type, file, 9 - rank)
+    return table
+
+
+PIECE_SQUARE_VALUES = _piece_square_table()
+
+
+def evaluate(board: Board) -> int:
+    # 行棋方视角的静态评估
+    piece_types = board._piece_types
+    score = 0
+    for square in board.piece_squares(RED):
+        score += PIECE_SQUARE_VALUES[RED][piece_types[square]][square]
+    for square in board.piece_squares(BLACK):
+        score -= PIECE_SQUARE_VALUES[BLACK][piece_types[square]][square]
+    return score if board.turn == RED else -score
+
+
+class TranspositionTable:
+    # 固定大小的置换表，预先分配在 array("Q") 里，不会随搜索增长
+    # 槽里存的是 key ^ data 和 data，读到的两个字对不上就当作没命中，多个进程共享同一块内存时不需要加锁
+    def __init__(self, size_mb: float = 16, *, buffer=None) -> None:
+        if buffer is None:
+            buckets = max(int(size_mb * 1024 * 1024) // _TT_BUCKET_BYTES, 1)
+            # 桶数取 2 的幂，用掩码代替取模
+            buckets = 1 << (buckets.bit_length() - 1)
+            buffer = array("Q", bytes(buckets * _TT_BUCKET_BYTES))
+        else:
+            buckets = len(buffer) // _TT_BUCKET_WORDS
+            if buckets <= 0 or buckets & (buckets - 1):
+                raise ValueError(f"transposition table buffer must hold a power of two buckets: {len(buffer)} words")
+        self.table = buffer
+        self.buckets = buckets
+        self._mask = buckets - 1
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    @staticmethod
+    def buffer_size(size_mb: float) -> int:
+        # 与 TranspositionTable(size_mb) 相同大小的缓冲区字节数
+        buckets = max(int(size_mb * 1024 * 1024) // _TT_BUCKET_BYTES, 1)
+        return (1 << (buckets.bit_length() - 1)) * _TT_BUCKET_BYTES
+
+    @property
+    def size_mb(self) -> float:
+        return self.buckets * _TT_BUCKET_BYTES / (1024 * 1024)
+
+    def new_search(self) -> None:
+        # 新一次搜索开始，旧条目可以优先被替换
+        self.age = (self.age + 1) % _TT_AGES
+
+    def clear(self) -> None:
+        self.table[:] = array("Q", bytes(len(self.table) * 8))
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        # 返回 (depth, bound, score, move)
+        self.probes += 1
+        table = self.table
+        index = (key & self._mask) * _TT_BUCKET_WORDS
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if data & _TT_OCCUPIED and table[slot] ^ data == key:
+                self.hits += 1
+                return (
+                    data >> _TT_DEPTH_SHIFT & 0xFF,
+                    data >> _TT_BOUND_SHIFT & 0x3,
+                    (data >> _TT_SCORE_SHIFT & 0xFFFF) - _TT_SCORE_OFFSET,
+                    data & 0xFFFF,
+                )
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: int) -> None:
+        table = self.table
+        index = (key & self._mask) * _TT_BUCKET_WORDS
+        depth = min(max(depth, 0), 0xFF)
+        data = (
+            _TT_OCCUPIED
+            | self.age << _TT_AGE_SHIFT
+            | bound << _TT_BOUND_SHIFT
+            | depth << _TT_DEPTH_SHIFT
+            | (score + _TT_SCORE_OFFSET) << _TT_SCORE_SHIFT
+            | move
+        )
+        old = table[index + 1]
+        # 深度优先的槽：空的、同一个局面、上一次搜索留下的或者深度不超过新条目的，直接替换
+        if (
+            not old & _TT_OCCUPIED
+            or table[index] ^ old == key
+            or old >> _TT_AGE_SHIFT & (_TT_AGES - 1) != self.age
+            or old >> _TT_DEPTH_SHIFT & 0xFF <= depth
+        ):
+            if not move and table[index] ^ old == key:
+                # 没有走法时保留原来的最佳走法
+                data |= old & 0xFFFF
+            table[index] = key ^ data
+            table[index + 1] = data
+        else:
+            # 否则放进总是替换的槽
+            table[index + 2] = key ^ data
+            table[index + 3] = data
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    @property
+    def fill_rate(self) -> float:
+        # 抽样开头的一部分桶，统计本次搜索写入的槽所占的比例
+        table = self.table
+        sample = min(self.buckets, _TT_FILL_SAMPLE)
+        used = 0
+        for i in range(1, sample * _TT_BUCKET_WORDS, 2):
+            data = table[i]
+            if data & _TT_OCCUPIED and data >> _TT_AGE_SHIFT & (_TT_AGES - 1) == self.age:
+                used += 1
+        return used / (sample * 2)
+
+    def __repr__(self) -> str:
+        return (
+            f"<TranspositionTable size_mb={self.size_mb:g} fill_rate={self.fill_rate:.3f} "
+            f"hit_rate={self.hit_rate:.3f}>"
+        )
+
+
+@dataclasses.dataclass
+class Limit:
+    depth: Optional[int] = None
+
+    nodes: Optional[int] = None
+
+    # 秒
+    time: Optional[float] = None
+
+
+@dataclasses.dataclass
+class SearchInfo:
+    depth: int
+
+    score: int
+
+    nodes: int
+
+    time: float
+
+    pv: List[Move]
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+    def __str__(self) -> str:
+        pv = " ".join(move.iccs() for move in self.pv)
+        return (
+            f"depth {self.depth} score {self.score} nodes {self.nodes} "
+            f"nps {self.nps} time {self.time:.3f} pv {pv}"
+        )
+
+
+@dataclasses.dataclass
+class SearchResult:
+    move: Optional[Move]
+
+    score: int
+
+    depth: int
+
+    nodes: int
+
+    time: float
+
+    pv: List[Move]
+
+    # 并行搜索时每个进程的节点数，第一个是主进程
+    worker_nodes: List[int] = dataclasses.field(default_factory=list)
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+
+class _SearchAborted(Exception):
+    pass
+
+
+class Searcher:
+    # 迭代加深的 PVS 搜索，带空着裁剪和静态搜索；置换表、杀手走法和历史表在多次搜索之间保留
+    def __init__(
+        self,
+        tt: Optional[TranspositionTable] = None,
+        *,
+        hash_mb: float = 16,
+        stop_event=None,
+        tablebase: Optional[chess.tablebase.Tablebase] = None,
+    ) -> None:
+        self.tt = tt if tt is not None else TranspositionTable(hash_mb)
+        # 默认使用 python -m chess build-tablebase 生成的残局库，没有就不用
+        self.tablebase = tablebase if tablebase is not None else chess.tablebase.open_default()
+        # 其他线程或进程 set() 之后，搜索在下一次检查限制时停下
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.history: Dict[int, int] = {}
+        self.killers: List[List[int]] = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.nodes = 0
+        self._limit = Limit()
+        self._start = 0.0
+
+    def clear(self) -> None:
+        self.tt.clear()
+        self.history.clear()
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def search(
+        self,
+        board: Board,
+        limit: Limit,
+        info: Optional[Callable[[SearchInfo], None]] = None,
+    ) -> SearchResult:
+        # 搜索开始前调用的 stop() 也有效，搜索结束后才复位
+        try:
+            return self._iterate(board, limit, info)
+        finally:
+            self.stop_event.clear()
+
+    def _iterate(
+        self,
+        board: Board,
+        limit: Limit,
+        info: Optional[Callable[[SearchInfo], None]] = None,
+        *,
+        start_depth: int = 1,
+        seed: Optional[int] = None,
+    ) -> SearchResult:
+        board = board.copy()
+        # 搜索的局面太多，用局面缓存只会把调用方缓存的局面挤掉；也避免和其他线程共用同一个缓存
+        board.position_cache = None
+        self.nodes = 0
+        self._limit = limit
+        self._start = time.perf_counter()
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.tt.new_search()
+
+        if self.tablebase is not None:
+            result = self._probe_root(board, info)
+            if result is not None:
+                return result
+
+        root_moves = list(board.generate_legal_moves_packed())
+        if seed is not None:
+            # 并行搜索的辅助进程打乱根节点走法顺序，和主进程搜不同的子树
+            random.Random(seed).shuffle(root_moves)
+        best_move = root_moves[0] if root_moves else 0
+        best_score = -MATE_SCORE if not root_moves else 0
+        completed = 0
+        pv: List[Move] = []
+
+        max_depth = min(limit.depth or MAX_PLY, MAX_PLY)
+        for depth in range(min(start_depth, max_depth), max_depth + 1):
+            if not root_moves:
+                break
+            try:
+                score, move = self._search_root(board, root_moves, depth, best_move)
+            except _SearchAborted:
+                break
+            best_move, best_score, completed = move, score, depth
+            # 上一轮的最佳走法下一轮先搜
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            pv = self._principal_variation(board, depth)
+            elapsed = time.perf_counter() - self._start
+            if info is not None:
+                info(SearchInfo(depth, score, self.nodes, elapsed, pv))
+            if abs(score) >= MATE_BOUND:
+                break
+            # 下一轮通常比这一轮耗时多几倍，剩余时间不够就不开始
+            if limit.time is not None and elapsed > limit.time / 2:
+                break
+
+        elapsed = time.perf_counter() - self._start
+        move = Move.from_packed(best_move) if best_move else None
+        return SearchResult(move, best_score, completed, self.nodes, elapsed, pv, [self.nodes])
+
+    def _probe_root(self, board: Board, info: Optional[Callable[[SearchInfo], None]]) -> Optional[SearchResult]:
+        # 残局库里的局面不用搜索，沿着库里的最佳走法给出主要变例
+        probed = self.tablebase.probe(board)
+        if probed is None:
+            return None
+        move = self.tablebase.best_move(board)
+        if move is None:
+            return None
+        score = _tablebase_score(probed, 0)
+        pv = []
+        while move is not None and len(pv) < min(max(probed.distance, 1), MAX_PLY):
+            pv.append(move)
+            board.push(move)
+            move = self.tablebase.best_move(board)
+        elapsed = time.perf_counter() - self._start
+        if info is not None:
+            info(SearchInfo(0, score, 0, elapsed, pv))
+        return SearchResult(pv[0], score, 0, 0, elapsed, pv, [0])
+
+    def _check_limits(self) -> None:
+        if self.stop_event.is_set():
+            raise _SearchAborted()
+        limit = self._limit
+        if limit.nodes is not None and self.nodes >= limit.nodes:
+            raise _SearchAborted()
+        if limit.time is not None and time.perf_counter() - self._start >= limit.time:
+            raise _SearchAborted()
+
+    def _search_root(self, board: Board, moves: List[int], depth: int, first: int) -> Tuple[int, int]:
+        alpha, beta = -MATE_SCORE, MATE_SCORE
+        best_move = first
+        for i, move in enumerate(moves):
+            board.push_packed(move)
+            try:
+                if i == 0:
+                    score = -self._pvs(board, depth - 1, -beta, -alpha, 1, True)
+                else:
+                    score = -self._pvs(board, depth - 1, -alpha - 1, -alpha, 1, True)
+                    if alpha < score < beta:
+                        score = -self._pvs(board, depth - 1, -beta, -alpha, 1, True)
+            finally:
+                board.pop()
+            if score > alpha:
+                alpha, best_move = score, move
+        self.tt.store(board.zobrist_hash(), depth, EXACT, _score_to_tt(alpha, 0), best_move)
+        return alpha, best_move
+
+    def _pvs(self, board: Board, depth: int, alpha: int, beta: int, ply: int, null_allowed: bool) -> int:
+        self.nodes += 1
+        if self.nodes % _CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        # 重复局面按和棋处理
+        if board.is_repetition(2):
+            return 0
+
+        tablebase = self.tablebase
+        if tablebase is not None and chess.popcount(board.occupied) <= tablebase.max_pieces:
+            probed = tablebase.probe(board)
+            if probed is not None:
+                return _tablebase_score(probed, ply)
+
+        in_check = board.is_check()
+        if in_check and ply < MAX_PLY:
+            depth += 1
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = board.zobrist_hash()
+        entry = self.tt.probe(key)
+        tt_move = 0
+        if entry is not None:
+            entry_depth, bound, score, tt_move = entry
+            if entry_depth >= depth:
+                score = _score_from_tt(score, ply)
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    return score
+
+        # 空着裁剪：让对方连走一步仍然不低于 beta，就不用细搜了；只剩兵和士象时容易出现等着，不做
+        if (
+            null_allowed
+            and not in_check
+            and depth >= 3
+            and beta - alpha == 1
+            and abs(beta) < MATE_BOUND
+            and board.occupied_co[board.turn] & (board.rooks | board.knights | board.cannons)
+        ):
+            board.push(Move.null())
+            try:
+                score = -self._pvs(board, depth - 3, -beta, -beta + 1, ply + 1, False)
+            finally:
+                board.pop()
+            if score >= beta:
+                return beta
+
+        moves = board.generate_legal_moves_packed()
+        if not moves:
+            # 被将死或困毙都算输
+            return -MATE_SCORE + ply
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE
+        best_move = 0
+        for i, move in enumerate(self._ordered(board, moves, tt_move, ply)):
+            capture = board._piece_types[move & 0xFF]
+            board.push_packed(move)
+            try:
+                if i == 0:
+                    score = -self._pvs(board, depth - 1, -beta, -alpha, ply + 1, True)
+                else:
+                    score = -self._pvs(board, depth - 1, -alpha - 1, -alpha, ply + 1, True)
+                    if alpha < score < beta:
+                        score = -self._pvs(board, depth - 1, -beta, -alpha, ply + 1, True)
+            finally:
+                board.pop()
+
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not capture:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        self.tt.store(key, depth, bound, _score_to_tt(best_score, ply), best_move)
+        return best_score
+
+    def _quiescence(self, board: Board, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % _CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        if board.is_check():
+            # 被将军时不能停着，要搜全部应将
+            moves = board.generate_legal_moves_packed()
+            if not moves:
+                return -MATE_SCORE + ply
+            if ply >= MAX_PLY:
+                return evaluate(board)
+            best_score = -MATE_SCORE
+            for move in self._ordered(board, moves, 0, ply):
+                board.push_packed(move)
+                try:
+                    score = -self._quiescence(board, -beta, -alpha, ply + 1)
+                finally:
+                    board.pop()
+                if score > best_score:
+                    best_score = score
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            break
+            return best_score
+
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        captures = board._generate_legal_packed(to_mask=board.occupied_co[not board.turn])
+        best_score = stand_pat
+        for move in self._ordered(board, captures, 0, ply):
+            # 静态交换亏子的吃子不搜
+            if not board.see_ge(Move(move >> 8, move & 0xFF), 0):
+                continue
+            board.push_packed(move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def _ordered(self, board: Board, moves, tt_move: int, ply: int) -> List[int]:
+        # 置换表走法、吃子（MVV-LVA）、杀手走法、历史表
+        piece_types = board._piece_types
+        killers = self.killers[min(ply, MAX_PLY)]
+        history = self.history
+
+        def key(move: int) -> int:
+            if move == tt_move:
+                return 1 << 30
+            captured = piece_types[move & 0xFF]
+            if captured:
+                return (1 << 24) + PIECE_VALUES[captured] * 16 - PIECE_VALUES[piece_types[move >> 8]] // 64
+            if move == killers[0]:
+                return 1 << 23
+            if move == killers[1]:
+                return (1 << 23) - 1
+            return history.get(move, 0)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _principal_variation(self, board: Board, depth: int) -> List[Move]:
+        pv = []
+        seen = set()
+        for _ in range(depth):
+            key = board.zobrist_hash()
+            entry = self.tt.probe(key)
+            if entry is None or key in seen or not entry[3]:
+                break
+            move = Move.from_packed(entry[3])
+            if not board.is_legal(move):
+                break
+            seen.add(key)
+            pv.append(move)
+            board.push(move)
+        for _ in pv:
+            board.pop()
+        return pv
+
+
+def _tablebase_score(probed: chess.tablebase.ProbeResult, ply: int) -> int:
+    if probed.wdl > 0:
+        return MATE_SCORE - ply - probed.distance
+    if probed.wdl < 0:
+        return -MATE_SCORE + ply + probed.distance
+    return 0
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # 杀棋分数在置换表里按距当前节点的步数保存
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def search(
+    board: Board,
+    limit: Limit,
+    info: Optional[Callable[[SearchInfo], None]] = None,
+    *,
+    threads: int = 1,
+    hash_mb: float = 16,
+    stop_event=None,
+) -> SearchResult:
+    # stop_event.set() 让搜索提前结束，并行搜索时也会停下所有辅助进程
+    if threads <= 1:
+        return Searcher(hash_mb=hash_mb, stop_event=stop_event).search(board, limit, info)
+    return _parallel_search(board, limit, info, threads, hash_mb, stop_event)
+
+
+def _parallel_search(
+    board: Board,
+    limit: Limit,
+    info: Optional[Callable[[SearchInfo], None]],
+    threads: int,
+    hash_mb: float,
+    stop_event=None,
+) -> SearchResult:
+    # Lazy SMP：主进程照常搜索并决定何时停止，辅助进程以不同的起始深度和根节点走法顺序搜同一个局面，
+    # 只通过共享内存里的置换表互相帮助；节点数和时间限制只作用于主进程
+    shm = shared_memory.SharedMemory(create=True, size=TranspositionTable.buffer_size(hash_mb))
+    context = multiprocessing.get_context()
+    stop_helpers = context.Event()
+    results = context.Queue()
+    helpers = [
+        context.Process(
+            target=_parallel_helper,
+            args=(shm.name, board, limit.depth, index, stop_helpers, results),
+            daemon=True,
+        )
+        for index in range(1, threads)
+    ]
+    table = shm.buf.cast("Q")
+    try:
+        for helper in helpers:
+            helper.start()
+        result = Searcher(TranspositionTable(buffer=table), stop_event=stop_event).search(board, limit, info)
+        stop_helpers.set()
+
+        worker_nodes = [result.nodes] + [0] * len(helpers)
+        for _ in helpers:
+            try:
+                index, nodes = results.get(timeout=5)
+            except queue.Empty:
+                break
+            worker_nodes[index] = nodes
+        for helper in helpers:
+            helper.join()
+    finally:
+        stop_helpers.set()
+        for helper in helpers:
+            if helper.is_alive():
+                helper.terminate()
+        table.release()
+        shm.close()
+        shm.unlink()
+
+    result.worker_nodes = worker_nodes
+    result.nodes = sum(worker_nodes)
+    return result
+
+
+def _parallel_helper(name: str, board: Board, depth: Optional[int], index: int, stop_event, results) -> None:
+    shm = shared_memory.SharedMemory(name=name)
+    table = shm.buf.cast("Q")
+    try:
+        searcher = Searcher(TranspositionTable(buffer=table), stop_event=stop_event)
+        searcher._iterate(board, Limit(depth=depth), start_depth=1 + index % 2, seed=index)
+        results.put((index, searcher.nodes))
+    finally:
+        table.release()
+        shm.close()
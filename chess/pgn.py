@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import dataclasses
+import mmap
+import os
+import pathlib
+import re
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Union
+
+import chess
+
+INDEX_VERSION = 2
+
+# magic, version, 棋谱文件大小, 修改时间（纳秒）, 对局数；后面是每局开头的字节偏移
+_INDEX_HEADER = struct.Struct("<4sIQQQ")
+_INDEX_MAGIC = b"XQPI"
+
+# 中文棋谱常在文件开头带 UTF-8 BOM，算作第一行标签的一部分，不能当成一局
+_BOM = b"\xef\xbb\xbf"
+_TAG_LINE = re.compile(rb"^(?:\xef\xbb\xbf)?[ \t]*\[[^\n]*", re.MULTILINE)
+_TAG = re.compile(r'^\s*\[\s*(\w+)\s+"(.*)"\s*\]\s*$')
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+_ICCS = re.compile(r"^([a-iA-I])([0-9])-?([a-iA-I])([0-9])$")
+_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+# 中文记谱的各种写法统一成 wxf() 的写法：棋子、位置、动作和数字
+_CHINESE_PIECES = {
+    "车": "r", "車": "r", "俥": "r",
+    "马": "n", "馬": "n", "傌": "n",
+    "相": "b", "象": "b",
+    "仕": "a", "士": "a",
+    "帅": "k", "帥": "k", "将": "k", "將": "k",
+    "兵": "p", "卒": "p",
+    "炮": "c", "砲": "c", "包": "c",
+}
+_CHINESE_POSITIONS = {"前": "+", "后": "-", "後": "-", "中": "."}
+_CHINESE_ACTIONS = {"进": "+", "進": "+", "退": "-", "平": "."}
+_CHINESE_DIGITS = {
+    **{numeral: str(i) for i, numeral in enumerate(chess.CHINESE_NUMBERS) if numeral},
+    **{digit: str(i) for i, digit in enumerate("１２３４５６７８９", 1)},
+}
+# WXF 用 H 表示马、E 表示相
+_WXF_PIECES = {"h": "n", "e": "b"}
+
+
+@dataclasses.dataclass
+class Game:
+    headers: Dict[str, str] = dataclasses.field(default_factory=dict)
+
+    moves: List[chess.Move] = dataclasses.field(default_factory=list)
+
+    fen: str = chess.STARTING_FEN
+
+    result: str = "*"
+
+    # 解析到不认识或不合法的走法时记下原因，之后的走法丢弃
+    errors: List[str] = dataclasses.field(default_factory=list)
+
+    def board(self) -> chess.Board:
+        return chess.Board(self.fen)
+
+    def end(self) -> chess.Board:
+        board = self.board()
+        for move in self.moves:
+            board.push(move)
+        return board
+
+
+def _chinese_to_wxf(text: str) -> str:
+    chars = []
+    for i, char in enumerate(text):
+        if char in _CHINESE_PIECES:
+            chars.append(_CHINESE_PIECES[char])
+        elif char in _CHINESE_POSITIONS:
+            chars.append(_CHINESE_POSITIONS[char])
+        elif char in _CHINESE_ACTIONS:
+            chars.append(_CHINESE_ACTIONS[char])
+        elif char in _CHINESE_DIGITS:
+            digit = _CHINESE_DIGITS[char]
+            # 多个兵在同一路时，"一兵"、"二兵" 这样写在最前面的数字是兵的位置
+            if i == 0 and len(text) > 1 and text[1] in _CHINESE_PIECES:
+                chars.append("abcde"[int(digit) - 1])
+            else:
+                chars.append(digit)
+        elif char.isdigit():
+            chars.append(char)
+        else:
+            raise ValueError(f"unexpected character {char!r} in chinese move: {text!r}")
+    return "".join(chars)
+
+
+def _normalize_wxf(text: str) -> str:
+    text = text.replace("=", ".")
+    # 位置写在棋子前面（+R+1、前车进一）时换到棋子后面，和 wxf() 一致
+    if len(text) > 1 and (text[0] in "+-." or text[0] in "abcde" and text[1].lower() in "rnhbeakcp"):
+        text = text[1] + text[0] + text[2:]
+    piece = text[:1].lower()
+    return _WXF_PIECES.get(piece, piece) + text[1:].lower()
+
+
+def parse_move(board: chess.Board, text: str) -> chess.Move:
+    # ICCS（h2e2、H2-E2）、WXF（C2.5、+R+1）或中文（炮二平五）记谱，返回当前局面下的合法走法
+    text = text.strip()
+    match = _ICCS.match(text)
+    if match:
+        move = chess.Move.from_iccs("".join(match.groups()).lower())
+        if not board.is_legal(move):
+            raise ValueError(f"illegal move {text!r} in {board.fen()}")
+        return move
+
+    if any(ord(char) > 0x7F for char in text):
+        wxf = _normalize_wxf(_chinese_to_wxf(text))
+    else:
+        wxf = _normalize_wxf(text)
+    legal_moves = list(board.legal_moves)
+    for move, move_wxf in zip(legal_moves, board.wxf_many(legal_moves)):
+        if move_wxf == wxf:
+            return move
+    raise ValueError(f"illegal or ambiguous move {text!r} in {board.fen()}")
+
+
+def _movetext_tokens(text: str) -> Iterator[str]:
+    # 去掉 {注释}、; 注释和 (变着)
+    depth = 0
+    i = 0
+    token = []
+    while i < len(text):
+        char = text[i]
+        if char == "{":
+            end = text.find("}", i)
+            i = len(text) if end < 0 else end + 1
+            continue
+        if char == ";" and not depth:
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end + 1
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif not depth and not char.isspace():
+            token.append(char)
+            i += 1
+            continue
+        if token:
+            yield "".join(token)
+            token = []
+        i += 1
+    if token:
+        yield "".join(token)
+
+
+def _decode(data: bytes) -> str:
+    # 中文棋谱常用 GBK 编码
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("gb18030", errors="replace")
+
+
+def parse_game(data: bytes) -> Game:
+    game = Game()
+    movetext = []
+    if data.startswith(_BOM):
+        data = data[len(_BOM):]
+    for line in _decode(data).splitlines():
+        match = _TAG.match(line)
+        if match and not movetext:
+            game.headers[match.group(1)] = match.group(2)
+        else:
+            movetext.append(line)
+    game.fen = game.headers.get("FEN", chess.STARTING_FEN)
+    result = game.headers.get("Result", "*")
+    game.result = result if result in _RESULTS else "*"
+
+    board = game.board()
+    for token in _movetext_tokens("\n".join(movetext)):
+        token = _MOVE_NUMBER.sub("", token)
+        if not token or token.startswith("$"):
+            continue
+        if token in _RESULTS:
+            game.result = token
+            break
+        if game.errors:
+            continue
+        try:
+            move = parse_move(board, token)
+        except ValueError as err:
+            game.errors.append(str(err))
+            continue
+        game.moves.append(move)
+        board.push(move)
+    return game
+
+
+def _game_starts(data, pos: int = 0) -> Iterator[int]:
+    # 一局从一组标签开始：前面有着法（或者是文件开头）的标签行是新一局的开头
+    tag_end = None
+    for match in _TAG_LINE.finditer(data, pos):
+        start = match.start()
+        if tag_end is None:
+            if data[pos:start].strip():
+                yield pos
+            yield start
+        elif data[tag_end:start].strip():
+            yield start
+        tag_end = match.end()
+    if tag_end is None and data[pos:].strip():
+        yield pos
+
+
+class PgnFile:
+    # 用 mmap 打开的多局 PGN 文件，按需逐局解析；index() 记下每局的字节偏移，可以直接跳到第 n 局
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = pathlib.Path(path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._index: Optional[array] = None
+
+    def __enter__(self) -> PgnFile:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __iter__(self) -> Iterator[Game]:
+        return self.games()
+
+    def __len__(self) -> int:
+        return len(self.index())
+
+    def games(self, start: int = 0) -> Iterator[Game]:
+        offset = self.index()[start] if start else 0
+        previous = None
+        for game_start in _game_starts(self._data, offset):
+            if previous is not None:
+                yield parse_game(self._data[previous:game_start])
+            previous = game_start
+        if previous is not None:
+            yield parse_game(self._data[previous:])
+
+    def game(self, n: int) -> Game:
+        return next(self.games(n))
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.path.with_name(self.path.name + ".idx")
+
+    def index(self) -> array:
+        # 索引文件与棋谱的大小和修改时间对不上时重新生成
+        if self._index is None:
+            stat = os.fstat(self._file.fileno())
+            self._index = self._load_index(stat)
+            if self._index is None:
+                self._index = array("Q", _game_starts(self._data))
+                try:
+                    self._dump_index(stat)
+                except OSError:
+                    pass
+        return self._index
+
+    def _load_index(self, stat: os.stat_result) -> Optional[array]:
+        try:
+            data = self.index_path.read_bytes()
+        except OSError:
+            return None
+        if len(data) < _INDEX_HEADER.size:
+            return None
+        magic, version, size, mtime, count = _INDEX_HEADER.unpack_from(data)
+        if (magic, version, size, mtime) != (_INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns):
+            return None
+        if len(data) != _INDEX_HEADER.size + count * 8:
+            return None
+        offsets = array("Q")
+        offsets.frombytes(data[_INDEX_HEADER.size:])
+        return offsets
+
+    def _dump_index(self, stat: os.stat_result) -> None:
+        header = _INDEX_HEADER.pack(_INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns, len(self._index))
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(header + self._index.tobytes())
+            os.replace(tmp_path, self.index_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def __repr__(self) -> str:
+        return f"<PgnFile {str(self.path)!r}>"
+
+
+def read_games(path: Union[str, os.PathLike], *, start: int = 0) -> Iterator[Game]:
+    with PgnFile(path) as pgn:
+        yield from pgn.games(start)
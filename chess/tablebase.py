@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import mmap
+import os
+import pathlib
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import chess
+from chess import ADVISOR, BISHOP, BLACK, KING, PAWN, RED, Board, Move
+
+TABLEBASE_VERSION = 1
+TABLEBASE_NAME = "tablebase.bin"
+
+# magic, version, 表的个数
+_HEADER = struct.Struct("<4sII")
+_MAGIC = b"XQTB"
+# 子力签名（ASCII，不足补 0）, 数据偏移, 每个行棋方的局面数
+_DIRECTORY_ENTRY = struct.Struct("<16sQI")
+
+# 每个局面一个字节：0 和棋，255 不合法，其余是 d + 1，d 为到将死（或困毙）的半回合数，偶数是行棋方输，奇数是行棋方赢
+_DRAW = 0
+_INVALID = 255
+_MAX_DISTANCE = 253
+
+# 签名里每一方先写将，再按这个顺序写其余棋子，例如 KRKAA 是红方车帅对黑方双士将
+_SIGNATURE_ORDER = "KABNRCP"
+_PIECE_TYPE_OF = {symbol.upper(): piece_type for piece_type, symbol in enumerate(chess.PIECE_SYMBOLS) if symbol}
+
+
+@dataclasses.dataclass(frozen=True)
+class ProbeResult:
+    # 行棋方视角：1 赢，0 和，-1 输
+    wdl: int
+
+    # 到将死（或困毙）的半回合数，和棋为 0
+    distance: int
+
+
+def _closure(squares: chess.Bitboard, attacks) -> List[chess.Square]:
+    # 从初始位置出发在空棋盘上能走到的格子
+    reached = squares
+    frontier = squares
+    while frontier:
+        new = 0
+        for square in chess.scan_reversed(frontier):
+            new |= attacks(square)
+        frontier = new & chess.BB_IN_BOARD & ~reached
+        reached |= frontier
+    return sorted(chess.scan_reversed(reached))
+
+
+def _domains() -> Dict[Tuple[chess.Color, chess.PieceType], List[chess.Square]]:
+    start = Board()
+    everywhere = list(chess.SQUARES_IN_BOARD)
+    domains = {}
+    for color in chess.COLORS:
+        side = chess.BB_RED_SIDE if color == RED else chess.BB_BLACK_SIDE
+        for piece_type in chess.PIECE_TYPES:
+            squares = start.pieces_mask(piece_type, color)
+            if piece_type == KING:
+                domain = _closure(squares, lambda sq: chess.BB_KING_ATTACKS[sq])
+            elif piece_type == ADVISOR:
+                domain = _closure(squares, lambda sq: chess.BB_ADVISOR_ATTACKS[sq])
+            elif piece_type == BISHOP:
+                domain = _closure(squares, lambda sq: chess.BB_BISHOP_ATTACKS_FLAT[sq][0] & side)
+            elif piece_type == PAWN:
+                domain = _closure(squares, lambda sq, color=color: chess.BB_PAWN_ATTACKS[color][sq])
+            else:
+                domain = everywhere
+            domains[color, piece_type] = domain
+    return domains
+
+
+_DOMAINS = _domains()
+
+
+def normalize_signature(signature: str) -> str:
+    signature = signature.upper()
+    if not signature.startswith("K") or signature.count("K") != 2:
+        raise ValueError(f"expected a material signature like KRKAA, got {signature!r}")
+    split = signature.index("K", 1)
+    sides = []
+    for side in (signature[:split], signature[split:]):
+        pieces = side[1:]
+        for symbol in pieces:
+            if symbol not in _SIGNATURE_ORDER or symbol == "K":
+                raise ValueError(f"unexpected piece {symbol!r} in material signature {signature!r}")
+        sides.append("K" + "".join(sorted(pieces, key=_SIGNATURE_ORDER.index)))
+    return "".join(sides)
+
+
+def board_signature(board: Board, *, flip: bool = False) -> str:
+    # flip=True 时交换红黑双方
+    return "".join(
+        symbol * chess.popcount(board.pieces_mask(_PIECE_TYPE_OF[symbol], color))
+        for color in ((BLACK, RED) if flip else (RED, BLACK))
+        for symbol in _SIGNATURE_ORDER
+    )
+
+
+class _Layout:
+    # 一个子力签名下局面的编号：每个棋子在自己能到的格子里的序号按混合进制拼起来，同类棋子不去重
+    def __init__(self, signature: str) -> None:
+        self.signature = signature
+        split = signature.index("K", 1)
+        self.slots: List[Tuple[chess.Color, chess.PieceType]] = [
+            (RED, _PIECE_TYPE_OF[symbol]) for symbol in signature[:split]
+        ] + [(BLACK, _PIECE_TYPE_OF[symbol]) for symbol in signature[split:]]
+        self.domains = [_DOMAINS[slot] for slot in self.slots]
+        self.positions = [{square: i for i, square in enumerate(domain)} for domain in self.domains]
+        self.strides = []
+        size = 1
+        for domain in reversed(self.domains):
+            self.strides.append(size)
+            size *= len(domain)
+        self.strides.reverse()
+        self.size = size
+
+    def index(self, squares: Iterable[chess.Square]) -> int:
+        return sum(
+            positions[square] * stride for positions, stride, square in zip(self.positions, self.strides, squares)
+        )
+
+    def sub_signature(self, slot: int) -> str:
+        # 签名的字符和棋子一一对应，吃掉一个棋子后其余棋子的顺序不变
+        return self.signature[:slot] + self.signature[slot + 1:]
+
+
+def _board_squares(board: Board, layout: _Layout, flip: bool) -> Optional[List[chess.Square]]:
+    # 按签名的棋子顺序列出每个棋子的格子
+    squares = []
+    taken: Dict[Tuple[chess.Color, chess.PieceType], List[chess.Square]] = {}
+    for color, piece_type in layout.slots:
+        key = (color, piece_type)
+        if key not in taken:
+            board_color = not color if flip else color
+            found = chess.scan_reversed(board.pieces_mask(piece_type, board_color))
+            taken[key] = [chess.square_mirror(square) if flip else square for square in found]
+        if not taken[key]:
+            return None
+        square = taken[key].pop()
+        # 摆出来的局面里棋子可能不在它从初始位置能走到的格子上（如 b3 的兵、e4 的相），库里没有这样的局面
+        if square not in layout.positions[len(squares)]:
+            return None
+        squares.append(square)
+    return squares
+
+
+def _decode(value: int) -> Optional[ProbeResult]:
+    if value == _INVALID:
+        return None
+    if value == _DRAW:
+        return ProbeResult(0, 0)
+    distance = value - 1
+    return ProbeResult(1 if distance % 2 else -1, distance)
+
+
+class Tablebase:
+    # 用 mmap 打开 generate() 写出的残局库文件
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._tables: Dict[str, Tuple[int, _Layout]] = {}
+        try:
+            if len(self._mmap) < _HEADER.size:
+                raise ValueError("truncated header")
+            magic, version, count = _HEADER.unpack_from(self._mmap, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"bad magic {magic!r}")
+            if version != TABLEBASE_VERSION:
+                raise ValueError(f"version {version}, expected {TABLEBASE_VERSION}")
+            for i in range(count):
+                raw, offset, size = _DIRECTORY_ENTRY.unpack_from(self._mmap, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+                signature = raw.rstrip(b"\0").decode("ascii")
+                layout = _Layout(signature)
+                if layout.size != size or offset + 2 * size > len(self._mmap):
+                    raise ValueError(f"bad directory entry for {signature}")
+                self._tables[signature] = (offset, layout)
+        except ValueError as err:
+            self._mmap.close()
+            raise ValueError(f"invalid tablebase {self.path}: {err}") from None
+        self.max_pieces = max((len(signature) for signature in self._tables), default=0)
+
+    @property
+    def signatures(self) -> List[str]:
+        return list(self._tables)
+
+    def __enter__(self) -> Tablebase:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def probe(self, board: Board) -> Optional[ProbeResult]:
+        # 局面不在库里时返回 None；不考虑重复局面和六十回合规则
+        if chess.popcount(board.occupied) > self.max_pieces:
+            return None
+        for flip in (False, True):
+            table = self._tables.get(board_signature(board, flip=flip))
+            if table is None:
+                continue
+            offset, layout = table
+            squares = _board_squares(board, layout, flip)
+            if squares is None:
+                return None
+            turn = not board.turn if flip else board.turn
+            side = 0 if turn == RED else 1
+            return _decode(self._mmap[offset + side * layout.size + layout.index(squares)])
+        return None
+
+    def best_move(self, board: Board) -> Optional[Move]:
+        # 赢棋走最快的杀法，输棋拖最久，和棋走一步保持和棋的
+        current = self.probe(board)
+        if current is None:
+            return None
+        best = None
+        best_key = None
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                result = self.probe(board)
+            finally:
+                board.pop()
+            if result is None:
+                continue
+            # 对方视角的结果：对方输时越快越好，对方赢时拖得越久越好
+            key = (-result.wdl, -result.distance if result.wdl < 0 else result.distance)
+            if best_key is None or key > best_key:
+                best, best_key = move, key
+        return best
+
+    def __repr__(self) -> str:
+        return f"<Tablebase {str(self.path)!r} signatures={self.signatures}>"
+
+
+def default_path() -> pathlib.Path:
+    return chess.moves_table_dir() / TABLEBASE_NAME
+
+
+_default: Optional[Tablebase] = None
+_default_loaded = False
+
+
+def open_default() -> Optional[Tablebase]:
+    # 默认的残局库放在走法表同一个目录（$CHESS_TABLES_DIR），文件不存在时返回 None
+    global _default, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        try:
+            _default = Tablebase(default_path())
+        except FileNotFoundError:
+            _default = None
+    return _default
+
+
+def probe(board: Board) -> Optional[ProbeResult]:
+    tablebase = open_default()
+    return tablebase.probe(board) if tablebase is not None else None
+
+
+def _solve(layout: _Layout, tables: Dict[str, bytearray], layouts: Dict[str, _Layout]) -> bytearray:
+    # 逆向分析：先正向生成一遍走法，记下同一子力内的走法（反向边）和吃子后进入的子表结果，
+    # 然后按距离从小到大确定输赢：对方输的后继让本方赢，全部后继都是对方赢时本方输
+    size = layout.size
+    nodes = 2 * size
+    values = bytearray([_INVALID]) * nodes
+    remaining = array("H", bytes(2 * nodes))
+    longest = array("H", bytes(2 * nodes))
+    drawn = bytearray(nodes)
+    sources = array("I")
+    targets = array("I")
+    buckets: List[List[int]] = [[] for _ in range(_MAX_DISTANCE + 2)]
+
+    sub_layouts = {}
+    for slot in range(len(layout.slots)):
+        if layout.slots[slot][1] != KING:
+            sub_signature = layout.sub_signature(slot)
+            sub_layouts[slot] = (layouts[sub_signature], tables[sub_signature])
+
+    board = Board(None)
+    pieces = [chess.Piece(piece_type, color) for color, piece_type in layout.slots]
+    kings = [slot for slot, (_, piece_type) in enumerate(layout.slots) if piece_type == KING]
+    positions = layout.positions
+    strides = layout.strides
+    for index, squares in enumerate(itertools.product(*layout.domains)):
+        if len(set(squares)) != len(squares):
+            continue
+        board.clear_board()
+        for square, piece in zip(squares, pieces):
+            board._set_piece_at(square, piece.piece_type, piece.color)
+        slot_at = {square: slot for slot, square in enumerate(squares)}
+        piece_types = board._piece_types
+        for side, turn in enumerate((RED, BLACK)):
+            board.turn = turn
+            # 不走棋的一方被将军（包括对脸）的局面不合法
+            if board.is_attacked_by(turn, squares[kings[side ^ 1]]):
+                continue
+            node = side * size + index
+            other = (side ^ 1) * size
+            values[node] = _DRAW
+            moves = board.generate_legal_moves_packed()
+            win = None
+            for move in moves:
+                from_square, to_square = move >> 8, move & 0xFF
+                slot = slot_at[from_square]
+                if not piece_types[to_square]:
+                    sources.append(node)
+                    targets.append(
+                        other + index + (positions[slot][to_square] - positions[slot][from_square]) * strides[slot]
+                    )
+                    remaining[node] += 1
+                    continue
+                captured = slot_at[to_square]
+                sub_layout, sub_table = sub_layouts[captured]
+                after = list(squares)
+                after[slot] = to_square
+                del after[captured]
+                result = sub_table[(side ^ 1) * sub_layout.size + sub_layout.index(after)]
+                if result == _DRAW:
+                    drawn[node] = 1
+                elif (result - 1) % 2 == 0:
+                    # 吃子后对方输
+                    distance = result
+                    win = distance if win is None else min(win, distance)
+                else:
+                    longest[node] = max(longest[node], result)
+            if win is not None:
+                buckets[win].append(node)
+            if not remaining[node] and not drawn[node]:
+                # 没有走法（将死或困毙）或者所有走法都是吃子并且都让对方赢
+                buckets[longest[node]].append(node)
+
+    # 按目标格子分组的前驱表
+    counts = array("I", bytes(4 * (nodes + 1)))
+    for target in targets:
+        counts[target + 1] += 1
+    for node in range(nodes):
+        counts[node + 1] += counts[node]
+    fill = array("I", counts)
+    predecessors = array("I", bytes(4 * len(sources)))
+    for source, target in zip(sources, targets):
+        predecessors[fill[target]] = source
+        fill[target] += 1
+    del sources, targets, fill
+
+    solved = bytearray(nodes)
+    for distance, bucket in enumerate(buckets):
+        for node in bucket:
+            if solved[node]:
+                continue
+            if distance > _MAX_DISTANCE:
+                raise ValueError(f"{layout.signature}: distance to mate exceeds {_MAX_DISTANCE} plies")
+            solved[node] = 1
+            values[node] = distance + 1
+            for i in range(counts[node], counts[node + 1]):
+                previous = predecessors[i]
+                if solved[previous]:
+                    continue
+                if distance % 2 == 0:
+                    buckets[distance + 1].append(previous)
+                else:
+                    remaining[previous] -= 1
+                    longest[previous] = max(longest[previous], distance + 1)
+                    if not remaining[previous] and not drawn[previous]:
+                        buckets[longest[previous]].append(previous)
+    return values
+
+
+def _sub_signatures(signature: str) -> List[str]:
+    layout = _Layout(signature)
+    return sorted({
+        layout.sub_signature(slot)
+        for slot, (_, piece_type) in enumerate(layout.slots)
+        if piece_type != KING
+    })
+
+
+def generate(signatures: Iterable[str], path: Union[str, os.PathLike], *, verbose: bool = False) -> List[str]:
+    # 生成指定子力及吃子后能到达的所有子力的表，写到同一个文件里
+    tables: Dict[str, bytearray] = {}
+    layouts: Dict[str, _Layout] = {}
+
+    def build(signature: str) -> None:
+        if signature in tables:
+            return
+        for sub_signature in _sub_signatures(signature):
+            build(sub_signature)
+        layout = _Layout(signature)
+        layouts[signature] = layout
+        tables[signature] = _solve(layout, tables, layouts)
+        if verbose:
+            table = tables[signature]
+            wins = sum(1 for value in table if value != _DRAW and value != _INVALID and value % 2 == 0)
+            print(f"{signature}: {layout.size} positions per side, {wins} wins for the side to move")
+
+    for signature in signatures:
+        build(normalize_signature(signature))
+
+    directory_size = _HEADER.size + len(tables) * _DIRECTORY_ENTRY.size
+    data = bytearray(_HEADER.pack(_MAGIC, TABLEBASE_VERSION, len(tables)))
+    offset = directory_size
+    for signature, table in tables.items():
+        data += _DIRECTORY_ENTRY.pack(signature.encode("ascii"), offset, layouts[signature].size)
+        offset += len(table)
+    for table in tables.values():
+        data += table
+
+    # 先写临时文件再替换，正在使用旧文件的进程不受影响
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return list(tables)
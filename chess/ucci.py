@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import sys
+import threading
+from typing import IO, Callable, List, Optional, TypeVar
+
+import chess
+import chess.book
+import chess.engine
+
+ENGINE_NAME = "python-chinese-chess"
+
+# go time 没有给 movestogo 时，假定剩下的时间还要走这么多步
+_DEFAULT_MOVES_TO_GO = 30
+
+_Number = TypeVar("_Number", int, float)
+
+
+class UcciEngine:
+    # 一直运行的 UCCI 引擎：从 input 读命令，向 output 写回应；搜索在后台线程里进行，期间仍然可以接收 stop
+    def __init__(self, input: IO[str] = sys.stdin, output: IO[str] = sys.stdout) -> None:
+        self.input = input
+        self.output = output
+        self.board = chess.Board()
+        self.hash_mb = 16.0
+        self.threads = 1
+        self.book: Optional[chess.book.OpeningBook] = None
+        self.use_book = True
+        # stop 命令和 ponderhit 的计时器通过它停止搜索，单进程和并行搜索共用
+        self._stop_event = threading.Event()
+        self.searcher = chess.engine.Searcher(hash_mb=self.hash_mb, stop_event=self._stop_event)
+        self._thread: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._pondering = False
+        self._ponder_time: Optional[float] = None
+        # 后台思考提前搜完时，等 ponderhit 或 stop 之后才输出 bestmove
+        self._ponder_done = threading.Event()
+        self._lock = threading.Lock()
+
+    def send(self, line: str) -> None:
+        with self._lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self) -> None:
+        # 界面或对局程序难免发来错误的命令，报告之后继续处理下一行，不让引擎退出
+        for line in self.input:
+            try:
+                if not self.handle(line):
+                    break
+            except Exception as err:
+                self.send(f"info string error: {line.strip()}: {err}")
+        self.stop()
+
+    def _number(self, name: str, value: str, type_: Callable[[str], _Number]) -> Optional[_Number]:
+        try:
+            return type_(value)
+        except ValueError:
+            self.send(f"info string invalid {name}: {value!r}")
+            return None
+
+    def handle(self, line: str) -> bool:
+        # 返回 False 表示收到 quit
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "ucci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send("option hashsize type spin min 1 max 4096 default 16")
+            self.send("option threads type spin min 1 max 64 default 1")
+            self.send("option usebook type check default true")
+            self.send("option bookfiles type string default")
+            self.send("ucciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.send("bye")
+            return False
+        else:
+            # UCCI 要求忽略不认识的命令（banmoves、probe 等暂不支持）
+            pass
+        return True
+
+    def set_option(self, args: List[str]) -> None:
+        if not args:
+            return
+        name, value = args[0].lower(), " ".join(args[1:])
+        if name == "hashsize":
+            hash_mb = self._number(name, value, float)
+            if hash_mb is None or hash_mb <= 0:
+                return
+            self.hash_mb = hash_mb
+            self.searcher = chess.engine.Searcher(hash_mb=self.hash_mb, stop_event=self._stop_event)
+        elif name == "threads":
+            threads = self._number(name, value, int)
+            if threads is not None:
+                self.threads = max(threads, 1)
+        elif name == "usebook":
+            self.use_book = value.lower() in ("true", "on", "1")
+        elif name == "bookfiles":
+            if self.book is not None:
+                self.book.close()
+            self.book = chess.book.OpeningBook(value) if value else None
+        elif name == "newgame":
+            self.searcher.clear()
+
+    def set_position(self, args: List[str]) -> None:
+        moves: List[str] = []
+        if "moves" in args:
+            index = args.index("moves")
+            args, moves = args[:index], args[index + 1:]
+        if args and args[0] == "fen":
+            board = chess.Board(" ".join(args[1:]))
+        else:
+            # position startpos
+            board = chess.Board()
+        # 遇到写错或不合法的走法就停在前一步
+        for iccs in moves:
+            try:
+                move = chess.Move.from_iccs(iccs)
+            except ValueError:
+                move = None
+            if move is None or not board.is_legal(move):
+                self.send(f"info string illegal move {iccs}, ignoring the rest")
+                break
+            board.push(move)
+        self.board = board
+
+    def go(self, args: List[str]) -> None:
+        limit = chess.engine.Limit()
+        ponder = False
+        options = {}
+        i = 0
+        while i < len(args):
+            if args[i] in ("ponder", "draw"):
+                ponder = ponder or args[i] == "ponder"
+                i += 1
+            elif args[i] == "infinite":
+                i += 1
+            else:
+                if i + 1 < len(args):
+                    options[args[i]] = args[i + 1]
+                i += 2
+        numbers = {}
+        for name, value in options.items():
+            number = self._number(name, value, int)
+            if number is None:
+                # 限制写错时不能当成不限时搜索，直接回复，界面不会一直等 bestmove
+                self.send("nobestmove")
+                return
+            numbers[name] = number
+        if "depth" in numbers:
+            limit.depth = numbers["depth"]
+        if "nodes" in numbers:
+            limit.nodes = numbers["nodes"]
+        move_time = None
+        if "time" in numbers:
+            # UCCI 3.0 的时间单位是毫秒
+            remaining = numbers["time"] / 1000
+            moves_to_go = numbers.get("movestogo", _DEFAULT_MOVES_TO_GO)
+            increment = numbers.get("increment", 0) / 1000
+            move_time = min(remaining / max(moves_to_go, 1) + increment, remaining * 0.8)
+
+        if self.use_book and self.book is not None:
+            entry = self.book.choice(self.board)
+            if entry is not None and not ponder:
+                self.send(f"bestmove {entry.move.iccs()}")
+                return
+
+        # 后台思考时不限时，ponderhit 之后才开始按分配的时间计时
+        self._pondering = ponder
+        self._ponder_time = move_time
+        self._ponder_done.clear()
+        if not ponder:
+            limit.time = move_time
+        self._thread = threading.Thread(target=self._search, args=(self.board.copy(), limit), daemon=True)
+        self._thread.start()
+
+    def _search(self, board: chess.Board, limit: chess.engine.Limit) -> None:
+        def info(info: chess.engine.SearchInfo) -> None:
+            pv = " ".join(move.iccs() for move in info.pv)
+            self.send(
+                f"info depth {info.depth} score {info.score} time {int(info.time * 1000)} "
+                f"nodes {info.nodes} nps {info.nps} pv {pv}"
+            )
+
+        if self.threads > 1:
+            result = chess.engine.search(
+                board, limit, info, threads=self.threads, hash_mb=self.hash_mb, stop_event=self._stop_event
+            )
+        else:
+            result = self.searcher.search(board, limit, info)
+        if self._pondering:
+            self._ponder_done.wait()
+        if result.move is None:
+            self.send("nobestmove")
+        elif len(result.pv) >= 2:
+            self.send(f"bestmove {result.move.iccs()} ponder {result.pv[1].iccs()}")
+        else:
+            self.send(f"bestmove {result.move.iccs()}")
+
+    def ponderhit(self) -> None:
+        # 对方走了预测的走法，从现在开始按分配的时间计时
+        if not self._pondering:
+            return
+        self._pondering = False
+        self._ponder_done.set()
+        if self._ponder_time is not None:
+            self._timer = threading.Timer(self._ponder_time, self._stop_event.set)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        self._ponder_done.set()
+        thread.join()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # 搜索已经自己结束时 set() 不会被搜索清除，这里复位，以免影响下一次搜索
+        self._stop_event.clear()
+        self._thread = None
+        self._pondering = False
+
+
+def main() -> int:
+    UcciEngine().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import mmap
+import os
+import pathlib
+import struct
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import chess
+import chess.pgn
+
+# 文件头 1024 字节，之后是先序排列的走法树
+_HEADER_SIZE = 1024
+_MAGIC = b"XQ"
+_COPYRIGHT = b"[(C) Copyright Mr. Dong Shiwei.]"
+
+# 文件头里 32 个棋子的顺序：车马相仕帅仕相马车炮炮兵兵兵兵兵，红方在前
+_PIECE_ORDER = "RNBAKABNRCCPPPPP"
+
+# 文件头里的字符串：第一个字节是长度，后面是 GBK 编码的内容
+_HEADER_STRINGS = [
+    ("Title", 80, 64),
+    ("Event", 208, 64),
+    ("Date", 272, 16),
+    ("Site", 288, 16),
+    ("Red", 304, 16),
+    ("Black", 320, 16),
+    ("TimeControl", 336, 64),
+    ("Annotator", 464, 16),
+    ("Author", 480, 16),
+]
+_RESULTS = {1: "1-0", 2: "0-1", 3: "1/2-1/2"}
+
+_INT32 = struct.Struct("<i")
+
+
+def _square54_plus_221(x: int) -> int:
+    return x * x * 54 + 221
+
+
+def _decode(data: bytes) -> str:
+    # XQF 里的字符串都是 GBK 编码
+    return data.decode("gb18030", errors="replace")
+
+
+def _square(xy: int) -> int:
+    # XQF 的坐标是 路 * 10 + 行，都从红方左下角的 0 开始
+    return (xy % 10 + 3) << 4 | (xy // 10 + 3)
+
+
+class _Reader:
+    # 1.1 以后的版本把棋子位置、走法和注释都加了密，密钥在文件头里
+    def __init__(self, data) -> None:
+        self.data = data
+        self.version = data[2]
+        if self.version <= 10:
+            self.key_xy = self.key_xyf = self.key_xyt = 0
+            self.key_rmk_size = 0
+            self.keys = bytes(32)
+        else:
+            key_mask, key_or = data[3], data[8:12]
+            key_sum, key_xy, key_xyf, key_xyt = data[12:16]
+            self.key_xy = _square54_plus_221(key_xy) * key_xy & 0xFF
+            self.key_xyf = _square54_plus_221(key_xyf) * self.key_xy & 0xFF
+            self.key_xyt = _square54_plus_221(key_xyt) * self.key_xyf & 0xFF
+            self.key_rmk_size = (key_sum * 256 + key_xy) % 32000 + 767
+            keys = [
+                key_sum & key_mask | key_or[0],
+                key_xy & key_mask | key_or[1],
+                key_xyf & key_mask | key_or[2],
+                key_xyt & key_mask | key_or[3],
+            ]
+            self.keys = bytes(char & keys[i % 4] for i, char in enumerate(_COPYRIGHT))
+        self.pos = _HEADER_SIZE
+
+    def read(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise ValueError("truncated move tree")
+        data = bytes((byte - self.keys[(self.pos + i) & 31]) & 0xFF
+                     for i, byte in enumerate(self.data[self.pos:self.pos + size]))
+        self.pos += size
+        return data
+
+    def pieces(self) -> List[Tuple[int, chess.Piece]]:
+        xys = self.data[16:48]
+        if self.version >= 12:
+            # 1.2 以后的版本还把棋子的顺序循环移动了
+            shifted = [0] * 32
+            for i, xy in enumerate(xys):
+                shifted[(i + self.key_xy + 1) & 31] = xy
+            xys = shifted
+        pieces = []
+        for i, xy in enumerate(xys):
+            xy = (xy - self.key_xy) & 0xFF
+            if xy < 90:
+                symbol = _PIECE_ORDER[i % 16]
+                pieces.append((_square(xy), chess.Piece.from_symbol(symbol if i < 16 else symbol.lower())))
+        return pieces
+
+    def step(self) -> Tuple[int, int, bool, str]:
+        # 返回 (起点, 终点, 是否有下一步, 注释)
+        from_xy, to_xy, tag, _ = self.read(4)
+        from_xy = (from_xy - 24 - self.key_xyf) & 0xFF
+        to_xy = (to_xy - 32 - self.key_xyt) & 0xFF
+        if self.version <= 10:
+            has_next = bool(tag & 0xF0)
+            comment_size = _INT32.unpack(self.read(4))[0]
+        else:
+            has_next = bool(tag & 0x80)
+            comment_size = _INT32.unpack(self.read(4))[0] - self.key_rmk_size if tag & 0x20 else 0
+        comment = _decode(self.read(comment_size)) if comment_size > 0 else ""
+        return from_xy, to_xy, has_next, comment
+
+
+def _header_string(data, offset: int, size: int) -> str:
+    length = min(data[offset], size - 1)
+    return _decode(bytes(data[offset + 1:offset + 1 + length])).strip()
+
+
+def parse_xqf(data) -> chess.pgn.Game:
+    # 只读主线：先序排列的走法树里，有下一步的走法后面紧跟着的就是主线的下一步，变着都在后面
+    if len(data) < _HEADER_SIZE or data[:2] != _MAGIC:
+        raise ValueError("not an XQF file")
+    reader = _Reader(data)
+    game = chess.pgn.Game()
+    for name, offset, size in _HEADER_STRINGS:
+        value = _header_string(data, offset, size)
+        if value:
+            game.headers[name] = value
+    game.result = _RESULTS.get(data[51], "*")
+    game.headers["Result"] = game.result
+
+    board = chess.Board(None)
+    for square, piece in reader.pieces():
+        board.set_piece_at(square, piece)
+
+    _, _, has_next, comment = reader.step()
+    if comment:
+        game.headers["Comment"] = comment
+    steps = []
+    while has_next:
+        try:
+            from_xy, to_xy, has_next, _ = reader.step()
+        except ValueError as err:
+            game.errors.append(str(err))
+            break
+        steps.append((from_xy, to_xy))
+
+    # 残局谱可能是黑方先走，看第一步是哪一方的棋子
+    if steps and steps[0][0] < 90:
+        piece = board.piece_at(_square(steps[0][0]))
+        if piece is not None:
+            board.turn = piece.color
+    game.fen = board.fen()
+
+    for from_xy, to_xy in steps:
+        move = chess.Move(_square(from_xy), _square(to_xy)) if from_xy < 90 and to_xy < 90 else None
+        if move is None or not board.is_legal(move):
+            game.errors.append(f"illegal move {from_xy:02d}-{to_xy:02d} in {board.fen()}")
+            break
+        game.moves.append(move)
+        board.push(move)
+    return game
+
+
+def read_xqf(path: Union[str, os.PathLike]) -> chess.pgn.Game:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return parse_xqf(data)
+            except ValueError as err:
+                raise ValueError(f"invalid XQF file {path}: {err}") from None
+
+
+def read_games(paths: Iterable[Union[str, os.PathLike]]) -> Iterator[chess.pgn.Game]:
+    # 每个 XQF 文件只有一局；目录按文件名顺序读其中的 .xqf 文件
+    for path in paths:
+        path = pathlib.Path(path)
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.suffix.lower() == ".xqf":
+                    yield read_xqf(child)
+        else:
+            yield read_xqf(path)
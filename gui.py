@@ -1,50 +1,83 @@
 #!/usr/bin/env python3
 
-import sys
 import threading
+import time
 import tkinter as tk
 from os import getenv
-from os.path import abspath
+from os.path import exists
 from tkinter import messagebox
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional
 
 from PIL import Image, ImageTk
 
 import chess
+import chess.book
+import chess.engine
 
 FEN = chess.STARTING_FEN
 SELF_PLAY, COMPUTER_PLAY = 1, 2
 THINK_TIME = int(getenv("THINK_TIME")) if getenv("THINK_TIME") else 1
-
-sys.path.append(abspath('searcher'))
-
-from elephantfish import Searcher
-
-from searcher.tools import parseFEN, search
+# 用 python -m chess build-book 生成，文件不存在时不用开局库
+BOOK_PATH = getenv("BOOK") or "book.bin"
 
 
 class ThinkThread(threading.Thread):
-    def __init__(self, board: chess.Board, think_time: int, on_finish: Callable):
-        threading.Thread.__init__(self)
-        self.board = board
+    # ponder=True 时是在对手思考期间后台搜索预测的局面，直到 ponderhit() 或 stop() 才结束
+    def __init__(
+        self,
+        board: chess.Board,
+        think_time: float,
+        on_finish: Callable,
+        tt: Optional[chess.engine.TranspositionTable] = None,
+        ponder: bool = False,
+        book: Optional[chess.book.OpeningBook] = None,
+    ):
+        threading.Thread.__init__(self, daemon=True)
+        self.board = board.copy()
         self.think_time = think_time
         self.on_finish = on_finish
+        self.searcher = chess.engine.Searcher(tt)
+        self.pondering = ponder
+        self.book = book
+        self.result: Optional[chess.engine.SearchResult] = None
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
 
     def run(self):
-        pos = parseFEN(self.board.fen())
-        move, _, _ = search(Searcher(), pos, THINK_TIME)
-        from_square, to_square = move
-        from_square = chess.SQUARES_180[from_square]
-        to_square = chess.SQUARES_180[to_square]
-        if self.board.turn == chess.BLACK:
-            from_square = 255 - from_square - 1
-            to_square = 255 - to_square - 1
-        move = chess.Move(from_square, to_square)
-        if self.on_finish:
-            self.on_finish(move)
+        entry = self.book.choice(self.board) if self.book is not None else None
+        if entry is not None:
+            # 开局库里有的局面直接出着，不用搜索
+            result = chess.engine.SearchResult(entry.move, 0, 0, 0, 0.0, [entry.move])
+        else:
+            limit = chess.engine.Limit() if self.pondering else chess.engine.Limit(time=self.think_time)
+            result = self.searcher.search(self.board, limit)
+        with self._lock:
+            self.result = result
+            if self.pondering:
+                return
+        self.finish()
+
+    def finish(self):
+        on_finish = self.on_finish
+        if on_finish and self.result.move:
+            on_finish(self.result)
+
+    def ponderhit(self):
+        # 对手走了预测的走法：已经想够了就直接出着，否则把剩下的思考时间用完
+        with self._lock:
+            self.pondering = False
+            finished = self.result is not None
+        if finished:
+            self.finish()
+            return
+        remaining = self.think_time - (time.perf_counter() - self.start_time)
+        timer = threading.Timer(max(remaining, 0), self.searcher.stop)
+        timer.daemon = True
+        timer.start()
 
     def stop(self):
         self.on_finish = None
+        self.searcher.stop()
 
 
 class PhotoImage(ImageTk.PhotoImage):
@@ -67,11 +100,16 @@ class Application(tk.Frame):
     board: chess.Board
     rotate = False
     mode = SELF_PLAY
+    think_thread: Optional[ThinkThread] = None
+    book: Optional[chess.book.OpeningBook] = None
+    ponder_move: Optional[chess.Move] = None
 
     def __init__(self) -> None:
         self.master = tk.Tk()
         super().__init__(self.master)
         self.load_resources()
+        if exists(BOOK_PATH):
+            self.book = chess.book.OpeningBook(BOOK_PATH)
         self.master.title("中国象棋")
         self.master.resizable(False, False)
         self.pack()
@@ -140,7 +178,11 @@ class Application(tk.Frame):
         self.reset()
 
     def reset(self) -> None:
-        self.board = chess.Board(FEN)
+        self.stop_thinking()
+        # 置换表在整局棋里保留，后台思考的结果也存在里面
+        self.tt = chess.engine.TranspositionTable()
+        # 点击、刷新和悔棋会反复查询同一局面的走法和终局状态
+        self.board = chess.Board(FEN, position_cache=chess.PositionCache(maxsize=1024))
         self.select_square = None
         self.update_canvas()
 
@@ -151,15 +193,42 @@ class Application(tk.Frame):
             # 电脑思考时不能悔棋
             return
         if self.mode == COMPUTER_PLAY:
+            self.stop_thinking()
             self.board.pop()
         self.board.pop()
         self.select_square = None
         self.update_canvas()
 
     def computer_move(self) -> None:
-        def on_finish(move):
-            self.push(move)
-        ThinkThread(self.board, 1, on_finish).start()
+        thread = self.think_thread
+        if thread is not None and thread.pondering and self.board.move_stack[-1:] == [self.ponder_move]:
+            # 猜中了对手的走法，接着用后台思考的结果
+            thread.ponderhit()
+            return
+        self.stop_thinking()
+        self.think_thread = ThinkThread(self.board, THINK_TIME, self.on_think_finish, self.tt, book=self.book)
+        self.think_thread.start()
+
+    def on_think_finish(self, result: chess.engine.SearchResult) -> None:
+        self.push(result.move)
+        self.think_thread = None
+        if self.mode != COMPUTER_PLAY or self.board.is_checkmate():
+            return
+        # 按主要变例预测对手的应着，在对手思考期间提前搜索应着之后的局面
+        if len(result.pv) >= 2 and result.pv[0] == result.move and self.board.is_legal(result.pv[1]):
+            self.ponder_move = result.pv[1]
+            board = self.board.copy()
+            board.push(self.ponder_move)
+            self.think_thread = ThinkThread(
+                board, THINK_TIME, self.on_think_finish, self.tt, ponder=True, book=self.book
+            )
+            self.think_thread.start()
+
+    def stop_thinking(self) -> None:
+        if self.think_thread is not None:
+            self.think_thread.stop()
+        self.think_thread = None
+        self.ponder_move = None
 
     def handle_click(self, event: tk.Event) -> None:
         if self.board.is_checkmate():
@@ -0,0 +1,53 @@
+import pathlib
+import tempfile
+import unittest
+
+import chess
+import chess.pgn
+
+GAMES = [
+    '[Event "第一局"]\n[Result "1-0"]\n\n1. h2e2 h9g7 2. 马二进三 1-0\n',
+    '[Event "第二局"]\n[Result "*"]\n\n1. C2.5 H8+7 *\n',
+    '[Event "第三局"]\n[Result "0-1"]\n\n1. 炮二平五 {注释} (1. h2e2) 马８进７ 0-1\n',
+]
+
+
+class PgnTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, data: bytes) -> pathlib.Path:
+        path = pathlib.Path(self.tmp.name) / "games.pgn"
+        path.write_bytes(data)
+        return path
+
+    def test_games(self) -> None:
+        path = self.write("\n".join(GAMES).encode("utf-8"))
+        with chess.pgn.PgnFile(path) as pgn:
+            games = list(pgn)
+        self.assertEqual([game.headers["Event"] for game in games], ["第一局", "第二局", "第三局"])
+        self.assertEqual([move.iccs() for move in games[0].moves], ["h2e2", "h9g7", "h0g2"])
+        self.assertEqual([move.iccs() for move in games[2].moves], ["h2e2", "h9g7"])
+        self.assertEqual(games[2].result, "0-1")
+        self.assertFalse(any(game.errors for game in games))
+
+    def test_bom(self) -> None:
+        # 文件开头的 BOM 不能多出一局，跳到第 n 局也不能错位
+        path = self.write(b"\xef\xbb\xbf" + "\n".join(GAMES).encode("utf-8"))
+        with chess.pgn.PgnFile(path) as pgn:
+            self.assertEqual(len(pgn), 3)
+            self.assertEqual(pgn.game(0).headers["Event"], "第一局")
+            self.assertEqual(pgn.game(2).headers["Event"], "第三局")
+
+    def test_index_reused(self) -> None:
+        path = self.write("\n".join(GAMES).encode("gbk"))
+        with chess.pgn.PgnFile(path) as pgn:
+            offsets = list(pgn.index())
+        with chess.pgn.PgnFile(path) as pgn:
+            self.assertEqual(list(pgn._load_index(path.stat())), offsets)
+            self.assertEqual(pgn.game(1).headers["Event"], "第二局")
+
+
+if __name__ == "__main__":
+    unittest.main()
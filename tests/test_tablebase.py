@@ -0,0 +1,63 @@
+import pathlib
+import random
+import tempfile
+import unittest
+
+import chess
+import chess.engine
+import chess.tablebase
+
+
+class TablebaseTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = pathlib.Path(cls.tmp.name) / chess.tablebase.TABLEBASE_NAME
+        chess.tablebase.generate(["KPK", "KBK", "KRK"], path)
+        cls.tablebase = chess.tablebase.Tablebase(path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tablebase.close()
+        cls.tmp.cleanup()
+
+    def test_probe_in_domain(self) -> None:
+        board = chess.Board("4k4/9/9/9/9/9/2P6/9/9/3K5 w - - 0 1")
+        self.assertIsNotNone(self.tablebase.probe(board))
+
+    def test_probe_off_domain(self) -> None:
+        # 摆出来的兵在 b3、相在 e4，不在从初始位置能走到的格子上
+        for fen in ("4k4/9/9/9/9/9/1P7/9/9/3K5 w - - 0 1", "4k4/9/9/9/9/4B4/9/9/9/3K5 w - - 0 1"):
+            board = chess.Board(fen)
+            self.assertIsNone(self.tablebase.probe(board))
+            self.assertIsNone(self.tablebase.best_move(board))
+
+    def test_search_off_domain(self) -> None:
+        board = chess.Board("4k4/9/9/9/9/9/1P7/9/9/3K5 w - - 0 1")
+        searcher = chess.engine.Searcher(tablebase=self.tablebase)
+        result = searcher.search(board, chess.engine.Limit(depth=2))
+        self.assertIsNotNone(result.move)
+
+    def test_best_move_wins_in_distance(self) -> None:
+        # 赢棋方按 best_move 走、输棋方也按 best_move 拖延，正好在探测到的半回合数上将死或困毙对方
+        rng = random.Random(1)
+        squares = list(chess.SQUARES_IN_BOARD)
+        won = 0
+        while won < 20:
+            board = chess.Board(None)
+            red_king, black_king, rook = rng.sample(squares, 3)
+            board.set_piece_at(red_king, chess.Piece(chess.KING, chess.RED))
+            board.set_piece_at(black_king, chess.Piece(chess.KING, chess.BLACK))
+            board.set_piece_at(rook, chess.Piece(chess.ROOK, chess.RED))
+            result = self.tablebase.probe(board)
+            if result is None or result.wdl != 1:
+                continue
+            won += 1
+            for _ in range(result.distance):
+                board.push(self.tablebase.best_move(board))
+            self.assertEqual(board.turn, chess.BLACK, board.fen())
+            self.assertFalse(any(board.legal_moves), board.fen())
+
+
+if __name__ == "__main__":
+    unittest.main()